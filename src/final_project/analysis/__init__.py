@@ -1,40 +1,68 @@
-"""Code for the core analyses."""
-from final_project.analysis.model import (
-    create_psm,
-    drop_na,
-    fit_regression_model,
-    load_model,
-    perform_subgroup_analysis_age,
-    perform_subgroup_analysis_education,
-    perform_subgroup_analysis_gender,
-    perform_subgroup_analysis_health,
-    perform_subgroup_analysis_hhsize,
-    perform_subgroup_analysis_marital_status,
-    run_logistic_ps,
-)
-from final_project.analysis.predict import (
-    get_loneliness_change,
-    get_predicted_data,
-    matched_df,
-    predict_att_ate_regression,
-    run_knn_matched,
-)
-
-__all__ = [
-    create_psm,
-    drop_na,
-    fit_regression_model,
-    load_model,
-    run_logistic_ps,
-    get_predicted_data,
-    matched_df,
-    predict_att_ate_regression,
-    run_knn_matched,
-    perform_subgroup_analysis_age,
-    perform_subgroup_analysis_education,
-    perform_subgroup_analysis_gender,
-    perform_subgroup_analysis_health,
-    perform_subgroup_analysis_hhsize,
-    perform_subgroup_analysis_marital_status,
-    get_loneliness_change,
-]
+"""Code for the core analyses.
+
+The functions are imported from their modules on first access, so that importing the
+package does not load the modules and their dependencies.
+
+"""
+import importlib
+
+_EXPORTS = {
+    "final_project.analysis.bootstrap": [
+        "bootstrap_att_ate",
+        "bootstrap_intervals",
+        "bootstrap_matching",
+    ],
+    "final_project.analysis.matching": [
+        "compute_effect_size",
+        "data_hash",
+        "fit_matching",
+        "load_matching",
+        "save_matching",
+    ],
+    "final_project.analysis.model": [
+        "create_psm",
+        "design_matrix",
+        "drop_na",
+        "fit_logistic",
+        "fit_ols",
+        "fit_regression_model",
+        "load_model",
+        "ols_design",
+        "perform_subgroup_analyses",
+        "perform_subgroup_analysis_age",
+        "perform_subgroup_analysis_education",
+        "perform_subgroup_analysis_gender",
+        "perform_subgroup_analysis_health",
+        "perform_subgroup_analysis_hhsize",
+        "perform_subgroup_analysis_marital_status",
+        "predict_logistic",
+        "run_logistic_ps",
+        "specification_curve",
+        "subgroup_effects",
+        "threshold_sweep",
+    ],
+    "final_project.analysis.predict": [
+        "get_loneliness_change",
+        "get_predicted_data",
+        "match_nearest",
+        "matched_df",
+        "predict_att_ate_regression",
+        "run_knn_matched",
+    ],
+}
+_MODULES = {name: module for module, names in _EXPORTS.items() for name in names}
+
+__all__ = list(_MODULES)
+
+
+def __getattr__(name):
+    if name not in _MODULES:
+        msg = f"module {__name__!r} has no attribute {name!r}"
+        raise AttributeError(msg)
+    value = getattr(importlib.import_module(_MODULES[name]), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted([*globals(), *__all__])
@@ -0,0 +1,183 @@
+"""Bootstrap confidence intervals of the treatment effects."""
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from final_project.analysis.matching import fit_matching
+from final_project.analysis.model import (
+    REGRESSION_COVARIATES,
+    drop_na,
+    fit_regression_model,
+    ols_design,
+)
+from final_project.analysis.predict import matched_df, predict_att_ate_regression
+from final_project.config import BOOTSTRAP_MEMORY_BYTES
+from final_project.tracing import traced
+
+
+@traced
+def bootstrap_att_ate(
+    data,
+    n_boot=2000,
+    seed=0,
+    memory_bytes=BOOTSTRAP_MEMORY_BYTES,
+    outcome="aggregate_loneliness_2017",
+    treatment="went_unemployed",
+    covariates=REGRESSION_COVARIATES,
+):
+    """Draws bootstrap replications of the ATT and ATE of predict_att_ate_regression on the matched data.
+
+    The ATT is the treatment coefficient of the outcome regression of fit_regression_model and the ATE the difference
+    in mean outcomes between the treatment and control group. A resample only changes how often each row is counted,
+    so the regression and the means of all resamples are computed from the row counts with matrix products, and the
+    regressions are solved as one batch. The row counts of each resample are drawn with one bincount, and as many
+    resamples are counted at a time as fit into memory_bytes. The products of the regression variables are built for
+    blocks of rows that fit into memory_bytes as well, so the memory use does not grow with n_boot and only linearly
+    with the number of rows. Only the rows without missing values in the regression variables are resampled.
+
+    Args:
+        data (pandas.DataFrame): The matched dataset.
+        n_boot (int, optional): The number of bootstrap replications. Defaults to 2000.
+        seed (int, optional): The seed of the random number generator. Defaults to 0.
+        memory_bytes (int, optional): The approximate size of the row counts and of the block of products held at a
+            time. Defaults to BOOTSTRAP_MEMORY_BYTES.
+        outcome (str, optional): The outcome variable. Defaults to "aggregate_loneliness_2017".
+        treatment (str, optional): The treatment variable. Defaults to "went_unemployed".
+        covariates (tuple, optional): The covariates of the regression. Defaults to REGRESSION_COVARIATES.
+
+    Returns:
+        tuple: The point estimates as a pandas.DataFrame with the columns 'ATT' and 'ATE', and the bootstrap
+            replications as a pandas.DataFrame with the same columns and one row per replication.
+
+    """
+    x, y, names, (_, scale) = ols_design(data, outcome, (treatment, *covariates))
+    x = x / scale
+    column = names.index(treatment)
+    n, p = x.shape
+    t = x[:, column] * scale[column]
+    # The products of a block are built in a temporary array before they are stacked.
+    block = max(1, memory_bytes // (16 * (p * p + p + 4)))
+
+    def estimate(counts):
+        sums = np.zeros((len(counts), p * p + p + 4))
+        for start in range(0, n, block):
+            rows = slice(start, start + block)
+            xb, yb, tb = x[rows], y[rows], t[rows]
+            terms = np.column_stack(
+                [
+                    (xb[:, :, None] * xb[:, None, :]).reshape(len(xb), p * p),
+                    xb * yb[:, None],
+                    tb * yb,
+                    tb,
+                    (1 - tb) * yb,
+                    1 - tb,
+                ],
+            )
+            sums += counts[:, rows] @ terms
+        gram = sums[:, : p * p].reshape(-1, p, p)
+        moments = sums[:, p * p : p * p + p, None]
+        att = np.linalg.solve(gram, moments)[:, column, 0] / scale[column]
+        treated_sum, treated_n, control_sum, control_n = sums[:, -4:].T
+        return pd.DataFrame(
+            {"ATT": att, "ATE": treated_sum / treated_n - control_sum / control_n},
+        )
+
+    rng = np.random.default_rng(seed)
+    batch_size = max(1, memory_bytes // (8 * n))
+    replications = []
+    for start in range(0, n_boot, batch_size):
+        counts = np.empty((min(batch_size, n_boot - start), n))
+        for row in counts:
+            row[:] = np.bincount(rng.integers(0, n, n), minlength=n)
+        replications.append(estimate(counts))
+    return estimate(np.ones((1, n))), pd.concat(replications, ignore_index=True)
+
+
+@traced
+def bootstrap_matching(
+    data,
+    n_boot=2000,
+    seed=0,
+    replacement=False,
+    caliper=None,
+    n_workers=1,
+):
+    """Draws bootstrap replications of the ATT and ATE that include the propensity score matching.
+
+    Every replication resamples the cleaned data, fits the matching with fit_matching, and estimates the ATT and ATE
+    on the matched resample like predict_att_ate_regression, with the native regression of fit_regression_model. The
+    resampled rows get new person IDs, so that repeated rows are matched as separate units.
+
+    Each replication has its own seed spawned from seed, so the replications do not depend on the number of workers.
+
+    Args:
+        data (pandas.DataFrame): The cleaned dataset.
+        n_boot (int, optional): The number of bootstrap replications. Defaults to 2000.
+        seed (int, optional): The seed the seeds of the replications are spawned from. Defaults to 0.
+        replacement (bool, optional): Whether to match with replacement. Defaults to False.
+        caliper (float, optional): The caliper of the matching. Defaults to None.
+        n_workers (int, optional): Number of worker processes. Defaults to 1, which runs the replications one after
+            another in the current process.
+
+    Returns:
+        pandas.DataFrame: The bootstrap replications with the columns 'ATT' and 'ATE'.
+
+    """
+    data = drop_na(data).reset_index(drop=True)
+    seeds = np.random.SeedSequence(seed).spawn(n_boot)
+    params = {"replacement": replacement, "caliper": caliper}
+    if n_workers > 1:
+        chunks = [seeds[i::n_workers] for i in range(n_workers)]
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            futures = [
+                executor.submit(_matching_replications, data, chunk, params)
+                for chunk in chunks
+            ]
+            results = [future.result() for future in futures]
+        # Restore the order of the seeds, which were dealt out to the workers in turn.
+        replications = pd.concat(results, ignore_index=True)
+        order = np.concatenate(
+            [np.arange(i, n_boot, n_workers) for i in range(n_workers)],
+        )
+        return replications.iloc[np.argsort(order)].reset_index(drop=True)
+    return _matching_replications(data, seeds, params)
+
+
+def _matching_replications(data, seeds, params):
+    """Runs the matching and the estimation on one resample of the data per seed."""
+    replications = []
+    for seed in seeds:
+        rng = np.random.default_rng(seed)
+        sample = data.take(rng.integers(0, len(data), len(data)))
+        sample = sample.assign(pid=np.arange(len(sample))).reset_index(drop=True)
+        matching = fit_matching(sample, **params)
+        matched = matched_df(matching["psm"], sample)
+        model = fit_regression_model(matched, engine="native")
+        replications.append(predict_att_ate_regression(matched, model))
+    return pd.concat(replications, ignore_index=True)
+
+
+def bootstrap_intervals(estimates, replications, alpha=0.05):
+    """Summarizes bootstrap replications by standard errors and percentile confidence intervals.
+
+    Args:
+        estimates (pandas.DataFrame): The point estimates, with one column per statistic and one row.
+        replications (pandas.DataFrame): The bootstrap replications, with the same columns.
+        alpha (float, optional): One minus the confidence level. Defaults to 0.05.
+
+    Returns:
+        pandas.DataFrame: A table with the columns 'Statistic', 'Estimate', 'Std. Error', 'CI Lower' and 'CI Upper',
+            with one row per statistic.
+
+    """
+    return pd.DataFrame(
+        {
+            "Statistic": replications.columns,
+            "Estimate": estimates.iloc[0].to_numpy(),
+            "Std. Error": replications.std(ddof=1).to_numpy(),
+            "CI Lower": replications.quantile(alpha / 2).to_numpy(),
+            "CI Upper": replications.quantile(1 - alpha / 2).to_numpy(),
+        },
+    )
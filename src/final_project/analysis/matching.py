@@ -0,0 +1,146 @@
+"""Functions for fitting and storing the propensity score matching."""
+
+import hashlib
+import json
+
+import pandas as pd
+
+from final_project.analysis.model import create_psm, drop_na, run_logistic_ps
+from final_project.analysis.predict import get_predicted_data, run_knn_matched
+from final_project.tracing import traced
+
+
+def data_hash(df):
+    """Computes a hash of the content, column names and data types of a DataFrame.
+
+    Args:
+        df (pandas.DataFrame): The data to hash.
+
+    Returns:
+        str: The hexadecimal SHA-256 digest.
+
+    """
+    digest = hashlib.sha256()
+    schema = [[str(column), str(dtype)] for column, dtype in df.dtypes.items()]
+    digest.update(json.dumps(schema).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+@traced
+def compute_effect_size(psm):
+    """Computes the effect size of each covariate before and after matching, without plotting it.
+
+    The effect size is Cohen's d of the covariate between the treatment and control group, as in
+    ``PsmPy.effect_size_plot``. The table is also stored as ``psm.effect_size``.
+
+    Args:
+        psm (PsmPy): The PsmPy object after matching.
+
+    Returns:
+        pandas.DataFrame: A table with the columns 'Variable', 'matching' and 'Effect Size'.
+
+    """
+    from psmpy.functions import cohenD
+
+    columns = [psm.treatment, *psm.xvars]
+    before = psm.data[columns].astype(float)
+    after = psm.df_matched[columns].astype(float)
+    rows = []
+    for column in psm.xvars:
+        rows.append([column, "before", cohenD(before, psm.treatment, column)])
+        rows.append([column, "after", cohenD(after, psm.treatment, column)])
+    psm.effect_size = pd.DataFrame(
+        rows,
+        columns=["Variable", "matching", "Effect Size"],
+    )
+    return psm.effect_size
+
+
+@traced
+def fit_matching(data, replacement=False, caliper=None, engine="psmpy"):
+    """Runs the propensity score matching of the went_unemployed treatment once and collects its results.
+
+    Args:
+        data (pandas.DataFrame): The cleaned dataset.
+        replacement (bool): Whether to match with replacement. Defaults to False.
+        caliper (float): The maximum difference in propensity score allowed for matches. Defaults to None.
+        engine (str): The engine of the logistic regression and the matching, see run_logistic_ps and run_knn_matched.
+            Defaults to "psmpy".
+
+    Returns:
+        dict: The matching artifact with the following entries:
+            - data_hash (str): Hash of the cleaned dataset the matching was fitted on.
+            - params (dict): The matching parameters.
+            - psm (PsmPy): The fitted PsmPy object.
+            - propensity_scores (pandas.DataFrame): The data with propensity scores and logits.
+            - matched_ids (pandas.DataFrame): The IDs of the matched pairs.
+            - df_matched (pandas.DataFrame): The matched data.
+            - effect_size (pandas.DataFrame): The effect sizes before and after matching.
+
+    """
+    params = {
+        "treatment": "went_unemployed",
+        "indx": "pid",
+        "exclude": ["hid", "aggregate_loneliness_2017"],
+        "matcher": "propensity_score",
+        "replacement": replacement,
+        "caliper": caliper,
+        "engine": engine,
+    }
+    digest = data_hash(data)
+    psm = create_psm(
+        drop_na(data),
+        treatment=params["treatment"],
+        indx=params["indx"],
+        exclude=params["exclude"],
+    )
+    run_logistic_ps(psm, balance=False, engine=engine)
+    run_knn_matched(
+        psm,
+        matcher=params["matcher"],
+        replacement=replacement,
+        caliper=caliper,
+        engine=engine,
+    )
+    return {
+        "data_hash": digest,
+        "params": params,
+        "psm": psm,
+        "propensity_scores": get_predicted_data(psm),
+        "matched_ids": psm.matched_ids,
+        "df_matched": psm.df_matched,
+        "effect_size": compute_effect_size(psm),
+    }
+
+
+def save_matching(matching, path):
+    """Saves a matching artifact.
+
+    Args:
+        matching (dict): The matching artifact returned by fit_matching.
+        path (str or pathlib.Path): Path to the pickle file.
+
+    """
+    pd.to_pickle(matching, path)
+
+
+def load_matching(path, data=None):
+    """Loads a matching artifact, optionally checking that it was fitted on the given data.
+
+    Args:
+        path (str or pathlib.Path): Path to the pickle file.
+        data (pandas.DataFrame, optional): The cleaned dataset the matching is used with. Defaults to None, which skips
+            the check.
+
+    Returns:
+        dict: The matching artifact.
+
+    Raises:
+        ValueError: If the matching was fitted on different data.
+
+    """
+    matching = pd.read_pickle(path)
+    if data is not None and matching["data_hash"] != data_hash(data):
+        raise ValueError(f"The matching in {path} was fitted on different data.")
+    return matching
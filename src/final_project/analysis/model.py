@@ -1,9 +1,20 @@
 """Functions for fitting the regression model."""
 
-import statsmodels.api as sm
-from psmpy import PsmPy
-from psmpy.plotting import *
-from statsmodels.iolib.smpickle import load_pickle
+import itertools
+import operator
+import warnings
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from final_project.config import SUBGROUP_SPLITS
+from final_project.tracing import traced
+
+# PsmPy, SciPy and statsmodels are imported in the functions that use them, so that
+# importing this module does not load them.
 
 
 def drop_na(df):
@@ -19,6 +30,7 @@ def drop_na(df):
     return df.dropna()
 
 
+@traced
 def create_psm(df, treatment, indx, exclude):
     """Create a Propensity Score Matching object using PsmPy.
 
@@ -35,26 +47,194 @@ def create_psm(df, treatment, indx, exclude):
             settings.
 
     """
+    from psmpy import PsmPy
+
     return PsmPy(df, treatment=treatment, indx=indx, exclude=exclude)
 
 
-def run_logistic_ps(psm, balance=False):
+def design_matrix(df, covariates, dtype=np.float64):
+    """Builds the design matrix of a logistic regression, with an intercept in the first column.
+
+    The matrix is built once and can be reused to fit models on subsets of its columns, see fit_logistic.
+
+    Args:
+        df (pandas.DataFrame): The data.
+        covariates (list): The names of the numeric covariate columns.
+        dtype (numpy.dtype, optional): The data type of the matrix, float64 or float32. Defaults to float64.
+
+    Returns:
+        numpy.ndarray: The design matrix with len(covariates) + 1 columns.
+
+    """
+    x = np.empty((len(df), len(covariates) + 1), dtype=dtype)
+    x[:, 0] = 1
+    for j, column in enumerate(covariates, start=1):
+        x[:, j] = df[column].to_numpy(dtype=dtype)
+    return x
+
+
+@traced
+def fit_logistic(
+    x,
+    y,
+    columns=None,
+    l2=0.0,
+    penalize_intercept=False,
+    start=None,
+    tol=None,
+    max_iter=100,
+):
+    """Fits a logistic regression by Newton's method (iteratively reweighted least squares).
+
+    The coefficients minimize the negative log-likelihood plus l2 / 2 times the squared norm of the penalized
+    coefficients. With l2=1 and penalize_intercept=True this is the model that scikit-learn's liblinear solver fits
+    with its default settings, which PsmPy uses.
+
+    Args:
+        x (numpy.ndarray): The design matrix, e.g. from design_matrix. A float32 matrix is processed in float32, only the
+            Newton system is solved in float64.
+        y (numpy.ndarray): The binary outcome.
+        columns (list, optional): Positions of the columns of x to use. Defaults to None, which uses all columns.
+        l2 (float, optional): The strength of the L2 penalty. Defaults to 0.
+        penalize_intercept (bool, optional): Whether the L2 penalty also applies to the first column, the intercept.
+            Defaults to False.
+        start (numpy.ndarray, optional): Starting coefficients, e.g. of a previous fit. Defaults to None, which starts at
+            zero.
+        tol (float, optional): Convergence tolerance of the largest Newton step relative to the coefficients. Defaults to
+            None, the square root of the machine epsilon of x.
+        max_iter (int, optional): The maximum number of Newton steps. Defaults to 100.
+
+    Returns:
+        numpy.ndarray: The float64 coefficients of the used columns.
+
+    """
+    from scipy.special import expit
+
+    if columns is not None:
+        x = x[:, columns]
+    y = np.asarray(y, dtype=x.dtype)
+    if tol is None:
+        tol = np.sqrt(np.finfo(x.dtype).eps)
+    penalty = np.full(x.shape[1], float(l2))
+    if not penalize_intercept:
+        positions = np.arange(x.shape[1]) if columns is None else np.asarray(columns)
+        penalty[positions == 0] = 0
+    beta = np.zeros(x.shape[1]) if start is None else np.array(start, dtype=float)
+
+    for _ in range(max_iter):
+        p = expit(x @ beta.astype(x.dtype))
+        gradient = x.T @ (y - p) - penalty * beta
+        hessian = (x * (p * (1 - p))[:, None]).T @ x + np.diag(penalty)
+        step = np.linalg.solve(hessian.astype(float), gradient.astype(float))
+        beta += step
+        if np.max(np.abs(step)) <= tol * (1 + np.max(np.abs(beta))):
+            return beta
+    warnings.warn(
+        f"Logistic regression did not converge in {max_iter} iterations.",
+        RuntimeWarning,
+    )
+    return beta
+
+
+def predict_logistic(x, beta, columns=None):
+    """Computes the predicted probabilities and logits of a logistic regression.
+
+    Args:
+        x (numpy.ndarray): The design matrix.
+        beta (numpy.ndarray): The coefficients, e.g. from fit_logistic.
+        columns (list, optional): Positions of the columns of x the coefficients belong to. Defaults to None, which uses
+            all columns.
+
+    Returns:
+        tuple: The arrays of probabilities and logits, in the row order of x.
+
+    """
+    from scipy.special import expit
+
+    if columns is not None:
+        x = x[:, columns]
+    logits = x @ np.asarray(beta, dtype=x.dtype)
+    return expit(logits), logits
+
+
+@traced
+def run_logistic_ps(psm, balance=False, engine="psmpy", dtype=np.float64, **options):
     """Compute propensity scores using logistic regression on the propensity scores generated by the PSM algorithm.
 
+    With engine="native" the model is fitted by fit_logistic with the penalty of PsmPy's scikit-learn model, on a design
+    matrix built once from the data of psm. psm.predicted_data then holds the same columns and rows as with PsmPy.
+
     Args:
         psm (PsmPy): The Propensity Score Matching object containing the data to be used
             in the matching.
         balance (bool, optional): Whether to calculate standardized differences for
             covariates before and after matching to evaluate balance. Defaults to False.
+        engine (str, optional): "psmpy" to fit with PsmPy.logistic_ps or "native" to fit with fit_logistic. Defaults to
+            "psmpy".
+        dtype (numpy.dtype, optional): The data type of the design matrix of the native engine. Defaults to float64.
+        **options: Further arguments of fit_logistic for the native engine, e.g. start or max_iter.
 
     Returns:
         pandas.DataFrame: A data frame containing the propensity scores.
 
-    """
-    return psm.logistic_ps(balance=balance)
+    Raises:
+        ValueError: If the engine is unknown, or balance is requested from the native engine.
 
-
-def fit_regression_model(data):
+    """
+    if engine == "psmpy":
+        return psm.logistic_ps(balance=balance)
+    if engine != "native":
+        raise ValueError(f"Unknown engine '{engine}'.")
+    if balance:
+        raise ValueError("The native engine does not support balance=True.")
+
+    # Same row order as PsmPy: the larger group first.
+    if psm.treatmentn < psm.controln:
+        joint = pd.concat([psm.controldf, psm.treatmentdf])
+    else:
+        joint = pd.concat([psm.treatmentdf, psm.controldf])
+    x = design_matrix(joint, psm.xvars, dtype=dtype)
+    beta = fit_logistic(
+        x,
+        joint[psm.treatment].to_numpy(),
+        l2=1.0,
+        penalize_intercept=True,
+        **options,
+    )
+    scores, _ = predict_logistic(x, beta)
+
+    predicted = joint.drop(columns=[psm.treatment])
+    predicted["propensity_score"] = scores
+    # PsmPy caps the logit of scores close to one.
+    predicted["propensity_logit"] = np.where(
+        scores < 0.9999,
+        np.log(scores / (1 - scores)),
+        np.log(scores / 0.00001),
+    )
+    treatment = psm.dataIDindx[[psm.treatment]].reset_index()
+    psm.predicted_data = predicted.reset_index().merge(
+        treatment,
+        how="inner",
+        on=psm.indx,
+    )
+    psm.model_coefficients = beta
+    return psm.predicted_data
+
+
+# Control variables of the outcome regression.
+REGRESSION_COVARIATES = (
+    "age",
+    "sex",
+    "education",
+    "marital_status",
+    "aggregate_loneliness_2013",
+    "hh_members",
+    "hh_income",
+)
+
+
+@traced
+def fit_regression_model(data, engine="statsmodels"):
     """Fits an Ordinary Least Squares (OLS) regression model to the matched data.
 
     Args:
@@ -71,33 +251,247 @@ def fit_regression_model(data):
         individual in 2013.
         - "hh_members": Numeric column representing the number of members in the individual's household.
         - "hh_income": Numeric column representing the income of the individual's household.
+    - engine: "statsmodels" to fit the model with statsmodels, or "native" to fit it with fit_ols on the cached design
+    matrix, which is much faster but only returns the estimates. Defaults to "statsmodels".
 
     Returns:
     - regression_result: OLS regression result object returned by the statsmodels package. This object contains
-    information about the coefficients, standard errors, p-values, and other statistics of the regression model.
+    information about the coefficients, standard errors, p-values, and other statistics of the regression model. With
+    engine="native", an OLSResults with the coefficients, standard errors and p-values.
 
     """
     outcome_var = "aggregate_loneliness_2017"
     treatment_var = "went_unemployed"
-    covariates = (
-        "age",
-        "sex",
-        "education",
-        "marital_status",
-        "aggregate_loneliness_2013",
-        "hh_members",
-        "hh_income",
-    )
+    covariates = REGRESSION_COVARIATES
+    if engine == "native":
+        return fit_ols(data, outcome_var, (treatment_var, *covariates))
+    if engine != "statsmodels":
+        raise ValueError(f"Unknown engine '{engine}'.")
     regression_formula = (
         outcome_var + " ~ " + treatment_var + " + " + " + ".join(covariates)
     )
 
     # Fit regression model
+    import statsmodels.api as sm
+
     regression_result = sm.OLS.from_formula(regression_formula, data=data).fit()
 
     return regression_result
 
 
+class OLSResults(NamedTuple):
+    """Estimates of a linear regression fitted by fit_ols."""
+
+    params: pd.Series
+    bse: pd.Series
+    tvalues: pd.Series
+    pvalues: pd.Series
+    nobs: int
+    df_resid: int
+
+
+# Design matrices built by ols_design, by the id of the dataset they were built from.
+_DESIGN_CACHE = {}
+
+
+def ols_design(data, outcome, regressors):
+    """Builds the design matrix of a linear regression with intercept like the formula interface of statsmodels.
+
+    Numeric regressors enter as they are. Regressors of object, categorical or boolean type are coded as dummies of all
+    but their first level, named like "education[T.Graduate]", and are placed before the numeric regressors, as in
+    patsy. Rows with a missing value in any of the variables are dropped.
+
+    The design is cached for as long as the dataset exists, so the dataset must not be modified in place afterwards.
+
+    Args:
+        data (pandas.DataFrame): The dataset.
+        outcome (str): The outcome variable.
+        regressors (tuple): The regressors.
+
+    Returns:
+        tuple: The design matrix as a numpy.ndarray, the outcome as a numpy.ndarray, the names of the columns of the
+            design matrix as a list, and the Cholesky factor of the Gram matrix of the equilibrated design matrix with
+            the column scales, as returned by _gram_factor.
+
+    """
+    key = (id(data), outcome, tuple(regressors))
+    cached = _DESIGN_CACHE.get(key)
+    if cached is not None and cached[0]() is data:
+        return cached[1]
+
+    variables = data[[outcome, *regressors]]
+    variables = variables[variables.notna().all(axis=1).to_numpy()]
+    categorical = [
+        column
+        for column in regressors
+        if variables[column].dtype.kind in "Ob"
+        or isinstance(variables[column].dtype, pd.CategoricalDtype)
+    ]
+    columns, names = [np.ones(len(variables))], ["Intercept"]
+    for column in categorical:
+        levels = pd.Categorical(variables[column])
+        for code, level in enumerate(levels.categories[1:], start=1):
+            columns.append((levels.codes == code).astype(np.float64))
+            names.append(f"{column}[T.{level}]")
+    for column in regressors:
+        if column not in categorical:
+            columns.append(variables[column].to_numpy(dtype=np.float64))
+            names.append(column)
+    x = np.column_stack(columns)
+    y = variables[outcome].to_numpy(dtype=np.float64)
+    design = (x, y, names, _gram_factor(x))
+
+    _DESIGN_CACHE[key] = (weakref.ref(data), design)
+    weakref.finalize(data, _DESIGN_CACHE.pop, key, None)
+    return design
+
+
+def _gram_factor(x):
+    """Returns the Cholesky factor of the Gram matrix of x with its columns scaled to unit length, and the scales."""
+    from scipy import linalg
+
+    scale = np.sqrt(np.einsum("ij,ij->j", x, x))
+    scale[scale == 0] = 1
+    gram = (x.T @ x) / np.outer(scale, scale)
+    return linalg.cho_factor(gram), scale
+
+
+@traced
+def fit_ols(data, outcome, regressors):
+    """Fits a linear regression with intercept by least squares without going through formulas.
+
+    The design matrix is built by ols_design and cached, and the normal equations are solved with the Cholesky
+    factorization of the Gram matrix of the design matrix, with its columns scaled to unit length for numerical
+    stability. The estimates, standard errors and p-values equal those of ``sm.OLS.from_formula``.
+
+    Args:
+        data (pandas.DataFrame): The dataset.
+        outcome (str): The outcome variable.
+        regressors (tuple): The regressors.
+
+    Returns:
+        OLSResults: The estimates of the regression.
+
+    Raises:
+        numpy.linalg.LinAlgError: If the design matrix does not have full column rank.
+
+    """
+    from scipy import linalg, stats
+
+    x, y, names, (factor, scale) = ols_design(data, outcome, regressors)
+    beta = linalg.cho_solve(factor, (x.T @ y) / scale) / scale
+    residuals = y - x @ beta
+    nobs, df_resid = len(y), len(y) - x.shape[1]
+    sigma2 = residuals @ residuals / df_resid
+    cov_diag = np.diag(linalg.cho_solve(factor, np.eye(len(scale)))) / scale**2
+    bse = np.sqrt(sigma2 * cov_diag)
+    tvalues = beta / bse
+    pvalues = 2 * stats.t.sf(np.abs(tvalues), df_resid)
+    return OLSResults(
+        params=pd.Series(beta, index=names),
+        bse=pd.Series(bse, index=names),
+        tvalues=pd.Series(tvalues, index=names),
+        pvalues=pd.Series(pvalues, index=names),
+        nobs=nobs,
+        df_resid=df_resid,
+    )
+
+
+@traced
+def specification_curve(
+    data,
+    covariates=REGRESSION_COVARIATES,
+    specifications=None,
+    outcome="aggregate_loneliness_2017",
+    treatment="went_unemployed",
+    n_workers=1,
+):
+    """Estimates the treatment effect of the outcome regression for many subsets of the covariates.
+
+    X'X and X'y of the regression with all covariates are computed once, and every specification is solved from the
+    sub-blocks of its columns, so that all specifications together cost about as much as one regression. All
+    specifications use the rows without missing values in any of the covariates.
+
+    Args:
+        data (pandas.DataFrame): The matched dataset.
+        covariates (tuple, optional): The covariates that specifications can include. Defaults to
+            REGRESSION_COVARIATES.
+        specifications (list, optional): The specifications as collections of covariates. Defaults to None, which uses
+            all subsets of the covariates.
+        outcome (str, optional): The outcome variable. Defaults to "aggregate_loneliness_2017".
+        treatment (str, optional): The treatment variable. Defaults to "went_unemployed".
+        n_workers (int, optional): Number of threads solving the specifications. Defaults to 1, which solves them
+            sequentially.
+
+    Returns:
+        pandas.DataFrame: A table with one row per specification and the columns 'Specification', one boolean column
+            per covariate telling whether it is included, 'Observations', 'Treatment Effect', 'Standard Error' and
+            'P-Value'.
+
+    """
+    from scipy import linalg, stats
+
+    covariates = tuple(covariates)
+    if specifications is None:
+        specifications = [
+            subset
+            for size in range(len(covariates) + 1)
+            for subset in itertools.combinations(covariates, size)
+        ]
+    x, y, names, (_, scale) = ols_design(data, outcome, (treatment, *covariates))
+    gram = (x.T @ x) / np.outer(scale, scale)
+    moments = (x.T @ y) / scale
+    base = [names.index("Intercept"), names.index(treatment)]
+    columns = {
+        covariate: [
+            i
+            for i, name in enumerate(names)
+            if name == covariate or name.startswith(f"{covariate}[T.")
+        ]
+        for covariate in covariates
+    }
+
+    def solve(specification):
+        selected = base + [
+            i for c in covariates if c in specification for i in columns[c]
+        ]
+        factor = linalg.cho_factor(gram[np.ix_(selected, selected)])
+        beta = linalg.cho_solve(factor, moments[selected])
+        df_resid = len(y) - len(selected)
+        sigma2 = max(y @ y - beta @ moments[selected], 0) / df_resid
+        unit = np.zeros(len(selected))
+        unit[1] = 1
+        variance = sigma2 * linalg.cho_solve(factor, unit)[1]
+        return beta[1] / scale[base[1]], np.sqrt(variance) / scale[base[1]], df_resid
+
+    if n_workers > 1:
+        with ThreadPoolExecutor(max_workers=n_workers) as executor:
+            results = list(executor.map(solve, specifications))
+    else:
+        results = [solve(specification) for specification in specifications]
+
+    effect, se, df_resid = (np.array(values) for values in zip(*results))
+    curve = pd.DataFrame(
+        {
+            "Specification": [
+                " + ".join(c for c in covariates if c in specification) or "(none)"
+                for specification in specifications
+            ],
+            **{
+                covariate: [
+                    covariate in specification for specification in specifications
+                ]
+                for covariate in covariates
+            },
+            "Observations": len(y),
+            "Treatment Effect": effect,
+            "Standard Error": se,
+            "P-Value": 2 * stats.t.sf(np.abs(effect / se), df_resid),
+        },
+    )
+    return curve
+
+
 def load_model(path):
     """Load statsmodels model.
 
@@ -108,126 +502,193 @@ def load_model(path):
         A statsmodels model loaded from the specified path.
 
     """
+    from statsmodels.iolib.smpickle import load_pickle
+
     return load_pickle(path)
 
 
-def perform_subgroup_analysis_age(matched_data):
-    """Performs subgroup analysis on a matched dataset by age group.
+# Comparison operators of subgroup definitions.
+SUBGROUP_OPERATORS = {
+    "<": operator.lt,
+    "<=": operator.le,
+    "==": operator.eq,
+    "!=": operator.ne,
+    ">=": operator.ge,
+    ">": operator.gt,
+}
 
-    Parameters:
-    - matched_data (pandas DataFrame): the matched dataset to perform subgroup analysis on
+
+@traced
+def subgroup_effects(
+    matched_data,
+    subgroups,
+    outcome="aggregate_loneliness_2017",
+    treatment="went_unemployed",
+):
+    """Estimates the treatment effect in each subgroup of a matched dataset in one pass over the data.
+
+    The effect is the coefficient of the regression of the outcome on the treatment without intercept, as in
+    ``sm.OLS(subgroup[outcome], subgroup[treatment])``. It only depends on the sums of the squared treatment, the
+    treatment times the outcome and the squared outcome in the subgroup, so the sums of all subgroups are computed at once
+    by multiplying the matrix of subgroup indicators with these three columns.
+
+    Args:
+        matched_data (pandas.DataFrame): The matched dataset.
+        subgroups (list): The subgroups as tuples (label, column, operator, value), e.g. ("Age < 50", "age", "<", 50),
+            where operator is a key of SUBGROUP_OPERATORS.
+        outcome (str, optional): The outcome variable. Defaults to "aggregate_loneliness_2017".
+        treatment (str, optional): The treatment variable. Defaults to "went_unemployed".
 
     Returns:
-    - results_df (pandas DataFrame): a dataframe containing the treatment effect and p-value for the specified age group.
+        pandas.DataFrame: A table with the columns 'Subgroup', 'Observations', 'Treatment Effect', 'Standard Error' and
+            'P-Value', with one row per subgroup.
 
     """
-    # Subset the data into age subgroups
-    age_subgroup1 = matched_data[matched_data["age"] < 50]
-    age_subgroup2 = matched_data[matched_data["age"] >= 50]
-
-    # Calculate treatment effect for each subgroup
-    subgroup1_effect = (
-        sm.OLS(
-            age_subgroup1["aggregate_loneliness_2017"],
-            age_subgroup1["went_unemployed"],
-        )
-        .fit()
-        .params[0]
-    )
-    subgroup2_effect = (
-        sm.OLS(
-            age_subgroup2["aggregate_loneliness_2017"],
-            age_subgroup2["went_unemployed"],
-        )
-        .fit()
-        .params[0]
-    )
+    masks = np.empty((len(subgroups), len(matched_data)), dtype=np.float64)
+    for row, (_, column, op, value) in enumerate(subgroups):
+        masks[row] = SUBGROUP_OPERATORS[op](matched_data[column].to_numpy(), value)
+    sums = masks @ _regression_terms(matched_data, outcome, treatment)
+    effects = _effects_from_sums(sums)
+    effects.insert(0, "Subgroup", [label for label, *_ in subgroups])
+    return effects
+
+
+@traced
+def threshold_sweep(
+    matched_data,
+    moderator,
+    thresholds=None,
+    outcome="aggregate_loneliness_2017",
+    treatment="went_unemployed",
+):
+    """Estimates the treatment effect below and above every threshold of a continuous moderator.
+
+    For each threshold t, the effects are estimated as in subgroup_effects for the subgroups moderator < t and
+    moderator >= t. The data are sorted by the moderator once, and the sums of each subgroup are read off the cumulative
+    sums of the sorted data, so that all thresholds together take O(n log n) time. Rows with a missing moderator are in
+    neither subgroup.
 
-    subgroup1_pvalue = (
-        sm.OLS(
-            age_subgroup1["aggregate_loneliness_2017"],
-            age_subgroup1["went_unemployed"],
-        )
-        .fit()
-        .pvalues[0]
-    )
-    subgroup2_pvalue = (
-        sm.OLS(
-            age_subgroup2["aggregate_loneliness_2017"],
-            age_subgroup2["went_unemployed"],
-        )
-        .fit()
-        .pvalues[0]
-    )
+    Args:
+        matched_data (pandas.DataFrame): The matched dataset.
+        moderator (str): The moderator variable, e.g. "age".
+        thresholds (array-like, optional): The thresholds. Defaults to None, which uses every observed value of the
+            moderator except the smallest, so that no subgroup is empty.
+        outcome (str, optional): The outcome variable. Defaults to "aggregate_loneliness_2017".
+        treatment (str, optional): The treatment variable. Defaults to "went_unemployed".
+
+    Returns:
+        pandas.DataFrame: A table with the columns 'Threshold', 'Side' ("below" or "above"), 'Observations', 'Treatment
+            Effect', 'Standard Error' and 'P-Value', with the rows of all thresholds below and then above.
+
+    """
+    values = matched_data[moderator].to_numpy(dtype=np.float64)
+    keep = ~np.isnan(values)
+    order = np.argsort(values[keep], kind="stable")
+    values = values[keep][order]
+    terms = _regression_terms(matched_data, outcome, treatment)[keep][order]
+    cumulative = np.vstack([np.zeros((1, terms.shape[1])), np.cumsum(terms, axis=0)])
+    if thresholds is None:
+        thresholds = np.unique(values)[1:]
+    thresholds = np.asarray(thresholds, dtype=np.float64)
+    below = cumulative[np.searchsorted(values, thresholds, side="left")]
+    above = cumulative[-1] - below
+    sweeps = []
+    for side, sums in [("below", below), ("above", above)]:
+        effects = _effects_from_sums(sums)
+        effects.insert(0, "Side", side)
+        effects.insert(0, "Threshold", thresholds)
+        sweeps.append(effects)
+    return pd.concat(sweeps, ignore_index=True)
+
+
+def _regression_terms(matched_data, outcome, treatment):
+    """Returns the columns 1, x * x, x * y and y * y whose sums determine the regression of y on x.
+
+    Rows with a missing outcome or treatment are dropped as by sm.OLS with missing="drop": their terms are zero, so
+    that they add to neither the sums nor the number of observations, and the rows stay aligned with the data.
 
-    # Store the results in a dataframe
-    results_df = pd.DataFrame(
+    """
+    y = matched_data[outcome].to_numpy(dtype=np.float64)
+    x = matched_data[treatment].to_numpy(dtype=np.float64)
+    terms = np.column_stack([np.ones_like(x), x * x, x * y, y * y])
+    terms[np.isnan(x) | np.isnan(y)] = 0
+    return terms
+
+
+def _effects_from_sums(sums):
+    """Computes the coefficient, standard error and p-value of regressions without intercept from their sums."""
+    from scipy import stats
+
+    n, sxx, sxy, syy = sums.T
+    df_resid = n - 1
+    with np.errstate(divide="ignore", invalid="ignore"):
+        effect = sxy / sxx
+        ssr = np.maximum(syy - effect * sxy, 0)
+        se = np.sqrt(ssr / df_resid / sxx)
+        pvalue = 2 * stats.t.sf(np.abs(effect / se), df_resid)
+    return pd.DataFrame(
         {
-            "Subgroup": ["Age < 50", "Age >= 50"],
-            "Treatment Effect": [subgroup1_effect, subgroup2_effect],
-            "P-Value": [subgroup1_pvalue, subgroup2_pvalue],
+            "Observations": np.rint(n).astype(np.int64),
+            "Treatment Effect": effect,
+            "Standard Error": se,
+            "P-Value": pvalue,
         },
     )
 
-    return results_df
 
+@traced
+def perform_subgroup_analyses(matched_data, subgroups=SUBGROUP_SPLITS):
+    """Performs several subgroup analyses on a matched dataset with one call of subgroup_effects.
 
-def perform_subgroup_analysis_gender(matched_data):
-    """Performs subgroup analysis on a matched dataset by sex, 1 for males and 0 for females.
+    Args:
+        matched_data (pandas.DataFrame): The matched dataset.
+        subgroups (dict, optional): The subgroups of each analysis, see subgroup_effects. Defaults to
+            SUBGROUP_SPLITS.
+
+    Returns:
+        dict: A dataframe with the columns 'Subgroup', 'Treatment Effect' and 'P-Value' for each analysis.
+
+    """
+    specs = [spec for analysis in subgroups.values() for spec in analysis]
+    effects = _subgroup_table(matched_data, specs)
+    results, start = {}, 0
+    for name, analysis in subgroups.items():
+        stop = start + len(analysis)
+        results[name] = effects.iloc[start:stop].reset_index(drop=True)
+        start = stop
+    return results
+
+
+def _subgroup_table(matched_data, subgroups):
+    """Returns the columns of subgroup_effects that the subgroup analyses report."""
+    effects = subgroup_effects(matched_data, subgroups)
+    return effects[["Subgroup", "Treatment Effect", "P-Value"]]
+
+
+def perform_subgroup_analysis_age(matched_data):
+    """Performs subgroup analysis on a matched dataset by age group.
 
     Parameters:
     - matched_data (pandas DataFrame): the matched dataset to perform subgroup analysis on
 
     Returns:
-    - results_df (pandas DataFrame): a dataframe containing the treatment effect and p-value for the specified sex.
+    - results_df (pandas DataFrame): a dataframe containing the treatment effect and p-value for the specified age group.
 
     """
-    male_subgroup = matched_data[matched_data["sex"] == 1]
-    female_subgroup = matched_data[matched_data["sex"] == 0]
-
-    male_effect = (
-        sm.OLS(
-            male_subgroup["aggregate_loneliness_2017"],
-            male_subgroup["went_unemployed"],
-        )
-        .fit()
-        .params[0]
-    )
-    female_effect = (
-        sm.OLS(
-            female_subgroup["aggregate_loneliness_2017"],
-            female_subgroup["went_unemployed"],
-        )
-        .fit()
-        .params[0]
-    )
+    return _subgroup_table(matched_data, SUBGROUP_SPLITS["age"])
 
-    male_pvalue = (
-        sm.OLS(
-            male_subgroup["aggregate_loneliness_2017"],
-            male_subgroup["went_unemployed"],
-        )
-        .fit()
-        .pvalues[0]
-    )
-    female_pvalue = (
-        sm.OLS(
-            female_subgroup["aggregate_loneliness_2017"],
-            female_subgroup["went_unemployed"],
-        )
-        .fit()
-        .pvalues[0]
-    )
 
-    results_df = pd.DataFrame(
-        {
-            "Subgroup": ["Male", "Female"],
-            "Treatment Effect": [male_effect, female_effect],
-            "P-Value": [male_pvalue, female_pvalue],
-        },
-    )
+def perform_subgroup_analysis_gender(matched_data):
+    """Performs subgroup analysis on a matched dataset by sex, 1 for males and 0 for females.
 
-    return results_df
+    Parameters:
+    - matched_data (pandas DataFrame): the matched dataset to perform subgroup analysis on
+
+    Returns:
+    - results_df (pandas DataFrame): a dataframe containing the treatment effect and p-value for the specified sex.
+
+    """
+    return _subgroup_table(matched_data, SUBGROUP_SPLITS["gender"])
 
 
 def perform_subgroup_analysis_marital_status(matched_data):
@@ -240,52 +701,7 @@ def perform_subgroup_analysis_marital_status(matched_data):
     - results_df (pandas DataFrame): a dataframe containing the treatment effect and p-value for the people who are married and living together and other.
 
     """
-    married_subgroup = matched_data[matched_data["marital_status"] == 1]
-    other_subgroup = matched_data[matched_data["marital_status"] == 0]
-
-    married_effect = (
-        sm.OLS(
-            married_subgroup["aggregate_loneliness_2017"],
-            married_subgroup["went_unemployed"],
-        )
-        .fit()
-        .params[0]
-    )
-    other_effect = (
-        sm.OLS(
-            other_subgroup["aggregate_loneliness_2017"],
-            other_subgroup["went_unemployed"],
-        )
-        .fit()
-        .params[0]
-    )
-
-    married_pvalue = (
-        sm.OLS(
-            married_subgroup["aggregate_loneliness_2017"],
-            married_subgroup["went_unemployed"],
-        )
-        .fit()
-        .pvalues[0]
-    )
-    other_pvalue = (
-        sm.OLS(
-            other_subgroup["aggregate_loneliness_2017"],
-            other_subgroup["went_unemployed"],
-        )
-        .fit()
-        .pvalues[0]
-    )
-
-    results_df = pd.DataFrame(
-        {
-            "Subgroup": ["Married", "Other"],
-            "Treatment Effect": [married_effect, other_effect],
-            "P-Value": [married_pvalue, other_pvalue],
-        },
-    )
-
-    return results_df
+    return _subgroup_table(matched_data, SUBGROUP_SPLITS["marital_status"])
 
 
 def perform_subgroup_analysis_health(matched_data):
@@ -298,56 +714,7 @@ def perform_subgroup_analysis_health(matched_data):
     - results_df (pandas DataFrame): a dataframe containing the treatment effect and p-value for the health above and lower average.
 
     """
-    # Subset the data into health subgroups
-    high_health_subgroup = matched_data[matched_data["health_2013"] > 3]
-    low_health_subgroup = matched_data[matched_data["health_2013"] <= 3]
-
-    # Calculate treatment effect for each subgroup
-    high_health_effect = (
-        sm.OLS(
-            high_health_subgroup["aggregate_loneliness_2017"],
-            high_health_subgroup["went_unemployed"],
-        )
-        .fit()
-        .params[0]
-    )
-    low_health_effect = (
-        sm.OLS(
-            low_health_subgroup["aggregate_loneliness_2017"],
-            low_health_subgroup["went_unemployed"],
-        )
-        .fit()
-        .params[0]
-    )
-
-    # Conduct statistical tests for each subgroup
-    high_health_pvalue = (
-        sm.OLS(
-            high_health_subgroup["aggregate_loneliness_2017"],
-            high_health_subgroup["went_unemployed"],
-        )
-        .fit()
-        .pvalues[0]
-    )
-    low_health_pvalue = (
-        sm.OLS(
-            low_health_subgroup["aggregate_loneliness_2017"],
-            low_health_subgroup["went_unemployed"],
-        )
-        .fit()
-        .pvalues[0]
-    )
-
-    # Store the results in a dataframe
-    results_df = pd.DataFrame(
-        {
-            "Subgroup": ["High Health", "Low Health"],
-            "Treatment Effect": [high_health_effect, low_health_effect],
-            "P-Value": [high_health_pvalue, low_health_pvalue],
-        },
-    )
-
-    return results_df
+    return _subgroup_table(matched_data, SUBGROUP_SPLITS["health"])
 
 
 def perform_subgroup_analysis_education(matched_data):
@@ -360,56 +727,7 @@ def perform_subgroup_analysis_education(matched_data):
     - results_df (pandas DataFrame): a dataframe containing the treatment effect and p-value for each subgroup.
 
     """
-    # Subset the data into education subgroups
-    high_edu_subgroup = matched_data[matched_data["education"] >= 13]
-    low_edu_subgroup = matched_data[matched_data["education"] < 13]
-
-    # Calculate treatment effect for each subgroup
-    high_edu_effect = (
-        sm.OLS(
-            high_edu_subgroup["aggregate_loneliness_2017"],
-            high_edu_subgroup["went_unemployed"],
-        )
-        .fit()
-        .params[0]
-    )
-    low_edu_effect = (
-        sm.OLS(
-            low_edu_subgroup["aggregate_loneliness_2017"],
-            low_edu_subgroup["went_unemployed"],
-        )
-        .fit()
-        .params[0]
-    )
-
-    # Conduct statistical tests for each subgroup
-    high_edu_pvalue = (
-        sm.OLS(
-            high_edu_subgroup["aggregate_loneliness_2017"],
-            high_edu_subgroup["went_unemployed"],
-        )
-        .fit()
-        .pvalues[0]
-    )
-    low_edu_pvalue = (
-        sm.OLS(
-            low_edu_subgroup["aggregate_loneliness_2017"],
-            low_edu_subgroup["went_unemployed"],
-        )
-        .fit()
-        .pvalues[0]
-    )
-
-    # Store the results in a dataframe
-    results_df = pd.DataFrame(
-        {
-            "Subgroup": ["High Education (>=13)", "Low Education (<13)"],
-            "Treatment Effect": [high_edu_effect, low_edu_effect],
-            "P-Value": [high_edu_pvalue, low_edu_pvalue],
-        },
-    )
-
-    return results_df
+    return _subgroup_table(matched_data, SUBGROUP_SPLITS["education"])
 
 
 def perform_subgroup_analysis_hhsize(matched_data):
@@ -422,53 +740,4 @@ def perform_subgroup_analysis_hhsize(matched_data):
     - results_df (pandas DataFrame): a dataframe containing the treatment effect and p-value for each subgroup.
 
     """
-    # Subset the data into household members subgroups
-    low_hh_members_subgroup = matched_data[matched_data["hh_members"] < 2]
-    high_hh_members_subgroup = matched_data[matched_data["hh_members"] >= 2]
-
-    # Calculate treatment effect for each subgroup
-    low_hh_members_effect = (
-        sm.OLS(
-            low_hh_members_subgroup["aggregate_loneliness_2017"],
-            low_hh_members_subgroup["went_unemployed"],
-        )
-        .fit()
-        .params[0]
-    )
-    high_hh_members_effect = (
-        sm.OLS(
-            high_hh_members_subgroup["aggregate_loneliness_2017"],
-            high_hh_members_subgroup["went_unemployed"],
-        )
-        .fit()
-        .params[0]
-    )
-
-    # Conduct statistical tests for each subgroup
-    low_hh_members_pvalue = (
-        sm.OLS(
-            low_hh_members_subgroup["aggregate_loneliness_2017"],
-            low_hh_members_subgroup["went_unemployed"],
-        )
-        .fit()
-        .pvalues[0]
-    )
-    high_hh_members_pvalue = (
-        sm.OLS(
-            high_hh_members_subgroup["aggregate_loneliness_2017"],
-            high_hh_members_subgroup["went_unemployed"],
-        )
-        .fit()
-        .pvalues[0]
-    )
-
-    # Store the results in a dataframe
-    results_df = pd.DataFrame(
-        {
-            "Subgroup": ["HH Members < 2", "HH Members >= 2"],
-            "Treatment Effect": [low_hh_members_effect, high_hh_members_effect],
-            "P-Value": [low_hh_members_pvalue, high_hh_members_pvalue],
-        },
-    )
-
-    return results_df
+    return _subgroup_table(matched_data, SUBGROUP_SPLITS["household_size"])
@@ -1,22 +1,232 @@
 """Functions for predicting outcomes based on the estimated model."""
 
-from psmpy.plotting import *
+import warnings
 
+import numpy as np
+import pandas as pd
 
-def run_knn_matched(psm, matcher="propensity_logit", replacement=False, caliper=None):
+from final_project.tracing import traced
+
+
+@traced
+def run_knn_matched(
+    psm,
+    matcher="propensity_logit",
+    replacement=False,
+    caliper=None,
+    engine="psmpy",
+):
     """Run k-nearest neighbor (KNN) matching using the specified matcher.
 
+    With engine="native" every unit of the smaller group is matched to its nearest unit of the larger group by
+    match_nearest on sorted scores, in the row order of the smaller group as in PsmPy. psm.df_matched and psm.matched_ids
+    then have the same layout as with PsmPy. Ties are broken in favour of the lower row, and unlike PsmPy the first row
+    of the larger group is kept in psm.df_matched when it is matched.
+
     Args:
         psm (PsmPy): The PsmPy object containing data and matching results.
         matcher (str): The name of the matcher to use. Defaults to "propensity_logit".
         replacement (bool): Whether to allow replacement during matching. Defaults to False.
         caliper (float): The maximum difference in propensity score allowed for matches. Defaults to None.
+        engine (str): "psmpy" to match with PsmPy.knn_matched or "native" to match with match_nearest. Defaults to
+            "psmpy".
 
     Returns:
         PsmPy: The PsmPy object with the matched data.
 
+    Raises:
+        ValueError: If the engine is unknown.
+
+    """
+    if engine == "psmpy":
+        return psm.knn_matched(
+            matcher=matcher,
+            replacement=replacement,
+            caliper=caliper,
+        )
+    if engine != "native":
+        raise ValueError(f"Unknown engine '{engine}'.")
+
+    predicted = psm.predicted_data
+    treatment = predicted[predicted[psm.treatment] == 1]
+    control = predicted[predicted[psm.treatment] == 0]
+    if len(treatment) < len(control):
+        minor, major = treatment, control
+    else:
+        minor, major = control, treatment
+    minor = minor.reset_index(drop=True)
+    major = major.reset_index(drop=True)
+
+    minor_rows, major_rows = _match_sorted(
+        minor[matcher].to_numpy(dtype=float),
+        major[matcher].to_numpy(dtype=float),
+        k=1,
+        replacement=replacement,
+        radius=np.inf if caliper is None else caliper,
+    )
+    if len(minor_rows) < len(minor):
+        warnings.warn(
+            "Some values do not have a match. These are dropped for purposes of "
+            "establishing a matched dataframe.",
+        )
+    minor_matched = minor.take(minor_rows)
+    minor_matched["matched_ID"] = major[psm.indx].to_numpy()[major_rows]
+    psm.df_matched = pd.concat(
+        [minor_matched, major.take(major_rows)],
+        axis=0,
+        ignore_index=True,
+    )
+    psm.matched_ids = minor_matched[[psm.indx, "matched_ID"]].reset_index(drop=True)
+    return psm
+
+
+@traced
+def match_nearest(treated, control, k=1, replacement=False, caliper=None):
+    """Matches treated units to their k nearest control units on a one-dimensional score, e.g. the propensity logit.
+
+    The control scores are sorted once and every treated unit finds its neighbours by binary search, so matching takes
+    O(n log n) time. Without replacement, the treated units are matched greedily in their order, each to the nearest
+    control units not used before. Of control units at the same distance, the one with the lower index is used first.
+
+    Args:
+        treated (numpy.ndarray): The scores of the treated units.
+        control (numpy.ndarray): The scores of the control units.
+        k (int, optional): The number of control units matched to each treated unit. Defaults to 1.
+        replacement (bool, optional): Whether a control unit may be matched more than once. Defaults to False.
+        caliper (float, optional): The maximum distance of a match in standard deviations of the scores of all units.
+            Defaults to None, which allows any distance.
+
+    Returns:
+        tuple: Two int64 arrays with the indices of the treated and control units of each match, ordered by treated unit
+            and then by distance. Treated units without a match within the caliper are left out.
+
+    """
+    treated = np.asarray(treated, dtype=float)
+    control = np.asarray(control, dtype=float)
+    radius = np.inf
+    if caliper is not None:
+        radius = caliper * np.std(np.concatenate([treated, control]))
+    return _match_sorted(treated, control, k, replacement, radius)
+
+
+def _match_sorted(query, pool, k, replacement, radius):
+    """Matches each query score to its k nearest pool scores within radius."""
+    if len(query) == 0 or len(pool) == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    order = np.argsort(pool, kind="stable")
+    values = pool[order]
+    # Runs of equal pool scores, whose units are sorted by index.
+    run_starts = np.flatnonzero(np.r_[True, values[1:] != values[:-1]])
+    if replacement:
+        return _match_with_replacement(query, order, values, run_starts, k, radius)
+    return _match_without_replacement(query, order, values, run_starts, k, radius)
+
+
+def _match_with_replacement(query, order, values, run_starts, k, radius):
+    """Finds the k nearest pool units of all query units at once by walking outwards from their position."""
+    run_values = values[run_starts]
+    run_counts = np.diff(np.append(run_starts, len(values)))
+    n_runs = len(run_values)
+    right = np.searchsorted(run_values, query)
+    left = right - 1
+    left_offset = np.zeros(len(query), dtype=np.int64)
+    right_offset = np.zeros(len(query), dtype=np.int64)
+    active = np.ones(len(query), dtype=bool)
+    query_rows, pool_rows = [], []
+    for _ in range(k):
+        has_left = active & (left >= 0)
+        has_right = active & (right < n_runs)
+        left_run = np.where(has_left, left, 0)
+        right_run = np.where(has_right, right, 0)
+        left_distance = np.where(has_left, query - run_values[left_run], np.inf)
+        right_distance = np.where(has_right, run_values[right_run] - query, np.inf)
+        left_unit = order[
+            np.minimum(run_starts[left_run] + left_offset, len(order) - 1)
+        ]
+        right_unit = order[
+            np.minimum(run_starts[right_run] + right_offset, len(order) - 1)
+        ]
+        take_left = (left_distance < right_distance) | (
+            (left_distance == right_distance) & (left_unit < right_unit)
+        )
+        distance = np.where(take_left, left_distance, right_distance)
+        active &= np.isfinite(distance) & (distance <= radius)
+
+        rows = np.flatnonzero(active)
+        query_rows.append(rows)
+        pool_rows.append(np.where(take_left, left_unit, right_unit)[rows])
+
+        left_offset += active & take_left
+        right_offset += active & ~take_left
+        left_done = left_offset == run_counts[left_run]
+        right_done = right_offset == run_counts[right_run]
+        left -= active & take_left & left_done
+        left_offset[active & take_left & left_done] = 0
+        right += active & ~take_left & right_done
+        right_offset[active & ~take_left & right_done] = 0
+
+    query_rows = np.concatenate(query_rows)
+    pool_rows = np.concatenate(pool_rows)
+    # Order the matches by query unit, keeping the order by distance.
+    by_query = np.argsort(query_rows, kind="stable")
+    return query_rows[by_query].astype(np.int64), pool_rows[by_query].astype(np.int64)
+
+
+def _match_without_replacement(query, order, values, run_starts, k, radius):
+    """Matches the query units one after another to the nearest unused pool units.
+
+    The greedy matching is sequential, so it runs as a loop over the query units. The nearest unused units are found in
+    almost constant time by following links to the next and previous unused sorted position, with path compression.
+
     """
-    return psm.knn_matched(matcher=matcher, replacement=replacement, caliper=caliper)
+    n = len(values)
+    # Links to the next unused position at or after each position, and to the previous
+    # unused position at or before it (shifted by one). n and -1 are sentinels.
+    next_unused = list(range(n + 1))
+    prev_unused = list(range(-1, n))
+    run_start = np.repeat(run_starts, np.diff(np.append(run_starts, n))).tolist()
+    positions = np.searchsorted(values, query).tolist()
+    values = values.tolist()
+    order = order.tolist()
+    infinity = float("inf")
+
+    def find(links, position, shift):
+        root = position
+        while links[root + shift] != root:
+            root = links[root + shift]
+        while links[position + shift] != root:
+            links[position + shift], position = root, links[position + shift]
+        return root
+
+    query_rows, pool_rows = [], []
+    for row, (score, position) in enumerate(zip(query.tolist(), positions)):
+        for _ in range(k):
+            right = next_unused[position]
+            if right != position:
+                right = find(next_unused, position, 0)
+            left = prev_unused[position]
+            if left != position - 1:
+                left = find(prev_unused, position - 1, 1)
+            if left >= 0 and run_start[left] != left:
+                left = find(next_unused, run_start[left], 0)
+
+            right_distance = values[right] - score if right < n else infinity
+            left_distance = score - values[left] if left >= 0 else infinity
+            if left_distance < right_distance or (
+                left_distance == right_distance
+                and left >= 0
+                and (right == n or order[left] < order[right])
+            ):
+                chosen, distance = left, left_distance
+            else:
+                chosen, distance = right, right_distance
+            if chosen == -1 or chosen == n or distance > radius:
+                break
+            query_rows.append(row)
+            pool_rows.append(order[chosen])
+            next_unused[chosen] = chosen + 1
+            prev_unused[chosen + 1] = chosen - 1
+    return np.array(query_rows, dtype=np.int64), np.array(pool_rows, dtype=np.int64)
 
 
 def get_predicted_data(psm):
@@ -32,6 +242,7 @@ def get_predicted_data(psm):
     return psm.predicted_data
 
 
+@traced
 def matched_df(psm, data):
     """Get the matched dataframe along with outcome variable and personal ID.
 
@@ -48,6 +259,7 @@ def matched_df(psm, data):
     return df
 
 
+@traced
 def predict_att_ate_regression(data, model):
     """Predicts the average treatment effect on the treated (ATT) and average treatment effect (ATE) using a regression model.
 
@@ -74,6 +286,7 @@ def predict_att_ate_regression(data, model):
     return result
 
 
+@traced
 def get_loneliness_change(matched_data):
     """The funcion takes the matched dataset and finds the difference in the aggregate loneliness levels(2017) of people who had the same aggregate loneliness levels in 2013 but some of them went
     unemployed and the others did not.
@@ -1,78 +1,103 @@
 """Tasks running the core analyses."""
-import pandas as pd
 import pytask
-from psmpy.plotting import *
 
+from final_project.analysis.bootstrap import (
+    bootstrap_att_ate,
+    bootstrap_intervals,
+    bootstrap_matching,
+)
+from final_project.analysis.matching import (
+    fit_matching,
+    load_matching,
+    save_matching,
+)
 from final_project.analysis.model import (
-    create_psm,
     drop_na,
     fit_regression_model,
     load_model,
-    perform_subgroup_analysis_age,
-    perform_subgroup_analysis_education,
-    perform_subgroup_analysis_gender,
-    perform_subgroup_analysis_health,
-    perform_subgroup_analysis_hhsize,
-    perform_subgroup_analysis_marital_status,
-    run_logistic_ps,
+    perform_subgroup_analyses,
+    specification_curve,
+    threshold_sweep,
 )
 from final_project.analysis.predict import (
     get_loneliness_change,
-    get_predicted_data,
     matched_df,
     predict_att_ate_regression,
-    run_knn_matched,
 )
-from final_project.config import BLD
+from final_project.config import (
+    BLD,
+    BOOTSTRAP_REPLICATIONS,
+    BOOTSTRAP_SEED,
+    N_WORKERS,
+    PSM_CONFIGS,
+    SUBGROUP_SPLITS,
+    SWEEP_MODERATORS,
+)
+from final_project.utilities import (
+    artifact_products,
+    read_artifact,
+    write_artifact,
+    write_csv_if_changed,
+)
+
+for name, params in PSM_CONFIGS.items():
+    kwargs = {
+        "depends_on": {
+            "scripts": ["matching.py", "model.py", "predict.py"],
+            "data": BLD / "python" / "data" / "data_clean.feather",
+        },
+        "produces": BLD / "python" / "models" / f"psm_{name}.pickle",
+        "params": params,
+    }
+
+    @pytask.mark.task(id=name, kwargs=kwargs)
+    def task_fit_matching(depends_on, produces, params):
+        """Fit the propensity score model and match the data once per matching configuration."""
+        data = read_artifact(depends_on["data"])
+        matching = fit_matching(data, **params)
+        save_matching(matching, produces)
 
 
 @pytask.mark.depends_on(
     {
-        "scripts": ["model.py", "predict.py"],
-        "data": BLD / "python" / "data" / "data_clean.csv",
+        "data": BLD / "python" / "data" / "data_clean.feather",
+        "matching": BLD / "python" / "models" / "psm_no_replacement.pickle",
     },
 )
-@pytask.mark.produces(BLD / "python" / "predictions" / "data_matched.csv")
+@pytask.mark.produces(
+    artifact_products(BLD / "python" / "predictions" / "data_matched.feather"),
+)
 def task_create_matched_data(depends_on, produces):
-    """Fit a logistic model on the filtered data with propensity score matching to get matched dataset."""
-    data = pd.read_csv(depends_on["data"])
-    data = drop_na(data)
-    psm = create_psm(
-        data,
-        treatment="went_unemployed",
-        indx="pid",
-        exclude=["hid", "aggregate_loneliness_2017"],
-    )
-    run_logistic_ps(psm, balance=False)
-    get_predicted_data(psm)
-    run_knn_matched(psm, matcher="propensity_score", replacement=False, caliper=None)
-    matched_data = matched_df(psm, data)
-    matched_data.to_csv(produces, index=False)
+    """Add the outcome to the data matched with propensity score matching without replacement to get matched dataset."""
+    data = read_artifact(depends_on["data"])
+    matching = load_matching(depends_on["matching"], data)
+    matched_data = matched_df(matching["psm"], drop_na(data))
+    write_artifact(matched_data, produces["data"], produces.get("csv"))
 
 
 @pytask.mark.depends_on(
     {
-        "data": BLD / "python" / "predictions" / "data_matched.csv",
+        "data": BLD / "python" / "predictions" / "data_matched.feather",
     },
 )
 @pytask.mark.produces(BLD / "python" / "models" / "model.pickle")
 def task_fit_model_python(depends_on, produces):
     """Fit a logistic regression model (Python version) on matched dataset."""
-    data = pd.read_csv(depends_on["data"])
+    data = read_artifact(depends_on["data"])
     model = fit_regression_model(data)
     model.save(produces)
 
 
 @pytask.mark.depends_on(
     {
-        "data": BLD / "python" / "predictions" / "data_matched.csv",
+        "data": BLD / "python" / "predictions" / "data_matched.feather",
         "model": BLD / "python" / "models" / "model.pickle",
     },
 )
 @pytask.mark.produces(BLD / "python" / "predictions" / "regression.csv")
 def task_predict_ate_att(depends_on, produces):
     """Predict ATT and ATE based on the model estimates (Python version)."""
-    data = pd.read_csv(depends_on["data"])
+    data = read_artifact(depends_on["data"])
     model = load_model(depends_on["model"])
     predicted = predict_att_ate_regression(data, model)
     predicted.to_csv(produces, index=False)
@@ -80,85 +105,104 @@ def task_predict_ate_att(depends_on, produces):
 
 @pytask.mark.depends_on(
     {
-        "data": BLD / "python" / "predictions" / "data_matched.csv",
+        "data": BLD / "python" / "predictions" / "data_matched.feather",
     },
 )
-@pytask.mark.produces(BLD / "python" / "predictions" / "subgroup_age.csv")
-def task_robustness_subgroup_analysis(depends_on, produces):
-    """Subgroup Analysis for age."""
-    data = pd.read_csv(depends_on["data"])
-    predicted = perform_subgroup_analysis_age(data)
-    predicted.to_csv(produces, index=False)
+@pytask.mark.produces(BLD / "python" / "predictions" / "bootstrap_att_ate.csv")
+def task_bootstrap_att_ate(depends_on, produces):
+    """Bootstrap confidence intervals of the ATT and ATE given the matching."""
+    data = read_artifact(depends_on["data"])
+    estimates, replications = bootstrap_att_ate(
+        data,
+        n_boot=BOOTSTRAP_REPLICATIONS,
+        seed=BOOTSTRAP_SEED,
+    )
+    bootstrap_intervals(estimates, replications).to_csv(produces, index=False)
 
 
 @pytask.mark.depends_on(
     {
-        "data": BLD / "python" / "predictions" / "data_matched.csv",
+        "data": BLD / "python" / "data" / "data_clean.feather",
+        "matched": BLD / "python" / "predictions" / "data_matched.feather",
+        "model": BLD / "python" / "models" / "model.pickle",
     },
 )
-@pytask.mark.produces(BLD / "python" / "predictions" / "subgroup_gender.csv")
-def task_robustness_subgroup_analysis_gender(depends_on, produces):
-    """Subgroup Analysis based on sex."""
-    data = pd.read_csv(depends_on["data"])
-    predicted = perform_subgroup_analysis_gender(data)
-    predicted.to_csv(produces, index=False)
+@pytask.mark.produces(BLD / "python" / "predictions" / "bootstrap_matching.csv")
+def task_bootstrap_matching(depends_on, produces):
+    """Bootstrap confidence intervals of the ATT and ATE that include the uncertainty of the matching."""
+    data = read_artifact(depends_on["data"])
+    estimates = predict_att_ate_regression(
+        read_artifact(depends_on["matched"]),
+        load_model(depends_on["model"]),
+    )
+    replications = bootstrap_matching(
+        data,
+        n_boot=BOOTSTRAP_REPLICATIONS,
+        seed=BOOTSTRAP_SEED,
+        **PSM_CONFIGS["no_replacement"],
+        n_workers=N_WORKERS,
+    )
+    bootstrap_intervals(estimates, replications).to_csv(produces, index=False)
 
 
 @pytask.mark.depends_on(
     {
-        "data": BLD / "python" / "predictions" / "data_matched.csv",
+        "scripts": ["model.py", "../config.py"],
+        "data": BLD / "python" / "predictions" / "data_matched.feather",
     },
 )
-@pytask.mark.produces(BLD / "python" / "predictions" / "subgroup_marital_status.csv")
-def task_robustness_subgroup_analysis_marital_status(depends_on, produces):
-    """Subgroup Analysis based on marital status."""
-    data = pd.read_csv(depends_on["data"])
-    predicted = perform_subgroup_analysis_marital_status(data)
-    predicted.to_csv(produces, index=False)
-
-
-@pytask.mark.depends_on(
+@pytask.mark.produces(
     {
-        "data": BLD / "python" / "predictions" / "data_matched.csv",
+        name: BLD / "python" / "predictions" / f"subgroup_{name}.csv"
+        for name in SUBGROUP_SPLITS
     },
 )
-@pytask.mark.produces(BLD / "python" / "predictions" / "subgroup_health.csv")
-def task_robustness_subgroup_analysis_health(depends_on, produces):
-    """Subgroup Analysis based on health."""
-    data = pd.read_csv(depends_on["data"])
-    predicted = perform_subgroup_analysis_health(data)
-    predicted.to_csv(produces, index=False)
+def task_robustness_subgroup_analyses(depends_on, produces):
+    """Subgroup analyses of all splits in SUBGROUP_SPLITS from one load of the matched data.
 
+    Only the tables whose results changed are rewritten, so that tasks using the other
+    tables do not run again.
 
-@pytask.mark.depends_on(
-    {
-        "data": BLD / "python" / "predictions" / "data_matched.csv",
-    },
-)
-@pytask.mark.produces(BLD / "python" / "predictions" / "subgroup_education.csv")
-def task_robustness_subgroup_analysis_education(depends_on, produces):
-    """Subgroup Analysis based on education."""
-    data = pd.read_csv(depends_on["data"])
-    predicted = perform_subgroup_analysis_education(data)
-    predicted.to_csv(produces, index=False)
+    """
+    columns = {"aggregate_loneliness_2017", "went_unemployed"}
+    columns |= {spec[1] for specs in SUBGROUP_SPLITS.values() for spec in specs}
+    data = read_artifact(depends_on["data"], columns=sorted(columns))
+    results = perform_subgroup_analyses(data, SUBGROUP_SPLITS)
+    for name, result in results.items():
+        write_csv_if_changed(result, produces[name])
 
 
 @pytask.mark.depends_on(
     {
-        "data": BLD / "python" / "predictions" / "data_matched.csv",
+        "data": BLD / "python" / "predictions" / "data_matched.feather",
     },
 )
-@pytask.mark.produces(BLD / "python" / "predictions" / "subgroup_household_size.csv")
-def task_robustness_subgroup_analysis_hhsize(depends_on, produces):
-    """Subgroup Analysis based on the size of household."""
-    data = pd.read_csv(depends_on["data"])
-    predicted = perform_subgroup_analysis_hhsize(data)
-    predicted.to_csv(produces, index=False)
+@pytask.mark.produces(BLD / "python" / "predictions" / "specification_curve.csv")
+def task_specification_curve(depends_on, produces):
+    """Treatment effect for every subset of the covariates of the outcome regression."""
+    data = read_artifact(depends_on["data"])
+    curve = specification_curve(data, n_workers=N_WORKERS)
+    curve.to_csv(produces, index=False)
+
+
+for moderator in SWEEP_MODERATORS:
+    kwargs = {
+        "depends_on": BLD / "python" / "predictions" / "data_matched.feather",
+        "produces": BLD / "python" / "predictions" / f"sweep_{moderator}.csv",
+        "moderator": moderator,
+    }
+
+    @pytask.mark.task(id=moderator, kwargs=kwargs)
+    def task_threshold_sweep(depends_on, produces, moderator):
+        """Treatment effect below and above every threshold of a continuous moderator."""
+        data = read_artifact(depends_on)
+        sweep = threshold_sweep(data, moderator)
+        sweep.to_csv(produces, index=False)
 
 
 @pytask.mark.depends_on(
     {
-        "data": BLD / "python" / "predictions" / "data_matched.csv",
+        "data": BLD / "python" / "predictions" / "data_matched.feather",
     },
 )
 @pytask.mark.produces(BLD / "python" / "predictions" / "change_loneliness.csv")
@@ -168,6 +212,6 @@ def task_change_loneliness_levels(depends_on, produces):
     This gives the change in loneliness levels only because of job loss.
 
     """
-    data = pd.read_csv(depends_on["data"])
+    data = read_artifact(depends_on["data"])
     predicted = get_loneliness_change(data)
     predicted.to_csv(produces, index=False)
@@ -0,0 +1,303 @@
+"""Benchmarks of the data cleaning and the analyses on synthetic SOEP panels."""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from final_project.analysis import model
+from final_project.analysis.matching import fit_matching
+from final_project.analysis.model import (
+    drop_na,
+    fit_regression_model,
+    perform_subgroup_analyses,
+    threshold_sweep,
+)
+from final_project.analysis.predict import matched_df
+from final_project.config import BENCHMARK_DIR, BENCHMARK_SIZES, SRC
+from final_project.data_management.clean_data import (
+    data_clean,
+    hbrutto_functions,
+    hgen_functions,
+    pgen_covariates,
+    pgen_treatment,
+    pl_functions,
+    ppath_functions,
+)
+from final_project.data_management.synthetic import synthetic_soep
+
+
+def _clean(raw):
+    """Cleans the synthetic datasets as task_clean_data_python does."""
+    return data_clean(
+        pgen_treat_df=raw["pgen"],
+        pgen_cov_df=raw["pgen"],
+        ppath_df=raw["ppath"],
+        pl_df=raw["pl"],
+        hgen_df=raw["hgen"],
+        hbrutto_df=raw["hbrutto"],
+        codes=True,
+        lazy=True,
+    )
+
+
+def _psm_pipeline(data):
+    """Fits the matching and builds the matched data as the analysis tasks do."""
+    matching = fit_matching(data)
+    return matched_df(matching["psm"], drop_na(data))
+
+
+# Benchmarks as name: (input, function). The input is 'raw' for the synthetic datasets,
+# 'clean' for the cleaned data and 'matched' for the matched data.
+BENCHMARKS = {
+    "pgen_treatment": ("raw", lambda raw: pgen_treatment(raw["pgen"], codes=True)),
+    "pgen_covariates": ("raw", lambda raw: pgen_covariates(raw["pgen"], codes=True)),
+    "ppath_functions": ("raw", lambda raw: ppath_functions(raw["ppath"], codes=True)),
+    "pl_functions": ("raw", lambda raw: pl_functions(raw["pl"], codes=True)),
+    "hgen_functions": ("raw", lambda raw: hgen_functions(raw["hgen"], codes=True)),
+    "hbrutto_functions": (
+        "raw",
+        lambda raw: hbrutto_functions(raw["hbrutto"], codes=True),
+    ),
+    "data_clean": ("raw", _clean),
+    "psm_pipeline": ("clean", _psm_pipeline),
+    "fit_regression_model": ("matched", fit_regression_model),
+    "fit_regression_model_native": (
+        "matched",
+        lambda matched: fit_regression_model(matched, engine="native"),
+    ),
+    "perform_subgroup_analyses": ("matched", perform_subgroup_analyses),
+    "threshold_sweep": ("matched", lambda matched: threshold_sweep(matched, "age")),
+}
+
+
+def run_benchmarks(sizes=BENCHMARK_SIZES, names=None, repeat=3, seed=0):
+    """Times and memory-profiles the benchmarks on synthetic SOEP panels of several sizes.
+
+    For each size, the panel is generated with synthetic_soep in value codes, as the data are read by
+    task_clean_data_python. The cleaned and the matched data are computed once, outside of the measurements, if a
+    selected benchmark needs them. Each benchmark is timed repeat times with a wall clock and then run once more under
+    tracemalloc to find the peak of the memory it allocates. The design matrix cache of fit_ols is cleared before every
+    run, so that each run starts cold.
+
+    Args:
+        sizes (list, optional): The numbers of persons of the panels. Defaults to BENCHMARK_SIZES.
+        names (list, optional): The benchmarks to run. Defaults to None, which runs all benchmarks of BENCHMARKS.
+        repeat (int, optional): The number of timed runs. Defaults to 3.
+        seed (int, optional): The seed of synthetic_soep. Defaults to 0.
+
+    Returns:
+        pandas.DataFrame: One row per benchmark and size with the columns 'benchmark', 'n_persons', 'n_rows' (the rows
+            of the input), 'seconds' (the list of run times), 'min_seconds' and 'peak_bytes'.
+
+    Raises:
+        ValueError: If a name is not a benchmark of BENCHMARKS.
+
+    """
+    names = list(BENCHMARKS) if names is None else list(names)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        raise ValueError(f"Unknown benchmarks {unknown}.")
+    stages = {BENCHMARKS[name][0] for name in names}
+
+    rows = []
+    for n_persons in sizes:
+        inputs = {"raw": synthetic_soep(n_persons, seed=seed, codes=True)}
+        if stages & {"clean", "matched"}:
+            inputs["clean"] = _clean(inputs["raw"])
+        if "matched" in stages:
+            inputs["matched"] = _psm_pipeline(inputs["clean"])
+        for name in names:
+            stage, function = BENCHMARKS[name]
+            data = inputs[stage]
+            seconds = []
+            for _ in range(repeat):
+                model._DESIGN_CACHE.clear()
+                start = time.perf_counter()
+                function(data)
+                seconds.append(time.perf_counter() - start)
+            model._DESIGN_CACHE.clear()
+            tracemalloc.start()
+            try:
+                function(data)
+                _, peak_bytes = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+            rows.append(
+                {
+                    "benchmark": name,
+                    "n_persons": n_persons,
+                    "n_rows": _n_rows(data),
+                    "seconds": seconds,
+                    "min_seconds": min(seconds),
+                    "peak_bytes": peak_bytes,
+                },
+            )
+        del inputs
+    return pd.DataFrame(rows)
+
+
+def _n_rows(data):
+    """Returns the number of rows of a DataFrame, or the total of a dict of DataFrames."""
+    if isinstance(data, dict):
+        return sum(len(df) for df in data.values())
+    return len(data)
+
+
+def environment_info():
+    """Describes the commit and the machine the benchmarks ran on.
+
+    Returns:
+        dict: The git commit (None outside of a git checkout), whether the working tree had uncommitted changes, the
+            time, and the versions of Python, NumPy and pandas, the platform and the number of CPUs.
+
+    """
+    commit, dirty = None, None
+    try:
+        commit = _git("rev-parse", "HEAD")
+        dirty = bool(_git("status", "--porcelain", "--untracked-files=no"))
+    except (OSError, subprocess.CalledProcessError):
+        pass
+    return {
+        "commit": commit,
+        "dirty": dirty,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def _git(*args):
+    """Runs a git command in the repository of the project and returns its output."""
+    result = subprocess.run(
+        ["git", *args],
+        cwd=SRC,
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    return result.stdout.strip()
+
+
+def write_benchmarks(results, path, info=None):
+    """Writes benchmark results and the environment they were measured in to a JSON file.
+
+    Args:
+        results (pandas.DataFrame): The results returned by run_benchmarks.
+        path (str or pathlib.Path): Path to the JSON file.
+        info (dict, optional): The environment. Defaults to None, which uses environment_info.
+
+    """
+    info = environment_info() if info is None else info
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({**info, "results": results.to_dict(orient="records")}, f, indent=2)
+
+
+def read_benchmarks(path):
+    """Reads benchmark results written by write_benchmarks.
+
+    Args:
+        path (str or pathlib.Path): Path to the JSON file.
+
+    Returns:
+        tuple: The results as a pandas.DataFrame, and the environment as a dict.
+
+    """
+    with open(path) as f:
+        content = json.load(f)
+    results = pd.DataFrame(content.pop("results"))
+    return results, content
+
+
+def compare_benchmarks(baseline, results):
+    """Compares the run time and memory of benchmark results with a baseline, e.g. of an earlier commit.
+
+    Args:
+        baseline (pandas.DataFrame): The baseline results.
+        results (pandas.DataFrame): The results to compare.
+
+    Returns:
+        pandas.DataFrame: One row per benchmark and size of both results with the columns 'benchmark', 'n_persons',
+            'baseline_seconds', 'min_seconds', 'time_ratio', 'baseline_peak_bytes', 'peak_bytes' and 'memory_ratio'.
+            Ratios above one are regressions.
+
+    """
+    columns = ["benchmark", "n_persons", "min_seconds", "peak_bytes"]
+    comparison = baseline[columns].merge(
+        results[columns],
+        on=["benchmark", "n_persons"],
+        suffixes=["_baseline", ""],
+    )
+    comparison = comparison.rename(
+        columns={
+            "min_seconds_baseline": "baseline_seconds",
+            "peak_bytes_baseline": "baseline_peak_bytes",
+        },
+    )
+    comparison["time_ratio"] = (
+        comparison["min_seconds"] / comparison["baseline_seconds"]
+    )
+    comparison["memory_ratio"] = (
+        comparison["peak_bytes"] / comparison["baseline_peak_bytes"]
+    )
+    return comparison[
+        [
+            "benchmark",
+            "n_persons",
+            "baseline_seconds",
+            "min_seconds",
+            "time_ratio",
+            "baseline_peak_bytes",
+            "peak_bytes",
+            "memory_ratio",
+        ]
+    ]
+
+
+def main(argv=None):
+    """Command line interface to run the benchmarks and compare them with a baseline."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", nargs="+", type=int, default=BENCHMARK_SIZES)
+    parser.add_argument("--benchmarks", nargs="+", choices=list(BENCHMARKS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--output",
+        type=Path,
+        help="JSON file of the results. Defaults to the commit in BENCHMARK_DIR.",
+    )
+    parser.add_argument(
+        "--compare",
+        type=Path,
+        help="JSON file of baseline results to compare the results with.",
+    )
+    args = parser.parse_args(argv)
+
+    info = environment_info()
+    results = run_benchmarks(args.sizes, args.benchmarks, args.repeat, args.seed)
+    output = args.output
+    if output is None:
+        output = BENCHMARK_DIR / f"{(info['commit'] or 'unknown')[:12]}.json"
+    write_benchmarks(results, output, info)
+    print(results.drop(columns="seconds").to_string(index=False))
+    print(f"Wrote benchmark results to {output}.")
+    if args.compare is not None:
+        baseline, _ = read_benchmarks(args.compare)
+        print(compare_benchmarks(baseline, results).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 """All the general configuration of the project."""
+import os
 from pathlib import Path
 
 SRC = Path(__file__).parent.resolve()
@@ -9,4 +10,83 @@ PAPER_DIR = SRC.joinpath("..", "..", "paper").resolve()
 
 GROUPS = ["marital_status", "qualification"]
 
-__all__ = ["BLD", "SRC", "TEST_DIR", "GROUPS"]
+SURVEY_YEARS = [2013, 2017]
+
+CACHE_DIR = BLD.joinpath("cache")
+CACHE_MAX_BYTES = 10 * 2**30
+
+# Numbers of persons of the synthetic SOEP panels the benchmarks run on, and where
+# their results are stored.
+BENCHMARK_SIZES = [10_000, 100_000, 1_000_000, 10_000_000]
+BENCHMARK_DIR = BLD.joinpath("benchmarks")
+
+N_WORKERS = int(os.environ.get("FINAL_PROJECT_N_WORKERS", os.cpu_count() or 1))
+
+# Parameters of the propensity score matchings, each fitted once by the analysis.
+PSM_CONFIGS = {
+    "no_replacement": {"replacement": False, "caliper": None},
+    "caliper": {"replacement": True, "caliper": 0.2},
+}
+
+# Number of replications and seed of the bootstrap confidence intervals.
+BOOTSTRAP_REPLICATIONS = 2000
+BOOTSTRAP_SEED = 20230501
+
+# Approximate memory in bytes that the bootstrap of the ATT and ATE holds at a time.
+BOOTSTRAP_MEMORY_BYTES = 2**28
+
+# Subgroups of the subgroup analyses as (label, column, operator, value), by analysis.
+# The operator is one of <, <=, ==, !=, >= and >. Add an entry to analyse another split.
+SUBGROUP_SPLITS = {
+    "age": [("Age < 50", "age", "<", 50), ("Age >= 50", "age", ">=", 50)],
+    "gender": [("Male", "sex", "==", 1), ("Female", "sex", "==", 0)],
+    "marital_status": [
+        ("Married", "marital_status", "==", 1),
+        ("Other", "marital_status", "==", 0),
+    ],
+    "health": [
+        ("High Health", "health_2013", ">", 3),
+        ("Low Health", "health_2013", "<=", 3),
+    ],
+    "education": [
+        ("High Education (>=13)", "education", ">=", 13),
+        ("Low Education (<13)", "education", "<", 13),
+    ],
+    "household_size": [
+        ("HH Members < 2", "hh_members", "<", 2),
+        ("HH Members >= 2", "hh_members", ">=", 2),
+    ],
+}
+
+# Continuous moderators of the threshold sweeps of the treatment effect.
+SWEEP_MODERATORS = ["age", "education", "health_2013", "hh_members", "hh_income"]
+
+# Whether to export the intermediate data artifacts as CSV files in addition to Feather.
+EXPORT_CSV = os.environ.get("FINAL_PROJECT_EXPORT_CSV", "0") == "1"
+
+# Whether to trace the tasks and the functions they call during a build, and where the
+# traces are written to.
+TRACE = os.environ.get("FINAL_PROJECT_TRACE", "0") == "1"
+TRACE_DIR = BLD.joinpath("traces")
+
+__all__ = [
+    "BLD",
+    "SRC",
+    "TEST_DIR",
+    "GROUPS",
+    "SURVEY_YEARS",
+    "CACHE_DIR",
+    "CACHE_MAX_BYTES",
+    "BENCHMARK_SIZES",
+    "BENCHMARK_DIR",
+    "N_WORKERS",
+    "EXPORT_CSV",
+    "TRACE",
+    "TRACE_DIR",
+    "PSM_CONFIGS",
+    "BOOTSTRAP_REPLICATIONS",
+    "BOOTSTRAP_SEED",
+    "BOOTSTRAP_MEMORY_BYTES",
+    "SUBGROUP_SPLITS",
+    "SWEEP_MODERATORS",
+]
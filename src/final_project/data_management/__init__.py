@@ -1,21 +1,38 @@
 """Functions for managing data."""
 
 from final_project.data_management.clean_data import (
+    clean_columns,
     data_clean,
+    filter_by_keys,
     filter_by_year,
     hbrutto_functions,
     hgen_functions,
+    label_code,
     pgen_covariates,
     pgen_treatment,
+    pgen_treatment_windows,
     pl_functions,
     ppath_functions,
     replace_categorical_values,
     replace_invalid_responses,
 )
+from final_project.data_management.keys import (
+    encode_keys,
+    factorize_keys,
+    gather_join,
+)
+from final_project.data_management.load_data import (
+    read_soep_dataset,
+    read_soep_datasets,
+)
+from final_project.data_management.panel import PanelIndex, panel_index
+from final_project.data_management.schema import CLEAN_DATA_SCHEMA, compact_dtypes
+from final_project.data_management.synthetic import synthetic_soep
 
 __all__ = [
     data_clean,
     pgen_treatment,
+    pgen_treatment_windows,
     pl_functions,
     pgen_covariates,
     ppath_functions,
@@ -24,4 +41,17 @@ __all__ = [
     replace_categorical_values,
     replace_invalid_responses,
     filter_by_year,
+    filter_by_keys,
+    label_code,
+    clean_columns,
+    read_soep_dataset,
+    read_soep_datasets,
+    PanelIndex,
+    panel_index,
+    factorize_keys,
+    encode_keys,
+    gather_join,
+    CLEAN_DATA_SCHEMA,
+    compact_dtypes,
+    synthetic_soep,
 ]
@@ -0,0 +1,209 @@
+"""Content-addressed cache of converted input datasets.
+
+Each cached dataset is stored as an uncompressed Arrow IPC (Feather) file whose name is
+derived from the content hash of the source file and the reader options, so a changed
+source file or different options never hit a stale entry. The cache can be cleared or
+shrunk from the command line with ``python -m final_project.data_management.cache``.
+
+"""
+
+import argparse
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from final_project.config import CACHE_DIR, CACHE_MAX_BYTES
+from final_project.utilities import read_artifact
+
+CACHE_FORMAT_VERSION = 1
+
+
+def file_digest(path, chunk_size=2**20):
+    """Computes the SHA-256 hash of a file's content.
+
+    Args:
+        path (str or pathlib.Path): Path to the file.
+        chunk_size (int, optional): Number of bytes hashed at once. Defaults to 1 MiB.
+
+    Returns:
+        str: The hexadecimal digest.
+
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as stream:
+        for block in iter(lambda: stream.read(chunk_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cache_key(path, options):
+    """Creates the cache key of a source file read with the given reader options.
+
+    Args:
+        path (str or pathlib.Path): Path to the source file.
+        options (dict): Reader options that affect the loaded data.
+
+    Returns:
+        str: The hexadecimal cache key.
+
+    """
+    payload = json.dumps(
+        {
+            "version": CACHE_FORMAT_VERSION,
+            "source": file_digest(path),
+            "options": options,
+        },
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def cache_entry(
+    path,
+    reader,
+    cache_dir=CACHE_DIR,
+    max_bytes=CACHE_MAX_BYTES,
+    **options,
+):
+    """Returns the path of the cached conversion of a source file, creating it if needed.
+
+    Args:
+        path (str or pathlib.Path): Path to the source file.
+        reader (callable): Function called as ``reader(path, **options)`` to load the
+            source file into a pandas.DataFrame on a cache miss.
+        cache_dir (str or pathlib.Path, optional): Directory of the cache. Defaults to
+            ``CACHE_DIR``.
+        max_bytes (int, optional): Size limit of the cache. Least recently used entries
+            are evicted once it is exceeded. Defaults to ``CACHE_MAX_BYTES``.
+        **options: Reader options, which are part of the cache key.
+
+    Returns:
+        pathlib.Path: Path to the cached Feather file.
+
+    """
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    entry = cache_dir / f"{cache_key(path, options)}.feather"
+
+    if entry.exists():
+        # Mark the entry as recently used for the eviction order.
+        entry.touch()
+    else:
+        df = reader(path, **options)
+        tmp = entry.with_suffix(f".{os.getpid()}.tmp")
+        df.reset_index(drop=True).to_feather(tmp, compression="uncompressed")
+        os.replace(tmp, entry)
+        evict(cache_dir, max_bytes, keep=[entry])
+    return entry
+
+
+def read_cached(
+    path,
+    reader,
+    cache_dir=CACHE_DIR,
+    max_bytes=CACHE_MAX_BYTES,
+    **options,
+):
+    """Loads a source file from the cache, converting it on the first call.
+
+    Args:
+        path (str or pathlib.Path): Path to the source file.
+        reader (callable): Function called as ``reader(path, **options)`` to load the
+            source file into a pandas.DataFrame on a cache miss.
+        cache_dir (str or pathlib.Path, optional): Directory of the cache. Defaults to
+            ``CACHE_DIR``.
+        max_bytes (int, optional): Size limit of the cache. Defaults to
+            ``CACHE_MAX_BYTES``.
+        **options: Reader options, which are part of the cache key.
+
+    Returns:
+        pandas.DataFrame: The loaded dataset.
+
+    """
+    entry = cache_entry(path, reader, cache_dir, max_bytes, **options)
+    return read_feather(entry)
+
+
+def read_feather(path, columns=None, memory_map=True):
+    """Reads a Feather file, by default through a memory map.
+
+    Args:
+        path (str or pathlib.Path): Path to the Feather file.
+        columns (list, optional): Columns to read. Defaults to None, which reads all
+            columns.
+        memory_map (bool, optional): Whether to memory map the file. Defaults to True.
+
+    Returns:
+        pandas.DataFrame: The loaded data.
+
+    """
+    return read_artifact(path, columns=columns, memory_map=memory_map)
+
+
+def evict(cache_dir=CACHE_DIR, max_bytes=CACHE_MAX_BYTES, keep=()):
+    """Removes the least recently used cache entries until the cache fits into max_bytes.
+
+    Args:
+        cache_dir (str or pathlib.Path, optional): Directory of the cache. Defaults to
+            ``CACHE_DIR``.
+        max_bytes (int, optional): Size limit of the cache. Defaults to
+            ``CACHE_MAX_BYTES``.
+        keep (list, optional): Entries that are never evicted, for example the ones
+            that were just written. Defaults to an empty tuple.
+
+    Returns:
+        list: Paths of the removed entries.
+
+    """
+    entries = sorted(Path(cache_dir).glob("*.feather"), key=lambda p: p.stat().st_mtime)
+    total = sum(entry.stat().st_size for entry in entries)
+    removed = []
+    for entry in entries:
+        if total <= max_bytes:
+            break
+        if entry in keep:
+            continue
+        total -= entry.stat().st_size
+        entry.unlink()
+        removed.append(entry)
+    return removed
+
+
+def clear_cache(cache_dir=CACHE_DIR):
+    """Removes all entries from the cache.
+
+    Args:
+        cache_dir (str or pathlib.Path, optional): Directory of the cache. Defaults to
+            ``CACHE_DIR``.
+
+    Returns:
+        list: Paths of the removed entries.
+
+    """
+    return evict(cache_dir, max_bytes=-1)
+
+
+def main(argv=None):
+    """Command line interface to invalidate or shrink the cache."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cache-dir", default=CACHE_DIR, type=Path)
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--clear", action="store_true", help="Remove all entries.")
+    group.add_argument(
+        "--max-bytes",
+        type=int,
+        help="Evict least recently used entries until the cache fits.",
+    )
+    args = parser.parse_args(argv)
+
+    if args.clear:
+        removed = clear_cache(args.cache_dir)
+    else:
+        removed = evict(args.cache_dir, args.max_bytes)
+    print(f"Removed {len(removed)} cache entries from {args.cache_dir}.")
+
+
+if __name__ == "__main__":
+    main()
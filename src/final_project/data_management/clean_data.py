@@ -5,33 +5,101 @@ import warnings
 import numpy as np
 import pandas as pd
 
+from final_project.data_management.keys import (
+    encode_keys,
+    factorize_keys,
+    gather_join,
+)
+from final_project.data_management.panel import PanelIndex, panel_index
+from final_project.tracing import traced
+
 warnings.simplefilter(action="ignore", category=FutureWarning)
 
+# Responses that are treated as missing values.
+UNCONSIDERABLE = [
+    "[-1] keine Angabe",
+    "[-2] trifft nicht zu",
+    "[-3] nicht valide",
+    "[-4] unzulaessige Mehrfachantwort",
+    "[-5] in Fragebogenversion nicht enthalten",
+    "[-6] Fragebogenversion mit geaenderter Filterfuehrung",
+    "[-8] Frage in diesem Jahr nicht Teil des Frageprogramms",
+]
+
+
+def label_code(label):
+    """Returns the Stata value code of a SOEP value label, e.g. -2 for "[-2] trifft nicht zu".
+
+    Args:
+        label (str): The value label, starting with its code in square brackets.
+
+    Returns:
+        int: The value code.
+
+    """
+    return int(label[1 : label.index("]")])
+
+
+UNCONSIDERABLE_CODES = [label_code(label) for label in UNCONSIDERABLE]
 
-def filter_by_year(df, year):
+
+def _value(label, codes):
+    """Returns the label itself, or its value code if the data holds value codes."""
+    return label_code(label) if codes else label
+
+
+def filter_by_year(df, year, columns=None):
     """Filters a DataFrame by the given year, using the 'syear' column.
 
+    If a PanelIndex is passed, the wave is returned as a view on the indexed panel without scanning the full panel. The
+    view must not be modified in place.
+
     Args:
-        df (pandas.DataFrame): The DataFrame to filter.
+        df (pandas.DataFrame or PanelIndex): The DataFrame to filter.
         year (int): The year to filter by.
+        columns (list, optional): Columns to select. Defaults to None, which selects all columns.
 
     Returns:
         pandas.DataFrame: The filtered DataFrame.
 
     """
-    df = df.copy()
-    df.loc[:, "syear"] = pd.to_numeric(df["syear"], errors="coerce")
-    df = df.loc[df["syear"] == year]
+    if isinstance(df, PanelIndex):
+        return df.wave(year, columns=columns)
+    if columns is not None:
+        df = df[columns]
+    syear = pd.to_numeric(df["syear"], errors="coerce").to_numpy()
+    mask = syear == year
+    df = df.loc[mask].copy()
+    df.loc[:, "syear"] = syear[mask]
     return df
 
 
-def replace_invalid_responses(df, column, data_type):
+def filter_by_keys(df, column, values=None):
+    """Keeps the rows of a DataFrame whose key is in the given set of values.
+
+    Args:
+        df (pandas.DataFrame): The DataFrame to filter.
+        column (str): The key column, e.g. 'pid' or 'hid'.
+        values (array-like, optional): The key values to keep. Defaults to None, which keeps all rows.
+
+    Returns:
+        pandas.DataFrame: The filtered DataFrame, or df itself if values is None.
+
+    """
+    if values is None:
+        return df
+    return df.loc[df[column].isin(values)]
+
+
+def replace_invalid_responses(df, column, data_type, codes=False):
     """Replaces invalid or unconsiderable responses in a DataFrame column with NaN values, and converts the data type of the column to the specified data type.
 
     Args:
         df (pandas.DataFrame): The DataFrame to modify.
         column (str): The name of the column to modify.
         data_type (str): The desired data type of the column. Must be 'int', 'float', or 'category'.
+        codes (bool): Whether the column holds Stata value codes (read with convert_categoricals=False) instead of value labels.
+            Numeric columns then lose all negative codes, which are the SOEP missing value codes. Defaults to False.
 
     Returns:
         pandas.DataFrame: The modified DataFrame.
@@ -41,39 +109,165 @@ def replace_invalid_responses(df, column, data_type):
                     type is not 'int', 'float', or 'category'.
 
     """
-    unconsiderable = [
-        "[-1] keine Angabe",
-        "[-2] trifft nicht zu",
-        "[-3] nicht valide",
-        "[-4] unzulaessige Mehrfachantwort",
-        "[-5] in Fragebogenversion nicht enthalten",
-        "[-6] Fragebogenversion mit geaenderter Filterfuehrung",
-        "[-8] Frage in diesem Jahr nicht Teil des Frageprogramms",
-    ]
-    df = df.copy()
-    df[column] = df[column].replace(unconsiderable, np.nan)
-
     if column not in df.columns:
         raise ValueError(f"Column '{column}' does not exist in DataFrame.")
 
+    df = df.copy()
+    df[column] = _clean_series(df[column], data_type, codes)
+    return df
+
+
+def clean_columns(df, spec, mappings=None, codes=False):
+    """Replaces invalid responses and converts the data types of several columns in a single pass.
+
+    In contrast to calling replace_invalid_responses once per column, the DataFrame is not copied: only the cleaned columns
+    are newly allocated, all other columns share memory with the input.
+
+    Args:
+        df (pandas.DataFrame): The DataFrame to modify.
+        spec (dict): Mapping from column name to the desired data type, which must be 'int', 'float', or 'category',
+            e.g. as listed in data_info.yaml.
+        mappings (dict, optional): Mapping from column name to a dictionary of old values to new numeric values, which is
+            applied after the invalid responses are replaced, as in replace_categorical_values. Defaults to None.
+        codes (bool): Whether the columns hold Stata value codes instead of value labels. Defaults to False.
+
+    Returns:
+        pandas.DataFrame: The modified DataFrame.
+
+    Raises:
+        ValueError: If a column in spec does not exist in the DataFrame, or if a data type is not 'int', 'float', or
+            'category'.
+
+    """
+    mappings = {} if mappings is None else mappings
+    missing = [column for column in spec if column not in df.columns]
+    if missing:
+        raise ValueError(f"Columns {missing} do not exist in DataFrame.")
+
+    cleaned = {}
+    for column, data_type in spec.items():
+        cleaned[column] = _clean_series(df[column], data_type, codes)
+        if column in mappings:
+            cleaned[column] = _map_series(cleaned[column], mappings[column], codes)
+    columns = {column: cleaned.get(column, df[column]) for column in df.columns}
+    return pd.DataFrame(columns, index=df.index, copy=False)
+
+
+def _clean_series(series, data_type, codes):
+    """Replaces invalid responses in a Series with NaN values and converts its data type."""
+    if not codes:
+        series = series.replace(UNCONSIDERABLE, np.nan)
+    elif data_type == "category":
+        series = series.mask(series.isin(UNCONSIDERABLE_CODES))
+    else:
+        series = series.mask(series < 0)
+
     # Convert data type
     if data_type == "int":
-        df[column] = pd.to_numeric(df[column], errors="coerce").astype("Int64")
+        series = pd.to_numeric(series, errors="coerce").astype("Int64")
     elif data_type == "float":
-        df[column] = pd.to_numeric(df[column], errors="coerce").astype("float")
+        series = pd.to_numeric(series, errors="coerce").astype("float")
     elif data_type == "category":
-        df[column] = df[column].astype("category")
+        series = series.astype("category")
     else:
         raise ValueError("Invalid data type. Must be 'int', 'float', or 'category'.")
-    return df
+    return series
+
+
+def _map_series(series, mapping, codes):
+    """Replaces the values of a Series according to mapping and converts it to float."""
+    return series.replace(_code_mapping(mapping, codes)).astype("float")
+
+
+def _code_mapping(mapping, codes):
+    """Returns the mapping itself, or with value codes as keys if the data holds value codes."""
+    if codes:
+        return {label_code(label): value for label, value in mapping.items()}
+    return mapping
+
+
+@traced
+def pgen_treatment_windows(df, windows, codes=False):
+    """Calculates the unemployment duration for each (start, end) window of survey years using "pgexpue" variable in the pgen Dataset(input dataframe), and creates a variable indicating
+    whether the respondent went unemployed during that window.
 
+    The waves are pivoted once into a pid x wave array of unemployment experience and household IDs, so that all windows are computed by array lookups without merging the waves. A
+    respondent went unemployed in a window if they live in the same household in both years and their unemployment experience increased by at least one year.
 
-def pgen_treatment(df):
+    Args:
+        df (pandas.DataFrame or PanelIndex): The DataFrame to modify- pgen Dataset.
+        windows (list): The (start, end) survey years of the windows, e.g. [(2013, 2017)].
+        codes (bool): Whether categorical columns hold Stata value codes instead of value labels. Defaults to False.
+
+    Returns:
+        pandas.DataFrame: A new DataFrame containing the following columns: 'pid', 'hid', 'start_year', 'end_year' and 'went_unemployed', with one row per respondent of the start year
+            of each window, in the order of the windows and of the rows of the start year.
+
+    Raises:
+        ValueError: If the 'pgexpue' column does not exist in the DataFrame, or a respondent has more than one row in a survey year.
+
+    """
+    windows = [(int(start), int(end)) for start, end in windows]
+    years = sorted({year for window in windows for year in window})
+    waves = [
+        replace_invalid_responses(
+            filter_by_year(df, year, columns=["pid", "hid", "pgexpue", "syear"]),
+            "pgexpue",
+            "float",
+            codes=codes,
+        )
+        for year in years
+    ]
+    pid_codes, pids = pd.factorize(pd.concat([wave["pid"] for wave in waves]))
+    pid_codes = np.split(pid_codes, np.cumsum([len(wave) for wave in waves])[:-1])
+
+    shape = (len(pids), len(years))
+    present = np.zeros(shape, dtype=bool)
+    hid = np.zeros(shape, dtype=np.int64)
+    pgexpue = np.full(shape, np.nan)
+    for j, (wave, rows) in enumerate(zip(waves, pid_codes)):
+        if len(np.unique(rows)) < len(rows):
+            raise ValueError(f"Respondents with more than one row in {years[j]}.")
+        present[rows, j] = True
+        hid[rows, j] = wave["hid"].to_numpy()
+        pgexpue[rows, j] = wave["pgexpue"].to_numpy()
+
+    column = {year: j for j, year in enumerate(years)}
+    frames = []
+    for start, end in windows:
+        wave = waves[column[start]]
+        rows = pid_codes[column[start]]
+        s, e = column[start], column[end]
+        went_unemployed = (
+            present[rows, e]
+            & (hid[rows, e] == hid[rows, s])
+            & (pgexpue[rows, e] - pgexpue[rows, s] >= 1)
+        )
+        frames.append(
+            pd.DataFrame(
+                {
+                    "pid": wave["pid"].to_numpy(),
+                    "hid": wave["hid"].to_numpy(),
+                    "start_year": start,
+                    "end_year": end,
+                    "went_unemployed": went_unemployed.astype(np.int64),
+                },
+            ),
+        )
+    columns = ["pid", "hid", "start_year", "end_year", "went_unemployed"]
+    if not frames:
+        return pd.DataFrame(columns=columns)
+    return pd.concat(frames, ignore_index=True)[columns]
+
+
+@traced
+def pgen_treatment(df, codes=False):
     """Calculates the unemployment duration between 2013-2017 using "pgexpue" variable in the pgen Dataset(input dataframe), and creates a new variable indicating whether the respondent went
     unemployed during that period which is the treatment variable.
 
     Args:
-        df (pandas.DataFrame): The DataFrame to modify- pgen Dataset.
+        df (pandas.DataFrame or PanelIndex): The DataFrame to modify- pgen Dataset.
+        codes (bool): Whether categorical columns hold Stata value codes instead of value labels. Defaults to False.
 
     Returns:
         pandas.DataFrame: A new DataFrame containing the following columns: 'pid', 'went_unemployed',
@@ -83,34 +277,19 @@ def pgen_treatment(df):
         ValueError: If the 'pgexpue' column does not exist in the DataFrame.
 
     """
-    df = df.copy()
-    df = replace_invalid_responses(df, "pgexpue", "float")
-    df_start = filter_by_year(df, 2013)
-    df_end = filter_by_year(df, 2017)
-
-    df_final = df_start.merge(
-        df_end,
-        on=["pid", "hid"],
-        suffixes=("_2013", "_2017"),
-        how="left",
-    )
-    df_final["unemp_duration"] = df_final["pgexpue_2017"] - df_final["pgexpue_2013"]
-    df_final["went_unemployed"] = df_final["unemp_duration"].apply(
-        lambda x: 1 if x >= 1 else 0,
-    )
-    df_final = df_final[["pid", "went_unemployed", "hid"]]
+    df_final = pgen_treatment_windows(df, [(2013, 2017)], codes=codes)
+    return df_final[["pid", "went_unemployed", "hid"]]
 
-    df_final = df_final.sort_index()
-    return df_final
 
-
-def ppath_functions(df):
+@traced
+def ppath_functions(df, codes=False):
     """Creates a new DataFrame containing information on the respondents' age, sex, and pid (personal ID),.
 
     based on the columns - year of birth and sex in the ppath Dataset(input dataframe).
 
     Args:
         df (pandas.DataFrame): The DataFrame to modify -ppath Dataset.
+        codes (bool): Whether categorical columns hold Stata value codes instead of value labels. Defaults to False.
 
     Returns:
         pandas.DataFrame: A new DataFrame containing the following columns: 'age', 'pid', 'sex'.
@@ -118,7 +297,11 @@ def ppath_functions(df):
     """
     df = df[["pid", "sex", "gebjahr"]]
     df_copy = df.copy()
-    df_copy.loc[:, "sex"] = np.where(df_copy["sex"] == "[1] maennlich", 1, 0)
+    df_copy["sex"] = np.where(
+        df_copy["sex"] == _value("[1] maennlich", codes),
+        1,
+        0,
+    )
     df_copy.loc[:, "age"] = 2013.0 - df_copy["gebjahr"]
     df_copy = df_copy[df_copy["age"] >= 22]
     df_copy = df_copy[df_copy["age"] <= 64]
@@ -126,19 +309,32 @@ def ppath_functions(df):
     return df_copy
 
 
-def pl_subfunction(df):
+# Data types of the renamed columns of the pl Dataset
+pl_column_types = {
+    "health": "category",
+    "Company_missing": "category",
+    "Feeling_left_out": "category",
+    "socially_isolated": "category",
+}
+
+
+def pl_subfunction(df, mappings=None, codes=False):
     """Modifies a DataFrame by renaming specific columns and replacing invalid responses in certain columns of pl Dataset, the function is used as a subfunction later.
 
+    All columns are cleaned in a single pass by clean_columns, without copying the DataFrame.
+
     Args:
         df (pandas.DataFrame): The DataFrame to modify.
+        mappings (dict, optional): Mapping from column name to a dictionary of old values to new numeric values, which is
+            applied to the cleaned columns. Defaults to None.
+        codes (bool): Whether categorical columns hold Stata value codes instead of value labels. Defaults to False.
 
     Returns:
         pandas.DataFrame: A modified DataFrame with the following column names:
         'health', 'Company_missing', 'Feeling_left_out', and 'socially_isolated'.
-        Invalid responses in these columns are replaced with NaN values.
+        Invalid responses in these columns are replaced with NaN values, and columns in mappings are mapped to floats.
 
     """
-    df = df.copy()
     df = df.rename(
         columns={
             "ple0008": "health",
@@ -146,21 +342,20 @@ def pl_subfunction(df):
             "plj0588": "Feeling_left_out",
             "plj0589": "socially_isolated",
         },
+        copy=False,
     )
-    df = replace_invalid_responses(df, "health", "category")
-    df = replace_invalid_responses(df, "Company_missing", "category")
-    df = replace_invalid_responses(df, "Feeling_left_out", "category")
-    df = replace_invalid_responses(df, "socially_isolated", "category")
-    return df
+    return clean_columns(df, pl_column_types, mappings=mappings, codes=codes)
 
 
-def replace_categorical_values(df, column, mapping):
+def replace_categorical_values(df, column, mapping, codes=False):
     """Replaces categorical values in a pandas DataFrame column with numeric values.
 
     Args:
         df (pandas.DataFrame): The input DataFrame.
         column (str): The name of the column to replace values in.
         mapping (dict): A dictionary mapping old values to new values.
+        codes (bool): Whether the column holds Stata value codes instead of value labels. The value labels in the mapping
+            are then replaced by their codes. Defaults to False.
 
     Returns:
         pandas.DataFrame: A copy of the input DataFrame with the specified column's categorical values replaced with numeric values.
@@ -168,7 +363,7 @@ def replace_categorical_values(df, column, mapping):
     """
     df = df.copy()
     # Convert column to string if a list is passed
-    df[column] = df[column].replace(mapping)
+    df[column] = df[column].replace(_code_mapping(mapping, codes))
     df[column] = df[column].astype("float")
     return df
 
@@ -195,12 +390,13 @@ column_to_replace1 = ["Company_missing", "Feeling_left_out", "socially_isolated"
 column_to_replace2 = ["health"]
 
 
-def pl_functions(df):
+@traced
+def pl_functions(df, codes=False, pids=None):
     """The function calculates aggregate loneliness from three different indicators of loneliness, maps these indicators along with health to numerical values. It takes the aggregate loneliness from
     2013 and 2017 and health indicator 2013 from pl dataset of SOEP.
 
     Args:
-        df (pandas.DataFrame): A DataFrame - pl Dataset, containing the following columns:
+        df (pandas.DataFrame or PanelIndex): A DataFrame - pl Dataset, containing the following columns:
             - pid (int): Personal ID
             - ple0008 (str): Self-rated health status
             - plj0587 (str): Missing company
@@ -208,6 +404,8 @@ def pl_functions(df):
             - plj0589 (str): Social isolation
             - syear (int): Survey year
             - hid (int): Household ID
+        codes (bool): Whether categorical columns hold Stata value codes instead of value labels. Defaults to False.
+        pids (array-like, optional): Personal IDs to keep. The rows of other respondents are dropped before cleaning. Defaults to None, which keeps all rows.
 
     Returns:
         pandas.DataFrame: A DataFrame with the following columns:
@@ -218,15 +416,18 @@ def pl_functions(df):
             - health_2013 (float): Self-rated health status in 2013, mapped to a scale from 1 to 5
 
     """
-    df = df[["pid", "ple0008", "plj0587", "plj0588", "plj0589", "syear", "hid"]]
-    df = df.copy()
-    df = pl_subfunction(df)
-    df = replace_categorical_values(df, column=column_to_replace1, mapping=mapping1)
-    df = replace_categorical_values(df, column=column_to_replace2, mapping=mapping2)
+    columns = ["pid", "ple0008", "plj0587", "plj0588", "plj0589", "syear", "hid"]
+    mappings = dict.fromkeys(column_to_replace1, mapping1)
+    mappings.update(dict.fromkeys(column_to_replace2, mapping2))
     cols = ["Company_missing", "Feeling_left_out", "socially_isolated"]
-    df["aggregate_loneliness"] = df[cols].mean(axis=1)
-    loneliness_2013 = filter_by_year(df, 2013)
-    loneliness_2017 = filter_by_year(df, 2017)
+    waves = []
+    for year in [2013, 2017]:
+        wave = filter_by_year(df, year, columns=columns)
+        wave = filter_by_keys(wave, "pid", pids)
+        wave = pl_subfunction(wave, mappings=mappings, codes=codes)
+        wave["aggregate_loneliness"] = wave[cols].mean(axis=1)
+        waves.append(wave)
+    loneliness_2013, loneliness_2017 = waves
     df_merge = loneliness_2013.merge(
         loneliness_2017,
         on=["pid", "hid"],
@@ -244,12 +445,14 @@ def pl_functions(df):
     return df_merge
 
 
-def pgen_covariates(df):
+@traced
+def pgen_covariates(df, codes=False):
     """Function applied on pgen Dataset of SOEP to generate covariates for Propensity score matching to find the effect of employment on loneliness. It filters out only employed people from 2013,
     their marital status and years of education.
 
     Args:
-    df (pandas.DataFrame): Input DataFrame containing the necessary variables.
+    df (pandas.DataFrame or PanelIndex): Input DataFrame containing the necessary variables.
+    codes (bool): Whether categorical columns hold Stata value codes instead of value labels. Defaults to False.
 
     Returns:
     pandas.DataFrame: A DataFrame containing the following variables:
@@ -259,27 +462,35 @@ def pgen_covariates(df):
     - hid: The household ID.
 
     """
-    df = df.copy()
-    df = filter_by_year(df, 2013)
-    df = replace_invalid_responses(df, "pgfamstd", "category")
+    df = filter_by_year(
+        df,
+        2013,
+        columns=["pid", "hid", "syear", "pgfamstd", "pgemplst", "pgbilzeit"],
+    )
+    # Keep only the full-time employed before cleaning the other columns.
+    df = df.loc[df["pgemplst"] == _value("[1] Voll erwerbstätig", codes)]
+    df = replace_invalid_responses(df, "pgfamstd", "category", codes=codes)
     df["marital_status"] = np.where(
-        df["pgfamstd"] == "[1] Verheiratet, mit Ehepartner zusammenlebend",
+        df["pgfamstd"]
+        == _value("[1] Verheiratet, mit Ehepartner zusammenlebend", codes),
         1,
         0,
     )
-    df = df.loc[df["pgemplst"] == "[1] Voll erwerbstätig"]
-    df = replace_invalid_responses(df, "pgbilzeit", "float")
+    df = replace_invalid_responses(df, "pgbilzeit", "float", codes=codes)
     df = df.rename(columns={"pgbilzeit": "education"})
     df = df[["marital_status", "education", "pid", "hid"]]
     return df
 
 
-def hgen_functions(df):
+@traced
+def hgen_functions(df, codes=False, hids=None):
     """Processes the household income data from the hgen dataset of SOEP and returns a dataframe with the household ID and income information for the year 2013.
 
     Args:
-        df (pandas.DataFrame): hgen Dataset(Input Dataframe) containing household income data
+        df (pandas.DataFrame or PanelIndex): hgen Dataset(Input Dataframe) containing household income data
             from the SOEP dataset.
+        codes (bool): Whether categorical columns hold Stata value codes instead of value labels. Defaults to False.
+        hids (array-like, optional): Household IDs to keep. Defaults to None, which keeps all households.
 
     Returns:
     pandas.DataFrame: A DataFrame containing the following variables:
@@ -287,47 +498,98 @@ def hgen_functions(df):
         hh_income : Income of households from 2013.
 
     """
-    df = df[["hid", "hgi1hinc", "syear"]]
-    df = df.copy()
-    df = filter_by_year(df, 2013)
+    df = filter_by_year(df, 2013, columns=["hid", "hgi1hinc", "syear"])
+    df = filter_by_keys(df, "hid", hids)
     df = df.rename(columns={"hgi1hinc": "hh_income"})
-    df = replace_invalid_responses(df, "hh_income", "float")
+    df = replace_invalid_responses(df, "hh_income", "float", codes=codes)
     df = df[["hid", "hh_income"]]
     return df
 
 
-def hbrutto_functions(df):
+@traced
+def hbrutto_functions(df, codes=False, hids=None):
     """Processes the household members data from the hbrutto dataset of SOEP and returns a dataframe with the household ID and number of members in the household for the year 2013.
 
     Args:
-        df (pandas.DataFrame): The input dataframe- Hbrutto Dataset from SOEP
+        df (pandas.DataFrame or PanelIndex): The input dataframe- Hbrutto Dataset from SOEP
          containing the original household data.
+        codes (bool): Whether categorical columns hold Stata value codes instead of value labels. Defaults to False.
+        hids (array-like, optional): Household IDs to keep. Defaults to None, which keeps all households.
 
     Returns:
         pandas.DataFrame: A new dataframe containing the household id and the number of household members.
 
     """
-    df = df[["hid", "syear", "hhgr"]]
-    df = df.copy()
-    df = filter_by_year(df, 2013)
+    df = filter_by_year(df, 2013, columns=["hid", "syear", "hhgr"])
+    df = filter_by_keys(df, "hid", hids)
     df = df.rename(columns={"hhgr": "hh_members"})
-    df = replace_invalid_responses(df, "hh_members", "float")
+    df = replace_invalid_responses(df, "hh_members", "float", codes=codes)
     df = df[["hid", "hh_members"]]
     return df
 
 
-def data_clean(pgen_treat_df, pgen_cov_df, ppath_df, pl_df, hgen_df, hbrutto_df):
-    """Perform cleaning and preprocessing on each of the SOEP datasets and merging them on Personal ID and / or Household ID."""
-    df1 = pgen_treatment(pgen_treat_df)
-    df2 = pl_functions(pl_df)
-    df3 = pgen_covariates(pgen_cov_df)
-    df4 = ppath_functions(ppath_df)
-    df5 = hgen_functions(hgen_df)
-    df6 = hbrutto_functions(hbrutto_df)
-
-    df1 = df1.merge(df4, on="pid")
-    df5 = df5.merge(df6, on="hid")
-    df1 = df1.merge(df3, on=["pid", "hid"])
-    df1 = df1.merge(df2, on=["pid", "hid"])
-    df1 = df1.merge(df5, on="hid")
+@traced
+def data_clean(
+    pgen_treat_df,
+    pgen_cov_df,
+    ppath_df,
+    pl_df,
+    hgen_df,
+    hbrutto_df,
+    codes=False,
+    keys=None,
+    lazy=False,
+):
+    """Perform cleaning and preprocessing on each of the SOEP datasets and merging them on Personal ID and / or Household ID.
+
+    With codes=True the datasets are expected to be read with convert_categoricals=False, so that all masking, mapping and
+    filtering runs on integer value codes instead of German label strings. The result is the same in both modes.
+
+    The survey waves of each panel dataset are indexed once by a PanelIndex that is shared by all cleaning functions, so
+    selecting a wave does not scan the full panel. If the same DataFrame is passed for both pgen arguments, it is indexed
+    only once.
+
+    The Personal and Household IDs of the cleaned datasets are factorized once into shared integer codes, and the datasets
+    are joined by array lookups on these codes. If a dict is passed as keys, it is filled with the pandas.Index of the
+    unique values of 'pid' and 'hid', so that later stages can encode their IDs with the same codes.
+
+    With lazy=True the treatment, the age filter of ppath and the full-time employment filter of pgen are joined first.
+    Only the Personal and Household IDs that survive these joins are passed on to the pl, hgen and hbrutto cleaning, so
+    the string cleaning of these datasets skips rows that never reach the output. The result is the same in both modes,
+    but the key indexes then only cover the IDs of the first three datasets.
+
+    """
+    pgen_treat = panel_index(pgen_treat_df)
+    pgen_cov = pgen_treat if pgen_cov_df is pgen_treat_df else panel_index(pgen_cov_df)
+    pl_df = panel_index(pl_df)
+    hgen_df = panel_index(hgen_df)
+    hbrutto_df = panel_index(hbrutto_df)
+
+    df1 = pgen_treatment(pgen_treat, codes=codes)
+    df3 = pgen_covariates(pgen_cov, codes=codes)
+    df4 = ppath_functions(ppath_df, codes=codes)
+    if lazy:
+        key_index, (c1, c3, c4) = factorize_keys([df1, df3, df4])
+        df1, c1 = gather_join(df1, df4, "pid", key_index, c1, c4)
+        df1, c1 = gather_join(df1, df3, ["pid", "hid"], key_index, c1, c3)
+        pids, hids = df1["pid"].unique(), df1["hid"].unique()
+        df2 = pl_functions(pl_df, codes=codes, pids=pids)
+        df5 = hgen_functions(hgen_df, codes=codes, hids=hids)
+        df6 = hbrutto_functions(hbrutto_df, codes=codes, hids=hids)
+        c2, c5, c6 = (encode_keys(df, key_index) for df in [df2, df5, df6])
+    else:
+        df2 = pl_functions(pl_df, codes=codes)
+        df5 = hgen_functions(hgen_df, codes=codes)
+        df6 = hbrutto_functions(hbrutto_df, codes=codes)
+        key_index, (c1, c2, c3, c4, c5, c6) = factorize_keys(
+            [df1, df2, df3, df4, df5, df6],
+        )
+        df1, c1 = gather_join(df1, df4, "pid", key_index, c1, c4)
+        df1, c1 = gather_join(df1, df3, ["pid", "hid"], key_index, c1, c3)
+    if keys is not None:
+        keys.update(key_index)
+
+    df5, c5 = gather_join(df5, df6, "hid", key_index, c5, c6)
+    df1, c1 = gather_join(df1, df2, ["pid", "hid"], key_index, c1, c2)
+    df1, c1 = gather_join(df1, df5, "hid", key_index, c1, c5)
     return df1
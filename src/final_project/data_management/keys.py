@@ -0,0 +1,112 @@
+"""Dense integer encoding of the person and household IDs.
+
+The ``pid`` and ``hid`` values of all cleaned datasets are factorized once into
+contiguous int32 codes. Joins on the IDs are then array lookups on the codes instead of
+hash joins on the original values, and the key indexes can be reused to encode the IDs
+of later stages with the same codes.
+
+"""
+
+import numpy as np
+import pandas as pd
+
+KEY_COLUMNS = ["pid", "hid"]
+
+
+def factorize_keys(frames, columns=KEY_COLUMNS):
+    """Factorizes the key columns of several DataFrames into shared int32 codes.
+
+    Args:
+        frames (list): The DataFrames to encode. Key columns missing from a DataFrame are
+            skipped.
+        columns (list, optional): The key columns. Defaults to KEY_COLUMNS.
+
+    Returns:
+        tuple: A dict mapping each key column to a pandas.Index of its unique values, and
+            a list with a dict of int32 code arrays per DataFrame.
+
+    """
+    keys = {}
+    codes = [{} for _ in frames]
+    for column in columns:
+        having = [i for i, df in enumerate(frames) if column in df]
+        values = pd.concat([frames[i][column] for i in having], ignore_index=True)
+        column_codes, keys[column] = pd.factorize(values)
+        bounds = np.cumsum([len(frames[i]) for i in having])[:-1]
+        for i, part in zip(having, np.split(column_codes, bounds)):
+            codes[i][column] = part.astype(np.int32)
+    return keys, codes
+
+
+def encode_keys(df, keys):
+    """Encodes the key columns of a DataFrame with existing key indexes.
+
+    Args:
+        df (pandas.DataFrame): The DataFrame to encode.
+        keys (dict): The key indexes returned by factorize_keys.
+
+    Returns:
+        dict: The int32 codes of each key column in df. Values that are not in the key
+            index are coded as -1.
+
+    """
+    return {
+        column: index.get_indexer(df[column]).astype(np.int32)
+        for column, index in keys.items()
+        if column in df
+    }
+
+
+def gather_join(left, right, on, keys, left_codes, right_codes):
+    """Inner joins two DataFrames on encoded key columns.
+
+    The right rows are grouped by the code of the first key column with a counting sort,
+    and every left row gathers its matches by position. The result holds the same rows
+    and columns as ``left.merge(right, on=on)``, ordered by left row and then by right
+    row, and a fresh RangeIndex.
+
+    Args:
+        left (pandas.DataFrame): The left DataFrame.
+        right (pandas.DataFrame): The right DataFrame.
+        on (str or list): The key column(s) to join on.
+        keys (dict): The key indexes returned by factorize_keys.
+        left_codes (dict): The key codes of left.
+        right_codes (dict): The key codes of right.
+
+    Returns:
+        tuple: The joined pandas.DataFrame and the dict of its key codes.
+
+    """
+    on = [on] if isinstance(on, str) else list(on)
+    first = on[0]
+    # Missing keys are coded as -1 and moved to a bucket that no left row looks up.
+    size = len(keys[first])
+    right_first = np.where(right_codes[first] >= 0, right_codes[first], size)
+    counts = np.bincount(right_first, minlength=size + 1)
+    starts = np.cumsum(counts) - counts
+    order = np.argsort(right_first, kind="stable")
+
+    left_first = left_codes[first]
+    matches = np.where(left_first >= 0, counts[np.maximum(left_first, 0)], 0)
+    rows = np.repeat(np.arange(len(left)), matches)
+    offsets = np.arange(len(rows)) - np.repeat(np.cumsum(matches) - matches, matches)
+    positions = order[starts[left_first[rows]] + offsets]
+
+    mask = np.ones(len(rows), dtype=bool)
+    for column in on[1:]:
+        left_column = left_codes[column][rows]
+        mask &= (left_column >= 0) & (left_column == right_codes[column][positions])
+    rows, positions = rows[mask], positions[mask]
+
+    left_part = left.take(rows).reset_index(drop=True)
+    right_part = right.drop(columns=on).take(positions).reset_index(drop=True)
+    overlap = left_part.columns.intersection(right_part.columns)
+    left_part = left_part.rename(columns={column: f"{column}_x" for column in overlap})
+    right_part = right_part.rename(
+        columns={column: f"{column}_y" for column in overlap},
+    )
+
+    codes = {column: values[rows] for column, values in left_codes.items()}
+    for column, values in right_codes.items():
+        codes.setdefault(column, values[positions])
+    return pd.concat([left_part, right_part], axis=1), codes
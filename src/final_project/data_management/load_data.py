@@ -0,0 +1,160 @@
+"""Functions for reading the SOEP datasets."""
+
+import functools
+import math
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+
+import pandas as pd
+
+from final_project.config import CACHE_MAX_BYTES, SURVEY_YEARS
+from final_project.data_management.cache import (
+    cache_entry,
+    evict,
+    read_cached,
+    read_feather,
+)
+from final_project.tracing import traced
+
+# Columns of each SOEP dataset that are used by the cleaning functions.
+SOEP_COLUMNS = {
+    "pgen": ["pid", "hid", "syear", "pgexpue", "pgfamstd", "pgemplst", "pgbilzeit"],
+    "pl": ["pid", "hid", "syear", "ple0008", "plj0587", "plj0588", "plj0589"],
+    "ppath": ["pid", "sex", "gebjahr"],
+    "hgen": ["hid", "syear", "hgi1hinc"],
+    "hbrutto": ["hid", "syear", "hhgr"],
+}
+
+
+@traced
+def read_soep_dataset(path, columns=None, years=None, chunksize=100_000, **kwargs):
+    """Reads a Stata file chunk by chunk, keeping only the requested columns and survey years.
+
+    Rows outside of ``years`` are dropped from every chunk before the chunks are
+    concatenated, so peak memory scales with the kept rows and columns and not with
+    the size of the file.
+
+    Args:
+        path (str or pathlib.Path): Path to the Stata file.
+        columns (list, optional): Columns to read. Defaults to None, which reads all
+            columns.
+        years (list, optional): Survey years to keep, using the 'syear' column.
+            Defaults to None, which keeps all years.
+        chunksize (int, optional): Number of rows read per chunk. Defaults to 100_000.
+        **kwargs: Further keyword arguments passed to ``pandas.read_stata``.
+
+    Returns:
+        pandas.DataFrame: The filtered dataset with a fresh RangeIndex.
+
+    Raises:
+        ValueError: If years are given but the 'syear' column is not read.
+
+    """
+    if years is not None and columns is not None and "syear" not in columns:
+        raise ValueError("Column 'syear' must be read to filter by survey year.")
+
+    chunks = []
+    with pd.read_stata(path, columns=columns, chunksize=chunksize, **kwargs) as reader:
+        for chunk in reader:
+            if years is not None:
+                syear = pd.to_numeric(chunk["syear"], errors="coerce")
+                chunk = chunk.loc[syear.isin(years)]
+            chunks.append(chunk)
+    return pd.concat(chunks, ignore_index=True)
+
+
+@traced
+def read_soep_datasets(
+    paths,
+    years=SURVEY_YEARS,
+    chunksize=100_000,
+    cache_dir=None,
+    max_bytes=CACHE_MAX_BYTES,
+    n_workers=1,
+    **kwargs,
+):
+    """Reads each SOEP dataset once, restricted to the columns used by the cleaning functions.
+
+    If a cache directory is given, every dataset is converted once into a Feather file
+    keyed by the content hash of the Stata file and the reader options, and later calls
+    load it from there through a memory map.
+
+    With more than one worker, the datasets are converted in parallel in a process
+    pool. The workers only return the paths of the Feather files they wrote, so the
+    frames are never pickled between processes.
+
+    Args:
+        paths (dict): Mapping from dataset name ('pgen', 'pl', 'ppath', 'hgen' or
+            'hbrutto') to the path of its Stata file.
+        years (list, optional): Survey years to keep for the panel datasets. Defaults
+            to ``SURVEY_YEARS``.
+        chunksize (int, optional): Number of rows read per chunk. Defaults to 100_000.
+        cache_dir (str or pathlib.Path, optional): Directory of the dataset cache.
+            Defaults to None, which reads the Stata files directly.
+        max_bytes (int, optional): Size limit of the cache. Defaults to
+            ``CACHE_MAX_BYTES``.
+        n_workers (int, optional): Number of worker processes. Defaults to 1, which
+            reads the datasets one after another in the current process.
+        **kwargs: Further keyword arguments passed to ``pandas.read_stata``.
+
+    Returns:
+        dict: Mapping from dataset name to the loaded pandas.DataFrame.
+
+    """
+    reader = functools.partial(read_soep_dataset, chunksize=chunksize)
+    options = {}
+    for name in paths:
+        columns = SOEP_COLUMNS[name]
+        options[name] = {
+            "columns": columns,
+            "years": years if "syear" in columns else None,
+            **kwargs,
+        }
+
+    if n_workers > 1:
+        return _read_parallel(paths, options, reader, cache_dir, max_bytes, n_workers)
+
+    datasets = {}
+    for name, path in paths.items():
+        if cache_dir is None:
+            datasets[name] = reader(path, **options[name])
+        else:
+            datasets[name] = read_cached(
+                path,
+                reader,
+                cache_dir,
+                max_bytes,
+                **options[name],
+            )
+    return datasets
+
+
+def _read_parallel(paths, options, reader, cache_dir, max_bytes, n_workers):
+    """Converts the datasets to Feather files in a process pool and loads them."""
+    with ExitStack() as stack:
+        memory_map = cache_dir is not None
+        if cache_dir is None:
+            cache_dir = stack.enter_context(tempfile.TemporaryDirectory())
+
+        with ProcessPoolExecutor(max_workers=min(n_workers, len(paths))) as executor:
+            # Workers must not evict each other's entries before they are loaded.
+            futures = {
+                name: executor.submit(
+                    cache_entry,
+                    path,
+                    reader,
+                    cache_dir,
+                    math.inf,
+                    **options[name],
+                )
+                for name, path in paths.items()
+            }
+            entries = {name: future.result() for name, future in futures.items()}
+
+        datasets = {
+            name: read_feather(entry, memory_map=memory_map)
+            for name, entry in entries.items()
+        }
+        evict(cache_dir, max_bytes, keep=list(entries.values()))
+    return datasets
@@ -0,0 +1,78 @@
+"""Index of the survey waves in a SOEP panel dataset."""
+
+import numpy as np
+import pandas as pd
+
+
+class PanelIndex:
+    """Rows of a panel dataset grouped by survey year.
+
+    The rows are reordered once so that every wave is a contiguous block, keeping the
+    original order within each wave. Selecting a wave is then a slice, which pandas
+    returns as a view without copying or scanning the full panel.
+
+    Args:
+        df (pandas.DataFrame): The panel dataset with a 'syear' column.
+
+    """
+
+    def __init__(self, df):
+        syear = pd.to_numeric(df["syear"], errors="coerce").to_numpy()
+        years, inverse = np.unique(syear, return_inverse=True)
+        # np.unique sorts NaN last, so rows without a valid year end up after all
+        # waves and are never selected.
+        codes = inverse.astype(np.min_scalar_type(len(years)))
+        order = np.argsort(codes, kind="stable")
+        self.df = df.take(order)
+        self.df["syear"] = syear[order]
+        bounds = np.searchsorted(codes[order], np.arange(len(years) + 1))
+        self._waves = {
+            int(year): (bounds[i], bounds[i + 1])
+            for i, year in enumerate(years)
+            if not np.isnan(year)
+        }
+
+    @property
+    def years(self):
+        """list: The survey years contained in the panel."""
+        return list(self._waves)
+
+    def wave(self, year, columns=None):
+        """Returns the rows of a survey year as a view on the reordered panel.
+
+        The returned DataFrame shares memory with the index and must not be modified in
+        place.
+
+        Args:
+            year (int): The survey year.
+            columns (list, optional): Columns to select. Defaults to None, which selects
+                all columns.
+
+        Returns:
+            pandas.DataFrame: The rows of the wave, with their original index labels.
+
+        """
+        start, stop = self._waves.get(year, (0, 0))
+        wave = self.df.iloc[start:stop]
+        return wave if columns is None else wave[columns]
+
+    @property
+    def shape(self):
+        """tuple: The number of rows and columns of the panel."""
+        return self.df.shape
+
+    def __len__(self):
+        return len(self.df)
+
+
+def panel_index(df):
+    """Returns a PanelIndex of df, or df itself if it already is one.
+
+    Args:
+        df (pandas.DataFrame or PanelIndex): The panel dataset.
+
+    Returns:
+        PanelIndex: The index of the survey waves.
+
+    """
+    return df if isinstance(df, PanelIndex) else PanelIndex(df)
@@ -0,0 +1,80 @@
+"""Compact data types of the cleaned dataset."""
+
+import numpy as np
+import pandas as pd
+
+# Data types of the columns of the dataset returned by data_clean.
+CLEAN_DATA_SCHEMA = {
+    "pid": "int32",
+    "went_unemployed": "int8",
+    "hid": "int32",
+    "age": "float32",
+    "sex": "int8",
+    "marital_status": "int8",
+    "education": "float32",
+    "aggregate_loneliness_2013": "float32",
+    "aggregate_loneliness_2017": "float32",
+    "health_2013": "float32",
+    "hh_income": "float32",
+    "hh_members": "float32",
+}
+
+
+def compact_dtypes(df, schema=CLEAN_DATA_SCHEMA, rtol=1e-6):
+    """Converts the columns of a DataFrame to the data types of a schema and reports the memory saved.
+
+    Integer columns must be converted exactly, and float columns must keep their values up to the relative tolerance rtol,
+    so that no information is lost silently. Columns that are not in the schema are left unchanged.
+
+    Args:
+        df (pandas.DataFrame): The DataFrame to convert.
+        schema (dict, optional): The data type of each column. Defaults to CLEAN_DATA_SCHEMA.
+        rtol (float, optional): The relative tolerance of float conversions. Defaults to 1e-6.
+
+    Returns:
+        tuple: The converted pandas.DataFrame, and a pandas.DataFrame indexed by column with the data types and memory
+            use in bytes before and after the conversion.
+
+    Raises:
+        ValueError: If a column cannot be converted without losing values.
+
+    """
+    before = df.memory_usage(index=False, deep=True)
+    columns = {}
+    for column in df.columns:
+        series = df[column]
+        dtype = np.dtype(schema.get(column, series.dtype))
+        if dtype != series.dtype:
+            series = _convert(series, dtype, rtol)
+        columns[column] = series
+    compact = pd.DataFrame(columns, index=df.index, copy=False)
+    after = compact.memory_usage(index=False, deep=True)
+    report = pd.DataFrame(
+        {
+            "dtype_before": df.dtypes.astype(str),
+            "dtype_after": compact.dtypes.astype(str),
+            "bytes_before": before,
+            "bytes_after": after,
+        },
+    ).rename_axis("column")
+    return compact, report
+
+
+def _convert(series, dtype, rtol):
+    """Converts a Series to dtype, raising a ValueError if values are lost."""
+    values = series.to_numpy()
+    if dtype.kind in "iu":
+        if series.isna().any():
+            raise ValueError(f"Column '{series.name}' has missing values.")
+        info = np.iinfo(dtype)
+        if len(values) and (values.min() < info.min or values.max() > info.max):
+            raise ValueError(f"Column '{series.name}' does not fit into {dtype}.")
+        converted = values.astype(dtype)
+        if not np.array_equal(converted, values):
+            raise ValueError(f"Column '{series.name}' has non-integer values.")
+    else:
+        with np.errstate(over="ignore"):
+            converted = values.astype(dtype)
+        if not np.allclose(converted, values, rtol=rtol, atol=0, equal_nan=True):
+            raise ValueError(f"Column '{series.name}' loses precision as {dtype}.")
+    return pd.Series(converted, index=series.index, name=series.name)
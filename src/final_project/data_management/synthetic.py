@@ -0,0 +1,275 @@
+"""Synthetic SOEP panel datasets for tests and benchmarks."""
+
+import numpy as np
+import pandas as pd
+
+from final_project.data_management.clean_data import (
+    UNCONSIDERABLE,
+    label_code,
+    mapping1,
+    mapping2,
+)
+
+# Survey years of the synthetic panel.
+SYNTHETIC_YEARS = [2013, 2014, 2015, 2016, 2017]
+
+# Value labels of the categorical columns, as read by pandas.read_stata.
+SYNTHETIC_LABELS = {
+    "pgfamstd": [
+        "[1] Verheiratet, mit Ehepartner zusammenlebend",
+        "[2] Verheiratet, dauernd getrennt lebend",
+        "[3] Ledig",
+        "[4] Geschieden",
+        "[5] Verwitwet",
+    ],
+    "pgemplst": [
+        "[1] Voll erwerbstätig",
+        "[2] Teilzeitbeschäftigung",
+        "[3] Ausbildung, Lehre",
+        "[4] Geringfügig beschäftigt",
+        "[5] Nicht erwerbstätig",
+    ],
+    "sex": ["[1] maennlich", "[2] weiblich"],
+    "ple0008": list(mapping2),
+    "plj0587": list(mapping1),
+    "plj0588": list(mapping1),
+    "plj0589": list(mapping1),
+}
+
+# Invalid response codes that each column may hold.
+SYNTHETIC_INVALID_CODES = {
+    "pgexpue": [-1, -2],
+    "pgfamstd": [-1],
+    "pgemplst": [-1],
+    "pgbilzeit": [-1, -2],
+    "ple0008": [-1, -4, -5],
+    "plj0587": [-1, -4, -5],
+    "plj0588": [-1, -4, -5],
+    "plj0589": [-1, -4, -5],
+    "hgi1hinc": [-1, -3],
+    "hhgr": [-1],
+}
+
+# Survey years in which the loneliness questions were asked. In all other years they
+# hold the code -8, "Frage in diesem Jahr nicht Teil des Frageprogramms".
+LONELINESS_YEARS = [2013, 2017]
+
+_INVALID_LABELS = {label_code(label): label for label in UNCONSIDERABLE}
+
+
+def synthetic_soep(
+    n_persons,
+    seed=0,
+    years=SYNTHETIC_YEARS,
+    codes=False,
+    invalid_rate=0.02,
+    chunksize=1_000_000,
+):
+    """Generates the pgen, pl, ppath, hgen and hbrutto datasets of a synthetic SOEP panel.
+
+    The datasets have the columns of SOEP_COLUMNS and the structure of the SOEP: persons live in households of one
+    to five members and their Personal ID is the Household ID times 100 plus their member number. Persons enter the
+    panel in a later wave or drop out with some probability, and some move into a new household of their own. The
+    unemployment experience grows by unemployment spells between the waves, and the loneliness questions are only
+    asked in LONELINESS_YEARS. A share of invalid_rate of the responses holds one of the invalid response codes of
+    SYNTHETIC_INVALID_CODES.
+
+    With codes=False, the categorical columns are pandas Categoricals of the German value labels, and the numeric
+    columns are object columns that hold the value label of invalid responses, as read by pandas.read_stata with
+    convert_categoricals=True. With codes=True, all columns hold the value codes, as read with
+    convert_categoricals=False. Both modes hold the same responses for the same seed.
+
+    The households are generated in chunks of about chunksize persons, each from its own random stream, so the memory
+    used besides the returned datasets is bounded. The datasets depend on seed and chunksize only.
+
+    Args:
+        n_persons (int): The number of persons, e.g. 10_000 to 10_000_000.
+        seed (int, optional): The seed of the random number generator. Defaults to 0.
+        years (list, optional): The survey years. Defaults to SYNTHETIC_YEARS.
+        codes (bool, optional): Whether to return value codes instead of value labels. Defaults to False.
+        invalid_rate (float, optional): The share of invalid responses. Defaults to 0.02.
+        chunksize (int, optional): The number of persons generated at a time. Defaults to 1_000_000.
+
+    Returns:
+        dict: The datasets 'pgen', 'pl', 'ppath', 'hgen' and 'hbrutto' as pandas.DataFrame.
+
+    """
+    rng = np.random.default_rng(seed)
+    sizes = _household_sizes(rng, n_persons)
+    bounds = np.searchsorted(
+        np.cumsum(sizes),
+        np.arange(chunksize, n_persons, chunksize),
+    )
+    bounds = np.unique(np.concatenate([[0], bounds + 1, [len(sizes)]]))
+    streams = np.random.SeedSequence(seed).spawn(len(bounds) - 1)
+    first_hid = 1
+    chunks = []
+    for start, stop, stream in zip(bounds[:-1], bounds[1:], streams):
+        chunks.append(
+            _synthetic_chunk(
+                np.random.default_rng(stream),
+                sizes[start:stop],
+                first_hid=first_hid,
+                first_mover_hid=len(sizes) + 1 + int(sizes[:start].sum()),
+                years=list(years),
+                invalid_rate=invalid_rate,
+            ),
+        )
+        first_hid += stop - start
+    datasets = {
+        name: pd.concat([chunk[name] for chunk in chunks], ignore_index=True)
+        for name in ["pgen", "pl", "ppath", "hgen", "hbrutto"]
+    }
+    return {name: _to_labels(df, codes) for name, df in datasets.items()}
+
+
+def _household_sizes(rng, n_persons):
+    """Draws household sizes of one to five members that add up to n_persons."""
+    sizes = rng.choice(5, size=n_persons // 2 + 5, p=[0.4, 0.33, 0.13, 0.1, 0.04]) + 1
+    while sizes.sum() < n_persons:
+        sizes = np.concatenate([sizes, rng.choice(5, size=n_persons // 10 + 5) + 1])
+    cumulative = np.cumsum(sizes)
+    n_households = np.searchsorted(cumulative, n_persons) + 1
+    sizes = sizes[:n_households]
+    sizes[-1] -= cumulative[n_households - 1] - n_persons
+    return sizes
+
+
+def _synthetic_chunk(rng, sizes, first_hid, first_mover_hid, years, invalid_rate):
+    """Generates the datasets of the persons of some households as value codes."""
+    n, n_waves = int(sizes.sum()), len(years)
+    hid = np.repeat(np.arange(first_hid, first_hid + len(sizes)), sizes)
+    member = np.arange(n) - np.repeat(np.cumsum(sizes) - sizes, sizes) + 1
+    pid = hid * 100 + member
+
+    # Panel participation: entry in a later wave, attrition, and moves into a new household.
+    wave = np.arange(n_waves)
+    entry = rng.choice(n_waves, size=n, p=_entry_probabilities(n_waves))
+    exit_ = entry + rng.geometric(0.08, size=n)
+    present = (wave >= entry[:, None]) & (wave < exit_[:, None])
+    moves = rng.random(n) < 0.05
+    move_wave = np.where(moves, rng.integers(1, max(n_waves, 2), size=n), n_waves)
+    mover_hid = first_mover_hid + np.arange(n)
+    hids = np.where(wave >= move_wave[:, None], mover_hid[:, None], hid[:, None])
+
+    # Person characteristics.
+    sex = rng.choice([1, 2], size=n)
+    gebjahr = rng.integers(1935, 2000, size=n)
+    pgbilzeit = rng.choice(np.arange(7.0, 18.5, 0.5), size=n)
+    pgfamstd = rng.choice(5, size=n, p=[0.5, 0.03, 0.32, 0.1, 0.05]) + 1
+
+    # Unemployment experience in years, grown by spells of unemployment between the waves.
+    spells = rng.random((n, n_waves)) < 0.07
+    spells[:, 0] = False
+    durations = np.where(spells, rng.integers(1, 25, size=(n, n_waves)) / 10, 0.0)
+    start = np.round(rng.exponential(1.0, size=n) * (rng.random(n) < 0.4), 1)
+    pgexpue = np.round(start[:, None] + np.cumsum(durations, axis=1), 1)
+    pgemplst = rng.choice(5, size=(n, n_waves), p=[0.45, 0.15, 0.05, 0.07, 0.28]) + 1
+    pgemplst[spells & (rng.random((n, n_waves)) < 0.7)] = 5
+
+    # Responses of the individual questionnaire on a scale from 1 to 5. Loneliness rises with unemployment.
+    health = np.clip(
+        rng.integers(1, 6, size=n)[:, None] + rng.integers(-1, 2, size=(n, n_waves)),
+        1,
+        5,
+    )
+    lonely = rng.normal(3.5, 0.8, size=n)[:, None] - 0.3 * (pgexpue - pgexpue[:, :1])
+    items = [
+        np.clip(np.round(lonely + rng.normal(0, 0.7, size=(n, n_waves))), 1, 5).astype(
+            np.int64,
+        )
+        for _ in range(3)
+    ]
+
+    rows, columns = np.nonzero(present)
+    syear = np.asarray(years, dtype=np.int16)[columns]
+    not_asked = ~np.isin(syear, LONELINESS_YEARS)
+    pgen = {
+        "pid": pid[rows],
+        "hid": hids[rows, columns],
+        "syear": syear,
+        "pgexpue": pgexpue[rows, columns],
+        "pgfamstd": pgfamstd[rows],
+        "pgemplst": pgemplst[rows, columns],
+        "pgbilzeit": pgbilzeit[rows],
+    }
+    pl = {
+        "pid": pid[rows],
+        "hid": hids[rows, columns],
+        "syear": syear,
+        "ple0008": health[rows, columns],
+        **{
+            column: np.where(not_asked, -8, item[rows, columns])
+            for column, item in zip(["plj0587", "plj0588", "plj0589"], items)
+        },
+    }
+    ppath = {"pid": pid, "sex": sex, "gebjahr": gebjahr}
+
+    # Households of each wave, with their number of members and monthly net income.
+    keys, hhgr = np.unique(hids[rows, columns] * n_waves + columns, return_counts=True)
+    income = np.round(
+        rng.lognormal(7.9, 0.5, size=len(keys)) * np.sqrt(hhgr),
+        -1,
+    ).astype(np.int64)
+    households = {
+        "hid": keys // n_waves,
+        "syear": np.asarray(years, dtype=np.int16)[keys % n_waves],
+    }
+    hgen = {**households, "hgi1hinc": income}
+    hbrutto = {**households, "hhgr": hhgr}
+
+    datasets = {}
+    for name, data in [
+        ("pgen", pgen),
+        ("pl", pl),
+        ("ppath", ppath),
+        ("hgen", hgen),
+        ("hbrutto", hbrutto),
+    ]:
+        for column, invalid in SYNTHETIC_INVALID_CODES.items():
+            if column in data:
+                data[column] = _with_invalid_codes(
+                    rng,
+                    data[column],
+                    invalid,
+                    invalid_rate,
+                )
+        datasets[name] = pd.DataFrame(data)
+    return datasets
+
+
+def _entry_probabilities(n_waves):
+    """Returns the probabilities of entering the panel in each wave, most persons entering in the first wave."""
+    weights = np.concatenate([[7.0], np.ones(n_waves - 1)])
+    return weights / weights.sum()
+
+
+def _with_invalid_codes(rng, values, invalid, rate):
+    """Replaces a share of rate of the valid values with one of the invalid codes."""
+    mask = (rng.random(len(values)) < rate) & (values >= 0)
+    values = values.astype(
+        np.float64 if np.issubdtype(values.dtype, np.floating) else np.int64,
+    )
+    values[mask] = rng.choice(invalid, size=int(mask.sum()))
+    return values
+
+
+def _to_labels(df, codes):
+    """Converts a dataset of value codes to the dtypes of pandas.read_stata, with value labels if codes is False."""
+    for column in df.columns:
+        values = df[column].to_numpy()
+        if column in SYNTHETIC_LABELS:
+            labels = SYNTHETIC_LABELS[column]
+            if codes:
+                df[column] = values.astype(np.int8)
+                continue
+            categories = [*labels, *_INVALID_LABELS.values()]
+            lookup = {label_code(label): i for i, label in enumerate(categories)}
+            positions = pd.Series(values).map(lookup).to_numpy()
+            df[column] = pd.Categorical.from_codes(positions, categories=categories)
+        elif column in SYNTHETIC_INVALID_CODES and not codes:
+            invalid = values < 0
+            labelled = values.astype(object)
+            labelled[invalid] = [_INVALID_LABELS[code] for code in values[invalid]]
+            df[column] = labelled
+    return df
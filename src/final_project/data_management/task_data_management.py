@@ -1,10 +1,12 @@
 """Tasks for managing the data."""
 
-import pandas as pd
 import pytask
 
-from final_project.config import BLD, SRC
+from final_project.config import BLD, CACHE_DIR, N_WORKERS, SRC
 from final_project.data_management.clean_data import data_clean
+from final_project.data_management.load_data import read_soep_datasets
+from final_project.data_management.schema import CLEAN_DATA_SCHEMA, compact_dtypes
+from final_project.utilities import artifact_products, write_artifact
 
 
 @pytask.mark.depends_on(
@@ -16,14 +18,36 @@ from final_project.data_management.clean_data import data_clean
         "data5": SRC / "data" / "hbrutto.dta",
     },
 )
-@pytask.mark.produces(BLD / "python" / "data" / "data_clean.csv")
+@pytask.mark.produces(
+    {
+        **artifact_products(BLD / "python" / "data" / "data_clean.feather"),
+        "memory": BLD / "python" / "data" / "data_clean_memory.csv",
+    },
+)
 def task_clean_data_python(depends_on, produces):
     """Clean the data (Python version)."""
-    pgen_treat_df = pd.read_stata(depends_on["data1"])
-    ppath_df = pd.read_stata(depends_on["data3"])
-    pl_df = pd.read_stata(depends_on["data2"])
-    pgen_cov_df = pd.read_stata(depends_on["data1"])
-    hgen_df = pd.read_stata(depends_on["data4"])
-    hbrutto_df = pd.read_stata(depends_on["data5"])
-    data = data_clean(pgen_treat_df, pgen_cov_df, ppath_df, pl_df, hgen_df, hbrutto_df)
-    data.to_csv(produces, index=False)
+    datasets = read_soep_datasets(
+        {
+            "pgen": depends_on["data1"],
+            "pl": depends_on["data2"],
+            "ppath": depends_on["data3"],
+            "hgen": depends_on["data4"],
+            "hbrutto": depends_on["data5"],
+        },
+        cache_dir=CACHE_DIR,
+        n_workers=N_WORKERS,
+        convert_categoricals=False,
+    )
+    data = data_clean(
+        pgen_treat_df=datasets["pgen"],
+        pgen_cov_df=datasets["pgen"],
+        ppath_df=datasets["ppath"],
+        pl_df=datasets["pl"],
+        hgen_df=datasets["hgen"],
+        hbrutto_df=datasets["hbrutto"],
+        codes=True,
+        lazy=True,
+    )
+    data, memory = compact_dtypes(data, CLEAN_DATA_SCHEMA)
+    write_artifact(data, produces["data"], produces.get("csv"))
+    memory.to_csv(produces["memory"])
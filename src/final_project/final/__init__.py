@@ -1,24 +1,40 @@
-# """Functions for formatting results."""
-from final_project.final.plot import (
-    effect_size_table,
-    plot_effect_size,
-    plot_loneliness_by_gender_and_employment,
-    plot_loneliness_by_health,
-    plot_loneliness_by_hh_income,
-    plot_loneliness_by_hh_size,
-    plot_loneliness_by_marital_status_unemployment,
-    plot_loneliness_by_unemployment,
-    plot_match,
-)
-
-__all__ = [
-    effect_size_table,
-    plot_effect_size,
-    plot_loneliness_by_gender_and_employment,
-    plot_loneliness_by_health,
-    plot_loneliness_by_hh_income,
-    plot_loneliness_by_hh_size,
-    plot_loneliness_by_marital_status_unemployment,
-    plot_loneliness_by_unemployment,
-    plot_match,
-]
+"""Functions for formatting results.
+
+The functions are imported from their modules on first access, so that importing the
+package does not load matplotlib.
+
+"""
+import importlib
+
+_EXPORTS = {
+    "final_project.final.plot": [
+        "effect_size_table",
+        "plot_effect_size",
+        "plot_loneliness_by_gender_and_employment",
+        "plot_loneliness_by_health",
+        "plot_loneliness_by_hh_income",
+        "plot_loneliness_by_hh_size",
+        "plot_loneliness_by_marital_status_unemployment",
+        "plot_loneliness_by_unemployment",
+        "plot_match",
+        "plot_threshold_sweep",
+    ],
+    "final_project.final.render": ["render_figure", "render_figures"],
+    "final_project.final.summary": ["cube_means", "summary_cube"],
+}
+_MODULES = {name: module for module, names in _EXPORTS.items() for name in names}
+
+__all__ = list(_MODULES)
+
+
+def __getattr__(name):
+    if name not in _MODULES:
+        msg = f"module {__name__!r} has no attribute {name!r}"
+        raise AttributeError(msg)
+    value = getattr(importlib.import_module(_MODULES[name]), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted([*globals(), *__all__])
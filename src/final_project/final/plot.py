@@ -1,17 +1,79 @@
 """Functions plotting results."""
 
-import matplotlib.pyplot as plt
-from psmpy.plotting import *
+import numpy as np
+import pandas as pd
 
+from final_project.analysis.matching import compute_effect_size
+from final_project.final.summary import cube_means
 
-def plot_match(psm, title, ylabel, xlabel, names):
-    """Plots the match between treatment and control groups for all teh covariates to see the matching quality."""
-    psm.plot_match(Title=title, Ylabel=ylabel, Xlabel=xlabel, names=names)
 
+def _figure(**kwargs):
+    """Creates a figure that is not managed by pyplot, importing matplotlib on first use."""
+    from matplotlib.figure import Figure
 
-def plot_effect_size(psm):
-    """Plots the effect size of covariates that is the standardized difference in means of the covariates between the treatment and control groups, before and after matching has been performed."""
-    return psm.effect_size_plot()
+    return Figure(**kwargs)
+
+
+def plot_match(
+    psm,
+    title,
+    ylabel,
+    xlabel,
+    names,
+    matched_entity="propensity_logit",
+    colors=("#E69F00", "#56B4E9"),
+):
+    """Plots the match between treatment and control groups for all teh covariates to see the matching quality.
+
+    The histogram is the one of ``PsmPy.plot_match``, drawn on a new figure instead of the current pyplot figure.
+
+    """
+    import seaborn as sns
+
+    treated = psm.df_matched[psm.df_matched[psm.treatment] == 1]
+    control = psm.df_matched[psm.df_matched[psm.treatment] == 0]
+
+    fig = _figure()
+    with sns.axes_style("white"):
+        ax = fig.subplots()
+    ax.hist(
+        [treated[matched_entity], control[matched_entity]],
+        color=list(colors),
+        label=list(names),
+    )
+    ax.legend()
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+    ax.set_title(title)
+    return fig
+
+
+def plot_effect_size(
+    psm,
+    title="Standardized Mean differences accross covariates before and after matching",
+    colors=("#FCB754", "#3EC8FB"),
+):
+    """Plots the effect size of covariates that is the standardized difference in means of the covariates between the treatment and control groups, before and after matching has been performed.
+
+    The bar plot is the one of ``PsmPy.effect_size_plot``, drawn on a new figure instead of the current pyplot figure.
+
+    """
+    import seaborn as sns
+
+    fig = _figure()
+    with sns.axes_style("white"):
+        ax = fig.subplots()
+    sns.barplot(
+        data=compute_effect_size(psm),
+        y="Variable",
+        x="Effect Size",
+        hue="matching",
+        palette=list(colors),
+        orient="h",
+        ax=ax,
+    )
+    ax.set(title=title)
+    return fig
 
 
 def effect_size_table(psm):
@@ -19,13 +81,13 @@ def effect_size_table(psm):
     return psm.effect_size
 
 
-def plot_loneliness_by_unemployment(data):
+def plot_loneliness_by_unemployment(cube):
     """Plot the mean loneliness levels for 2013 and 2017 for those who went unemployed and those who stayed employed during the same period.
 
     Parameters:
     -----------
-    data : pandas.DataFrame
-        A DataFrame containing the columns "went_unemployed", "aggregate_loneliness_2013", and "aggregate_loneliness_2017".
+    cube : pandas.DataFrame
+        The summary cube of the cleaned dataset returned by summary_cube.
 
     Returns:
     --------
@@ -33,17 +95,13 @@ def plot_loneliness_by_unemployment(data):
         The Figure object that contains the plot.
 
     """
-    unemployed_means = [
-        data[data["went_unemployed"] == 1]["aggregate_loneliness_2013"].mean(),
-        data[data["went_unemployed"] == 1]["aggregate_loneliness_2017"].mean(),
-    ]
-    not_unemployed_means = [
-        data[data["went_unemployed"] == 0]["aggregate_loneliness_2013"].mean(),
-        data[data["went_unemployed"] == 0]["aggregate_loneliness_2017"].mean(),
-    ]
+    means = cube_means(cube, ["went_unemployed"]).reindex([0, 1])
+    unemployed_means = means.loc[1].tolist()
+    not_unemployed_means = means.loc[0].tolist()
 
     x = [2013, 2017]
-    fig, ax = plt.subplots()
+    fig = _figure()
+    ax = fig.subplots()
 
     (line1,) = ax.plot(x, unemployed_means, label="Went Unemployed", marker="o")
     (line2,) = ax.plot(x, not_unemployed_means, label="Stayed employed", marker="o")
@@ -57,62 +115,31 @@ def plot_loneliness_by_unemployment(data):
     return fig
 
 
-def plot_loneliness_by_gender_and_employment(data):
-    """The function takes a pandas DataFrame data as input and creates a bar chart that shows the mean level of loneliness in 2013 and 2017 for four groups: men who went unemployed, men who stayed
+def plot_loneliness_by_gender_and_employment(cube):
+    """The function takes the summary cube of the cleaned dataset as input and creates a bar chart that shows the mean level of loneliness in 2013 and 2017 for four groups: men who went unemployed, men who stayed
     employed, women who went unemployed, and women who stayed employed.
 
     The function returns the created figure.
 
     """
+    means = cube_means(cube, ["sex", "went_unemployed"]).reindex(
+        pd.MultiIndex.from_product([[0, 1], [0, 1]]),
+    )
+
     # Data for men
-    men_unemployed_means = [
-        data.loc[
-            (data["went_unemployed"] == 1) & (data["sex"] == 1),
-            "aggregate_loneliness_2013",
-        ].mean(),
-        data.loc[
-            (data["went_unemployed"] == 1) & (data["sex"] == 1),
-            "aggregate_loneliness_2017",
-        ].mean(),
-    ]
-    men_not_unemployed_means = [
-        data.loc[
-            (data["went_unemployed"] == 0) & (data["sex"] == 1),
-            "aggregate_loneliness_2013",
-        ].mean(),
-        data.loc[
-            (data["went_unemployed"] == 0) & (data["sex"] == 1),
-            "aggregate_loneliness_2017",
-        ].mean(),
-    ]
+    men_unemployed_means = means.loc[(1, 1)].tolist()
+    men_not_unemployed_means = means.loc[(1, 0)].tolist()
 
     # Data for women
-    women_unemployed_means = [
-        data.loc[
-            (data["went_unemployed"] == 1) & (data["sex"] == 0),
-            "aggregate_loneliness_2013",
-        ].mean(),
-        data.loc[
-            (data["went_unemployed"] == 1) & (data["sex"] == 0),
-            "aggregate_loneliness_2017",
-        ].mean(),
-    ]
-    women_not_unemployed_means = [
-        data.loc[
-            (data["went_unemployed"] == 0) & (data["sex"] == 0),
-            "aggregate_loneliness_2013",
-        ].mean(),
-        data.loc[
-            (data["went_unemployed"] == 0) & (data["sex"] == 0),
-            "aggregate_loneliness_2017",
-        ].mean(),
-    ]
+    women_unemployed_means = means.loc[(0, 1)].tolist()
+    women_not_unemployed_means = means.loc[(0, 0)].tolist()
 
     labels = ["2013", "2017"]
     x = np.arange(len(labels))
     width = 0.35
 
-    fig, ax = plt.subplots(figsize=(15, 8))
+    fig = _figure(figsize=(15, 8))
+    ax = fig.subplots()
     ax.bar(
         x - width / 2,
         men_unemployed_means,
@@ -148,42 +175,17 @@ def plot_loneliness_by_gender_and_employment(data):
     return fig
 
 
-def plot_loneliness_by_marital_status_unemployment(data):
-    """This function takes in a pandas DataFrame data and plots the mean loneliness scores for people who went unemployed, grouped by their marital status."""
-    married_unemployed_means = [
-        data.loc[
-            (data["went_unemployed"] == 1)
-            & (data["marital_status"] == 1)
-            & (data["aggregate_loneliness_2013"].notnull()),
-            "aggregate_loneliness_2013",
-        ].mean(),
-        data.loc[
-            (data["went_unemployed"] == 1)
-            & (data["marital_status"] == 1)
-            & (data["aggregate_loneliness_2017"].notnull()),
-            "aggregate_loneliness_2017",
-        ].mean(),
-    ]
-
-    unmarried_unemployed_means = [
-        data.loc[
-            (data["went_unemployed"] == 1)
-            & (data["marital_status"] == 0)
-            & (data["aggregate_loneliness_2013"].notnull()),
-            "aggregate_loneliness_2013",
-        ].mean(),
-        data.loc[
-            (data["went_unemployed"] == 1)
-            & (data["marital_status"] == 0)
-            & (data["aggregate_loneliness_2017"].notnull()),
-            "aggregate_loneliness_2017",
-        ].mean(),
-    ]
+def plot_loneliness_by_marital_status_unemployment(cube):
+    """This function takes in the summary cube of the cleaned dataset and plots the mean loneliness scores for people who went unemployed, grouped by their marital status."""
+    means = cube_means(cube, ["marital_status"], went_unemployed=1).reindex([0, 1])
+    married_unemployed_means = means.loc[1].tolist()
+    unmarried_unemployed_means = means.loc[0].tolist()
 
     labels = ["2013", "2017"]
     x = np.arange(len(labels))
 
-    fig, ax = plt.subplots()
+    fig = _figure()
+    ax = fig.subplots()
 
     ax.plot(x, married_unemployed_means, "-o", label="Married: Went Unemployed")
     ax.plot(x, unmarried_unemployed_means, "-o", label="Unmarried: Went Unemployed")
@@ -193,33 +195,24 @@ def plot_loneliness_by_marital_status_unemployment(data):
     ax.set_xticklabels(labels)
     ax.legend()
 
-    plt.title("Loneliness by marital status and unemployment status")
+    ax.set_title("Loneliness by marital status and unemployment status")
 
     return fig
 
 
-def plot_loneliness_by_hh_size(data):
-    """This function takes a pandas DataFrame as input and creates a line plot of the difference between aggregate loneliness levels in 2013 and 2017 for individuals in households with more than two
+def plot_loneliness_by_hh_size(cube):
+    """This function takes the summary cube of the cleaned dataset as input and creates a line plot of the difference between aggregate loneliness levels in 2013 and 2017 for individuals in households with more than two
     members (hh_members > 2) versus those in smaller households.
 
     The function returns the resulting matplotlib figure object.
 
     """
-    data["hh_large"] = (data["hh_members"] > 2).astype(int)
-
-    hh_large_data = data.loc[
-        data["hh_large"] == 1,
-        ["aggregate_loneliness_2013", "aggregate_loneliness_2017"],
-    ]
-    hh_small_data = data.loc[
-        data["hh_large"] == 0,
-        ["aggregate_loneliness_2013", "aggregate_loneliness_2017"],
-    ]
+    means = cube_means(cube, ["hh_large"]).reindex([0, 1])
+    hh_large_means = means.loc[1]
+    hh_small_means = means.loc[0]
 
-    hh_large_means = hh_large_data.mean()
-    hh_small_means = hh_small_data.mean()
-
-    fig, ax = plt.subplots()
+    fig = _figure()
+    ax = fig.subplots()
     ax.plot(hh_large_means.index, hh_large_means.values, label="Household size > 2")
     ax.plot(hh_small_means.index, hh_small_means.values, label="Household size <= 2")
 
@@ -231,27 +224,18 @@ def plot_loneliness_by_hh_size(data):
     return fig
 
 
-def plot_loneliness_by_hh_income(data):
-    """This function takes a pandas DataFrame as input and creates a line plot of the difference between aggregate loneliness levels in 2013 and 2017 for individuals in household income>3500 (average)
+def plot_loneliness_by_hh_income(cube):
+    """This function takes the summary cube of the cleaned dataset as input and creates a line plot of the difference between aggregate loneliness levels in 2013 and 2017 for individuals in household income>3500 (average)
     and those with lesser than 3500.
 
     The function returns the resulting matplotlib figure object.
 
     """
-    data["hh_high_income"] = (data["hh_income"] > 3500).astype(int)
-
-    hh_high_income_data = data.loc[
-        data["hh_high_income"] == 1,
-        ["aggregate_loneliness_2013", "aggregate_loneliness_2017"],
-    ]
-    hh_low_income_data = data.loc[
-        data["hh_high_income"] == 0,
-        ["aggregate_loneliness_2013", "aggregate_loneliness_2017"],
-    ]
-
-    hh_high_income_means = hh_high_income_data.mean()
-    hh_low_income_means = hh_low_income_data.mean()
-    fig, ax = plt.subplots()
+    means = cube_means(cube, ["hh_high_income"]).reindex([0, 1])
+    hh_high_income_means = means.loc[1]
+    hh_low_income_means = means.loc[0]
+    fig = _figure()
+    ax = fig.subplots()
     ax.plot(
         hh_high_income_means.index,
         hh_high_income_means.values,
@@ -271,22 +255,14 @@ def plot_loneliness_by_hh_income(data):
     return fig
 
 
-def plot_loneliness_by_health(data):
-    """Plots a line graph showing the difference in aggregate loneliness levels between people having higher than average health and those with lower than average health in 2013 and 2017."""
-    data["above_avg_health"] = (data["health_2013"] > 2).astype(int)
-
-    above_avg_health_data = data.loc[
-        data["above_avg_health"] == 1,
-        ["aggregate_loneliness_2013", "aggregate_loneliness_2017"],
-    ]
-    below_avg_health_data = data.loc[
-        data["above_avg_health"] == 0,
-        ["aggregate_loneliness_2013", "aggregate_loneliness_2017"],
-    ]
-    above_avg_health_means = above_avg_health_data.mean()
-    below_avg_health_means = below_avg_health_data.mean()
+def plot_loneliness_by_health(cube):
+    """Plots a line graph from the summary cube of the cleaned dataset showing the difference in aggregate loneliness levels between people having higher than average health and those with lower than average health in 2013 and 2017."""
+    means = cube_means(cube, ["above_avg_health"]).reindex([0, 1])
+    above_avg_health_means = means.loc[1]
+    below_avg_health_means = means.loc[0]
 
-    fig, ax = plt.subplots()
+    fig = _figure()
+    ax = fig.subplots()
     ax.plot(
         above_avg_health_means.index,
         above_avg_health_means.values,
@@ -304,3 +280,45 @@ def plot_loneliness_by_health(data):
     ax.legend()
 
     return fig
+
+
+def plot_threshold_sweep(sweep, moderator):
+    """Plot the treatment effect below and above each threshold of a moderator, with 95% confidence bands.
+
+    Parameters:
+    -----------
+    sweep : pandas.DataFrame
+        The threshold sweep returned by threshold_sweep.
+    moderator : str
+        The name of the moderator, used as the label of the x-axis.
+
+    Returns:
+    --------
+    fig : matplotlib.figure.Figure
+        The Figure object that contains the plot.
+
+    """
+    fig = _figure(figsize=(10, 6))
+    ax = fig.subplots()
+    for side, label in [
+        ("below", f"{moderator} < threshold"),
+        ("above", f"{moderator} >= threshold"),
+    ]:
+        curve = sweep[sweep["Side"] == side]
+        (line,) = ax.plot(curve["Threshold"], curve["Treatment Effect"], label=label)
+        ax.fill_between(
+            curve["Threshold"],
+            curve["Treatment Effect"] - 1.96 * curve["Standard Error"],
+            curve["Treatment Effect"] + 1.96 * curve["Standard Error"],
+            color=line.get_color(),
+            alpha=0.2,
+        )
+
+    ax.axhline(0, color="black", linewidth=0.8)
+    ax.set_xlabel(f"Threshold of {moderator}")
+    ax.set_ylabel("Treatment Effect")
+    ax.set_title(f"Treatment effect below and above thresholds of {moderator}")
+    ax.legend()
+
+    ax.grid()
+    return fig
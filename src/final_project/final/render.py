@@ -0,0 +1,56 @@
+"""Rendering of figures to files, safe to run in parallel processes."""
+
+from concurrent.futures import ProcessPoolExecutor
+
+from final_project.tracing import traced
+
+
+@traced
+def render_figure(plot, path, *args, **kwargs):
+    """Draws a figure, saves it and closes it, also if saving fails.
+
+    Args:
+        plot (callable): Function returning a matplotlib.figure.Figure.
+        path (str or pathlib.Path): Path of the image file.
+        *args: Positional arguments passed to plot.
+        **kwargs: Keyword arguments passed to plot.
+
+    Returns:
+        pathlib.Path or str: The path of the image file.
+
+    """
+    import matplotlib
+
+    # Render without a display, also in worker processes.
+    matplotlib.use("Agg", force=True)
+    import matplotlib.pyplot as plt
+
+    fig = plot(*args, **kwargs)
+    try:
+        fig.savefig(path)
+    finally:
+        plt.close(fig)
+    return path
+
+
+def render_figures(jobs, n_workers=1):
+    """Renders several figures, in parallel processes if there is more than one worker.
+
+    Args:
+        jobs (list): The figures as tuples (plot, path, args), see render_figure. plot must be a module-level function
+            and args must be picklable to render in parallel.
+        n_workers (int, optional): Number of worker processes. Defaults to 1, which renders the figures one after
+            another in the current process.
+
+    Returns:
+        list: The paths of the image files.
+
+    """
+    if n_workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=min(n_workers, len(jobs))) as executor:
+            futures = [
+                executor.submit(render_figure, plot, path, *args)
+                for plot, path, args in jobs
+            ]
+            return [future.result() for future in futures]
+    return [render_figure(plot, path, *args) for plot, path, args in jobs]
@@ -0,0 +1,83 @@
+"""Summary cube of the loneliness outcomes for the descriptive figures."""
+
+import numpy as np
+import pandas as pd
+
+from final_project.tracing import traced
+
+# Outcomes summarized in the cube.
+CUBE_OUTCOMES = ["aggregate_loneliness_2013", "aggregate_loneliness_2017"]
+
+# Grouping variables of the cube that are taken from the data as they are.
+CUBE_GROUPS = ["went_unemployed", "sex", "marital_status"]
+
+# Bands of the cube as name: (column, threshold), true where the column exceeds the threshold.
+CUBE_BANDS = {
+    "hh_large": ("hh_members", 2),
+    "hh_high_income": ("hh_income", 3500),
+    "above_avg_health": ("health_2013", 2),
+}
+
+
+@traced
+def summary_cube(data):
+    """Computes the count, mean and variance of the loneliness outcomes for every combination of the grouping variables.
+
+    The grouping variables are CUBE_GROUPS and the bands of CUBE_BANDS, where missing values of a banded column fall
+    into the lower band. The cube has one row per combination that occurs in the data and is computed with a single
+    groupby, so any figure of the outcomes by these variables can be drawn from it with cube_means, whatever the size of
+    the data.
+
+    Args:
+        data (pandas.DataFrame): The cleaned dataset.
+
+    Returns:
+        pandas.DataFrame: The grouping variables, and the columns '<outcome>_count', '<outcome>_mean' and
+            '<outcome>_var' of each outcome.
+
+    """
+    keys = data[CUBE_GROUPS].copy()
+    for band, (column, threshold) in CUBE_BANDS.items():
+        keys[band] = (data[column] > threshold).astype(np.int8)
+    grouped = data[CUBE_OUTCOMES].groupby(
+        [keys[column] for column in keys],
+        dropna=False,
+        sort=True,
+    )
+    cube = grouped.agg(["count", "mean", "var"])
+    cube.columns = [f"{outcome}_{stat}" for outcome, stat in cube.columns]
+    return cube.reset_index()
+
+
+def cube_means(cube, by, **where):
+    """Computes the means of the outcomes by some grouping variables from the summary cube.
+
+    The means of the cells of the cube are combined weighted by their counts, so they equal the means computed from the
+    data. Missing outcomes do not count, as in ``pandas.DataFrame.mean``.
+
+    Args:
+        cube (pandas.DataFrame): The summary cube returned by summary_cube.
+        by (list): The grouping variables of the means. An empty list gives the overall means.
+        **where: Values of grouping variables that the cells must have, e.g. went_unemployed=1.
+
+    Returns:
+        pandas.DataFrame: The means of the outcomes, with one row per combination of the grouping variables in by, and
+            the outcomes as columns.
+
+    """
+    for column, value in where.items():
+        cube = cube[cube[column] == value]
+    counts = cube[[f"{outcome}_count" for outcome in CUBE_OUTCOMES]].to_numpy()
+    means = cube[[f"{outcome}_mean" for outcome in CUBE_OUTCOMES]].to_numpy()
+    sums = pd.DataFrame(
+        np.hstack([np.where(counts > 0, counts * means, 0), counts]),
+        index=cube.index,
+    )
+    if by:
+        sums = sums.groupby([cube[column] for column in by], dropna=False).sum()
+    else:
+        sums = sums.sum().to_frame().T
+    n = len(CUBE_OUTCOMES)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        values = sums.iloc[:, :n].to_numpy() / sums.iloc[:, n:].to_numpy()
+    return pd.DataFrame(values, index=sums.index, columns=CUBE_OUTCOMES)
@@ -1,11 +1,9 @@
 """Tasks running the results formatting (tables, figures)."""
 import pandas as pd
 import pytask
-from psmpy.plotting import *
 
-from final_project.analysis.model import create_psm, drop_na, run_logistic_ps
-from final_project.analysis.predict import get_predicted_data, run_knn_matched
-from final_project.config import BLD
+from final_project.analysis.matching import load_matching
+from final_project.config import BLD, N_WORKERS, SWEEP_MODERATORS
 from final_project.final.plot import (
     effect_size_table,
     plot_effect_size,
@@ -16,12 +14,26 @@ from final_project.final.plot import (
     plot_loneliness_by_marital_status_unemployment,
     plot_loneliness_by_unemployment,
     plot_match,
+    plot_threshold_sweep,
 )
+from final_project.final.render import render_figure, render_figures
+from final_project.final.summary import summary_cube
+from final_project.utilities import read_artifact, write_artifact
+
+# Descriptive figures drawn from the summary cube, by file name.
+DESCRIPTIVE_FIGURES = {
+    "descriptive_stats_1": plot_loneliness_by_unemployment,
+    "descriptive_stats_2": plot_loneliness_by_gender_and_employment,
+    "descriptive_stats_3": plot_loneliness_by_marital_status_unemployment,
+    "descriptive_stats_4": plot_loneliness_by_hh_size,
+    "descriptive_stats_5": plot_loneliness_by_hh_income,
+    "descriptive_stats_6": plot_loneliness_by_health,
+}
 
 
 @pytask.mark.depends_on(
     {
-        "data": BLD / "python" / "data" / "data_clean.csv",
+        "matching": BLD / "python" / "models" / "psm_no_replacement.pickle",
     },
 )
 @pytask.mark.produces(BLD / "python" / "figures" / "matching.png")
@@ -31,30 +43,21 @@ def task_plot_results(depends_on, produces):
     The results are derived from the psmpy library
 
     """
-    data = pd.read_csv(depends_on["data"])
-    data = drop_na(data)
-    psm = create_psm(
-        data,
-        treatment="went_unemployed",
-        indx="pid",
-        exclude=["hid", "aggregate_loneliness_2017"],
-    )
-    run_logistic_ps(psm, balance=False)
-    get_predicted_data(psm)
-    run_knn_matched(psm, matcher="propensity_score", replacement=False, caliper=None)
-    plot_match(
+    psm = load_matching(depends_on["matching"])["psm"]
+    render_figure(
+        plot_match,
+        produces,
         psm,
         title="Matching Result",
         ylabel="# of obs",
         xlabel="propensity logit",
         names=["treatment", "control"],
     )
-    plt.savefig(produces)
 
 
 @pytask.mark.depends_on(
     {
-        "data": BLD / "python" / "data" / "data_clean.csv",
+        "matching": BLD / "python" / "models" / "psm_caliper.pickle",
     },
 )
 @pytask.mark.produces(BLD / "python" / "figures" / "matching_caliper.png")
@@ -65,152 +68,87 @@ def task_plot_results_with_caliper(depends_on, produces):
     The results are derived from the psmpy library
 
     """
-    data = pd.read_csv(depends_on["data"])
-    data = drop_na(data)
-    psm = create_psm(
-        data,
-        treatment="went_unemployed",
-        indx="pid",
-        exclude=["hid", "aggregate_loneliness_2017"],
-    )
-    run_logistic_ps(psm, balance=False)
-    get_predicted_data(psm)
-    run_knn_matched(psm, matcher="propensity_score", replacement=True, caliper=0.2)
-    plot_match(
+    psm = load_matching(depends_on["matching"])["psm"]
+    render_figure(
+        plot_match,
+        produces,
         psm,
         title="Matching Result",
         ylabel="# of obs",
         xlabel="propensity logit",
         names=["treatment", "control"],
     )
-    plt.savefig(produces)
 
 
 @pytask.mark.depends_on(
     {
-        "data": BLD / "python" / "data" / "data_clean.csv",
+        "matching": BLD / "python" / "models" / "psm_no_replacement.pickle",
     },
 )
 @pytask.mark.produces(BLD / "python" / "figures" / "effect_size.png")
 def task_plot_effect_size(depends_on, produces):
     """Plot the effect sizes of different covariates affecting the outcome variable before and after matching."""
-    data = pd.read_csv(depends_on["data"])
-    data = drop_na(data)
-    psm = create_psm(
-        data,
-        treatment="went_unemployed",
-        indx="pid",
-        exclude=["hid", "aggregate_loneliness_2017"],
-    )
-    run_logistic_ps(psm, balance=False)
-    get_predicted_data(psm)
-    run_knn_matched(psm, matcher="propensity_score", replacement=False, caliper=None)
-    plot_effect_size(psm)
-    plt.savefig(produces)
+    psm = load_matching(depends_on["matching"])["psm"]
+    render_figure(plot_effect_size, produces, psm)
 
 
 @pytask.mark.depends_on(
     {
-        "data": BLD / "python" / "data" / "data_clean.csv",
+        "data": BLD / "python" / "data" / "data_clean.feather",
     },
 )
-@pytask.mark.produces(BLD / "python" / "figures" / "descriptive_stats_1.png")
-def task_plot_des_stats_1(depends_on, produces):
-    """Plot the descriptive statistics.
-
-    The figure shows the differnce in loneliness levels of people who went unemployed between 2013-17 compared to their employed counterparts
-
-    """
-    data = pd.read_csv(depends_on["data"])
-    fig = plot_loneliness_by_unemployment(data)
-    fig.savefig(produces)
+@pytask.mark.produces(BLD / "python" / "data" / "summary_cube.feather")
+def task_summary_cube(depends_on, produces):
+    """Summarize the loneliness outcomes of the cleaned dataset by all grouping variables of the descriptive figures."""
+    data = read_artifact(depends_on["data"])
+    write_artifact(summary_cube(data), produces)
 
 
 @pytask.mark.depends_on(
     {
-        "data": BLD / "python" / "data" / "data_clean.csv",
+        "cube": BLD / "python" / "data" / "summary_cube.feather",
     },
 )
-@pytask.mark.produces(BLD / "python" / "figures" / "descriptive_stats_2.png")
-def task_plot_des_stats_2(depends_on, produces):
-    """Plot the second descriptive figure, it shows the loneliness levels in 2013 and 2017 grouped on the basis of gender and experience of unemployment between 2013 and 2017."""
-    data = pd.read_csv(depends_on["data"])
-    fig = plot_loneliness_by_gender_and_employment(data)
-    fig.savefig(produces)
+@pytask.mark.produces(
+    {name: BLD / "python" / "figures" / f"{name}.png" for name in DESCRIPTIVE_FIGURES},
+)
+def task_plot_descriptive_stats(depends_on, produces):
+    """Plot the descriptive figures of the loneliness levels in 2013 and 2017 from the summary cube of the cleaned dataset.
+
+    The figures compare people who went unemployed and who stayed employed, by gender, by marital status, and by
+    household size, household income and health. They are rendered in parallel processes.
+
+    """
+    cube = read_artifact(depends_on["cube"])
+    jobs = [
+        (plot, produces[name], (cube,)) for name, plot in DESCRIPTIVE_FIGURES.items()
+    ]
+    render_figures(jobs, n_workers=N_WORKERS)
 
 
 @pytask.mark.depends_on(
     {
-        "data": BLD / "python" / "data" / "data_clean.csv",
+        "matching": BLD / "python" / "models" / "psm_no_replacement.pickle",
     },
 )
 @pytask.mark.produces(BLD / "python" / "tables" / "estimation_table.tex")
 def task_estimation_table(depends_on, produces):
     """Create the estimation table showing effect size of different covariates before and after matching."""
-    data = pd.read_csv(depends_on["data"])
-    data = drop_na(data)
-    psm = create_psm(
-        data,
-        treatment="went_unemployed",
-        indx="pid",
-        exclude=["hid", "aggregate_loneliness_2017"],
-    )
-    run_logistic_ps(psm, balance=False)
-    get_predicted_data(psm)
-    run_knn_matched(psm, matcher="propensity_score", replacement=False, caliper=None)
-    plot_effect_size(psm)
+    psm = load_matching(depends_on["matching"])["psm"]
     table = effect_size_table(psm)
     with open(produces, "w") as f:
         f.write(table.to_latex(index=False))
 
 
-@pytask.mark.depends_on(
-    {
-        "data": BLD / "python" / "data" / "data_clean.csv",
-    },
-)
-@pytask.mark.produces(BLD / "python" / "figures" / "descriptive_stats_3.png")
-def task_plot_des_stats_3(depends_on, produces):
-    """Plot another descriptive figure showing loneliness levels in the two years based on marital status."""
-    data = pd.read_csv(depends_on["data"])
-    fig = plot_loneliness_by_marital_status_unemployment(data)
-    fig.savefig(produces)
-
+for moderator in SWEEP_MODERATORS:
+    kwargs = {
+        "depends_on": BLD / "python" / "predictions" / f"sweep_{moderator}.csv",
+        "produces": BLD / "python" / "figures" / f"sweep_{moderator}.png",
+        "moderator": moderator,
+    }
 
-@pytask.mark.depends_on(
-    {
-        "data": BLD / "python" / "data" / "data_clean.csv",
-    },
-)
-@pytask.mark.produces(BLD / "python" / "figures" / "descriptive_stats_4.png")
-def task_plot_des_stats_4(depends_on, produces):
-    """Plot this descriptive figure from the filtered dataset showing loneliness levels grouped with household size."""
-    data = pd.read_csv(depends_on["data"])
-    fig = plot_loneliness_by_hh_size(data)
-    fig.savefig(produces)
-
-
-@pytask.mark.depends_on(
-    {
-        "data": BLD / "python" / "data" / "data_clean.csv",
-    },
-)
-@pytask.mark.produces(BLD / "python" / "figures" / "descriptive_stats_5.png")
-def task_plot_hh_income(depends_on, produces):
-    """Plot the descriptive figuure from the cleaned dataset to show change in levels of loneliness grouped by average health differnces across the population ."""
-    data = pd.read_csv(depends_on["data"])
-    fig = plot_loneliness_by_hh_income(data)
-    fig.savefig(produces)
-
-
-@pytask.mark.depends_on(
-    {
-        "data": BLD / "python" / "data" / "data_clean.csv",
-    },
-)
-@pytask.mark.produces(BLD / "python" / "figures" / "descriptive_stats_6.png")
-def task_plot_health_indicator(depends_on, produces):
-    """Plot the figure from the cleaned dataset to show the differneces in loneliness levels based on differences in average health levels across the population."""
-    data = pd.read_csv(depends_on["data"])
-    fig = plot_loneliness_by_health(data)
-    fig.savefig(produces)
+    @pytask.mark.task(id=moderator, kwargs=kwargs)
+    def task_plot_threshold_sweep(depends_on, produces, moderator):
+        """Plot the treatment effect below and above each threshold of the moderator."""
+        sweep = pd.read_csv(depends_on)
+        render_figure(plot_threshold_sweep, produces, sweep, moderator)
@@ -0,0 +1,38 @@
+"""pytask plugin that traces the tasks and the functions they call.
+
+The plugin is registered through the 'pytask' entry point of the package. It does
+nothing unless the environment variable FINAL_PROJECT_TRACE is set to 1. Then every
+build writes one trace to TRACE_DIR, see final_project.tracing. The tasks must run in
+the main process, so the plugin does not trace builds with pytask-parallel.
+
+"""
+from datetime import datetime
+
+import pytask
+from pytask import console
+
+from final_project.config import TRACE, TRACE_DIR
+from final_project.tracing import Trace, span
+
+
+@pytask.hookimpl(hookwrapper=True)
+def pytask_execute(session):
+    """Records a trace of the execution of the build and writes it to TRACE_DIR."""
+    if not TRACE:
+        yield
+        return
+    with Trace() as trace:
+        yield
+    chrome, folded = trace.write(
+        TRACE_DIR / f"trace_{datetime.now():%Y%m%d_%H%M%S}",
+    )
+    console.print(f"Wrote the trace of the build to {chrome} and {folded}.")
+
+
+@pytask.hookimpl(hookwrapper=True)
+def pytask_execute_task(session, task):
+    """Records the execution of a task as a span of the active trace."""
+    with span(task.short_name, category="task") as record:
+        outcome = yield
+        if outcome.excinfo is not None:
+            record["error"] = outcome.excinfo[0].__name__
@@ -0,0 +1,287 @@
+"""Opt-in tracing of the wall time, CPU time, memory and row counts of the pipeline.
+
+Functions decorated with traced are recorded while a Trace is active, and run unchanged
+otherwise. The pytask plugin in final_project.plugin activates a Trace for a whole build
+if the environment variable FINAL_PROJECT_TRACE is set to 1.
+
+"""
+
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import NamedTuple
+
+try:
+    import resource
+except ImportError:  # pragma: no cover, Windows has no resource module.
+    resource = None
+
+# The trace that records the spans, if tracing is active.
+_ACTIVE = None
+
+
+class Span(NamedTuple):
+    """A recorded call of a traced function or a task."""
+
+    name: str
+    category: str
+    stack: tuple
+    thread: int
+    start: float
+    wall_seconds: float
+    self_seconds: float
+    cpu_seconds: float
+    peak_rss_bytes: int | None
+    rss_growth_bytes: int | None
+    rows_in: int | None
+    rows_out: int | None
+    error: str | None
+
+
+class Trace:
+    """Records the spans of the traced functions and tasks while it is active.
+
+    Use it as a context manager. Only one trace can be active at a time. Spans are
+    nested per thread, so functions that run in a thread pool are recorded as top-level
+    spans of their thread. Functions that run in other processes are not recorded.
+
+    """
+
+    def __init__(self):
+        self.spans = []
+        self.origin = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def __enter__(self):
+        global _ACTIVE
+        if _ACTIVE is not None:
+            raise RuntimeError("Another trace is already active.")
+        self.origin = time.perf_counter()
+        _ACTIVE = self
+        return self
+
+    def __exit__(self, *exc_info):
+        global _ACTIVE
+        _ACTIVE = None
+
+    def _frames(self):
+        """Returns the stack of open spans of the current thread."""
+        if not hasattr(self._local, "frames"):
+            self._local.frames = []
+        return self._local.frames
+
+    def to_chrome_trace(self):
+        """Converts the spans to the Trace Event Format of Chrome.
+
+        The trace can be loaded into chrome://tracing, Perfetto or speedscope, which
+        show it as a flame chart over time.
+
+        Returns:
+            dict: The trace events, with times in microseconds since the start of the
+                trace, and the measurements of each span as its arguments.
+
+        """
+        pid = os.getpid()
+        events = [
+            {
+                "name": "process_name",
+                "ph": "M",
+                "pid": pid,
+                "args": {"name": "final_project"},
+            },
+        ]
+        for span in self.spans:
+            events.append(
+                {
+                    "name": span.name,
+                    "cat": span.category,
+                    "ph": "X",
+                    "ts": (span.start - self.origin) * 1e6,
+                    "dur": span.wall_seconds * 1e6,
+                    "pid": pid,
+                    "tid": span.thread,
+                    "args": {
+                        "cpu_seconds": span.cpu_seconds,
+                        "self_seconds": span.self_seconds,
+                        "peak_rss_bytes": span.peak_rss_bytes,
+                        "rss_growth_bytes": span.rss_growth_bytes,
+                        "rows_in": span.rows_in,
+                        "rows_out": span.rows_out,
+                        "error": span.error,
+                    },
+                },
+            )
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def to_folded_stacks(self):
+        """Converts the spans to folded stacks, as read by flamegraph.pl and speedscope.
+
+        Returns:
+            str: One line per call stack with the names of the spans separated by
+                semicolons and the self time of the stack in microseconds.
+
+        """
+        totals = {}
+        for span in self.spans:
+            stack = ";".join([*span.stack, span.name])
+            totals[stack] = totals.get(stack, 0) + span.self_seconds
+        return "".join(
+            f"{stack} {round(seconds * 1e6)}\n" for stack, seconds in totals.items()
+        )
+
+    def write(self, path):
+        """Writes the trace as Chrome trace and as folded stacks.
+
+        Args:
+            path (str or pathlib.Path): Path of the trace without suffix. The Chrome
+                trace is written to '<path>.json' and the folded stacks to
+                '<path>.folded'.
+
+        Returns:
+            tuple: The paths of the Chrome trace and of the folded stacks.
+
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        chrome, folded = path.with_suffix(".json"), path.with_suffix(".folded")
+        with open(chrome, "w") as f:
+            json.dump(self.to_chrome_trace(), f)
+        folded.write_text(self.to_folded_stacks())
+        return chrome, folded
+
+
+@contextmanager
+def span(name, category="function", rows_in=None):
+    """Records a span in the active trace, or does nothing if no trace is active.
+
+    Rows that are not given are taken from the spans nested in it: the input rows of the
+    first and the output rows of the last one.
+
+    Args:
+        name (str): The name of the span.
+        category (str, optional): The category of the span, e.g. the module of a
+            function or 'task'. Defaults to "function".
+        rows_in (int, optional): The number of input rows. Defaults to None.
+
+    Yields:
+        dict: The measurements of the span, in which 'rows_out' can be set.
+
+    """
+    trace = _ACTIVE
+    if trace is None:
+        yield {}
+        return
+    frames = trace._frames()
+    stack = tuple(parent["name"] for parent in frames)
+    frame = {
+        "name": name,
+        "rows_in": rows_in,
+        "rows_out": None,
+        "children_seconds": 0.0,
+        "children": [],
+        "error": None,
+    }
+    frames.append(frame)
+    rss_before = peak_rss_bytes()
+    cpu_before = time.process_time()
+    start = time.perf_counter()
+    try:
+        yield frame
+    except BaseException as error:
+        frame["error"] = type(error).__name__
+        raise
+    finally:
+        wall = time.perf_counter() - start
+        cpu = time.process_time() - cpu_before
+        rss_after = peak_rss_bytes()
+        frames.pop()
+        children = frame["children"]
+        rows_in = frame["rows_in"]
+        rows_out = frame["rows_out"]
+        if children:
+            rows_in = children[0].rows_in if rows_in is None else rows_in
+            rows_out = children[-1].rows_out if rows_out is None else rows_out
+        recorded = Span(
+            name=name,
+            category=category,
+            stack=stack,
+            thread=threading.get_ident(),
+            start=start,
+            wall_seconds=wall,
+            self_seconds=max(wall - frame["children_seconds"], 0.0),
+            cpu_seconds=cpu,
+            peak_rss_bytes=rss_after,
+            rss_growth_bytes=None if rss_after is None else rss_after - rss_before,
+            rows_in=rows_in,
+            rows_out=rows_out,
+            error=frame["error"],
+        )
+        if frames:
+            frames[-1]["children_seconds"] += wall
+            frames[-1]["children"].append(recorded)
+        with trace._lock:
+            trace.spans.append(recorded)
+
+
+def traced(func):
+    """Records each call of a function as a span of the active trace.
+
+    The span is named after the function and records its input rows, taken from the
+    first argument, and its output rows. Without an active trace, the function is called
+    directly.
+
+    Args:
+        func (callable): The function to trace.
+
+    Returns:
+        callable: The traced function.
+
+    """
+    category = func.__module__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if _ACTIVE is None:
+            return func(*args, **kwargs)
+        rows_in = count_rows(args[0]) if args else None
+        with span(func.__name__, category, rows_in=rows_in) as record:
+            result = func(*args, **kwargs)
+            record["rows_out"] = count_rows(result)
+        return result
+
+    return wrapper
+
+
+def count_rows(value):
+    """Returns the number of rows of a table, the total of a dict of tables, or None.
+
+    Args:
+        value: A pandas or NumPy object with a shape, a dict of such objects, or any other
+            value.
+
+    Returns:
+        int or None: The number of rows, or None if value is not a table.
+
+    """
+    if isinstance(value, dict):
+        rows = [count_rows(item) for item in value.values()]
+        return sum(rows) if rows and None not in rows else None
+    shape = getattr(value, "shape", None)
+    if isinstance(shape, tuple) and shape:
+        return int(shape[0])
+    return None
+
+
+def peak_rss_bytes():
+    """Returns the peak resident set size of the process in bytes, or None if unknown."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return peak if sys.platform == "darwin" else peak * 1024
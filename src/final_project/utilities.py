@@ -1,6 +1,11 @@
 """Utilities used in various parts of the project."""
 
+from pathlib import Path
+
 import yaml
+from pyarrow import feather
+
+from final_project.config import EXPORT_CSV
 
 
 def read_yaml(path):
@@ -23,3 +28,80 @@ def read_yaml(path):
             )
             raise ValueError(info) from error
     return out
+
+
+def artifact_products(path, export_csv=EXPORT_CSV):
+    """Declare the products of a task that writes a data artifact.
+
+    Args:
+        path (pathlib.Path): Path to the Feather file of the artifact.
+        export_csv (bool, optional): Whether a CSV copy is exported next to the Feather
+            file. Defaults to ``EXPORT_CSV``.
+
+    Returns:
+        dict: The path of the Feather file under "data", and of the CSV copy under
+            "csv" if it is exported.
+
+    """
+    products = {"data": path}
+    if export_csv:
+        products["csv"] = path.with_suffix(".csv")
+    return products
+
+
+def write_artifact(df, path, csv_path=None):
+    """Write a data artifact as an uncompressed Feather file.
+
+    The Feather file embeds the schema of the DataFrame, so data types such as
+    categoricals and nullable integers survive the round trip. The index is not stored.
+
+    Args:
+        df (pandas.DataFrame): The data to write.
+        path (str or pathlib.Path): Path to the Feather file.
+        csv_path (str or pathlib.Path, optional): Path of an additional CSV export.
+            Defaults to None, which writes no CSV file.
+
+    """
+    df.reset_index(drop=True).to_feather(path, compression="uncompressed")
+    if csv_path is not None:
+        df.to_csv(csv_path, index=False)
+
+
+def write_csv_if_changed(df, path):
+    """Write a DataFrame as a CSV file unless the file already has the same content.
+
+    An unchanged file keeps its modification time, so tasks that depend on it are not
+    run again when a task rewrites several outputs of which only some changed.
+
+    Args:
+        df (pandas.DataFrame): The data to write. The index is not stored.
+        path (str or pathlib.Path): Path to the CSV file.
+
+    Returns:
+        bool: Whether the file was written.
+
+    """
+    path = Path(path)
+    content = df.to_csv(index=False, lineterminator="\n").encode()
+    if path.exists() and path.read_bytes() == content:
+        return False
+    path.write_bytes(content)
+    return True
+
+
+def read_artifact(path, columns=None, memory_map=True):
+    """Read a data artifact written by ``write_artifact``.
+
+    Args:
+        path (str or pathlib.Path): Path to the Feather file.
+        columns (list, optional): Columns to read. Defaults to None, which reads all
+            columns.
+        memory_map (bool, optional): Whether to memory map the file instead of reading
+            it into memory first. Defaults to True.
+
+    Returns:
+        pandas.DataFrame: The data.
+
+    """
+    table = feather.read_table(path, columns=columns, memory_map=memory_map)
+    return table.to_pandas(split_blocks=True, self_destruct=True)
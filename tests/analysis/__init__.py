@@ -1,5 +1,50 @@
 """Tests for the analysis module."""
-from tests.analysis.test_model import test_fit_regression_model
-from tests.analysis.test_predict import test_matched_df, test_predicted_data
+from tests.analysis.test_bootstrap import (
+    test_bootstrap_att_ate_matches_resampled_fits,
+    test_bootstrap_intervals,
+    test_bootstrap_matching_does_not_depend_on_workers,
+)
+from tests.analysis.test_matching import (
+    test_fit_matching_matches_pipeline,
+    test_load_matching_checks_data_hash,
+)
+from tests.analysis.test_model import (
+    test_fit_logistic_column_subset,
+    test_fit_logistic_matches_liblinear,
+    test_fit_regression_model,
+    test_fit_regression_model_native,
+    test_perform_subgroup_analyses,
+    test_run_logistic_ps_native,
+    test_specification_curve,
+    test_subgroup_effects_drops_missing_outcome,
+    test_subgroup_effects_matches_ols,
+    test_threshold_sweep,
+)
+from tests.analysis.test_predict import (
+    test_match_nearest,
+    test_matched_df,
+    test_predicted_data,
+    test_run_knn_matched_native,
+)
 
-__all__ = test_fit_regression_model, test_predicted_data, test_matched_df
+__all__ = (
+    test_fit_regression_model,
+    test_predicted_data,
+    test_matched_df,
+    test_fit_matching_matches_pipeline,
+    test_load_matching_checks_data_hash,
+    test_fit_logistic_matches_liblinear,
+    test_fit_logistic_column_subset,
+    test_run_logistic_ps_native,
+    test_match_nearest,
+    test_run_knn_matched_native,
+    test_subgroup_effects_matches_ols,
+    test_subgroup_effects_drops_missing_outcome,
+    test_perform_subgroup_analyses,
+    test_threshold_sweep,
+    test_fit_regression_model_native,
+    test_specification_curve,
+    test_bootstrap_att_ate_matches_resampled_fits,
+    test_bootstrap_matching_does_not_depend_on_workers,
+    test_bootstrap_intervals,
+)
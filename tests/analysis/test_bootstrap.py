@@ -0,0 +1,78 @@
+"""Tests for the bootstrap confidence intervals."""
+
+import numpy as np
+import pandas as pd
+import pytest
+from final_project.analysis.bootstrap import (
+    bootstrap_att_ate,
+    bootstrap_intervals,
+    bootstrap_matching,
+)
+from final_project.analysis.model import fit_regression_model
+from final_project.analysis.predict import predict_att_ate_regression
+
+
+@pytest.fixture()
+def data():
+    rng = np.random.default_rng(1)
+    n = 200
+    data = pd.DataFrame(
+        {
+            "pid": np.arange(n),
+            "hid": np.arange(n),
+            "went_unemployed": rng.binomial(n=1, p=0.3, size=n),
+            "age": rng.normal(loc=40, scale=10, size=n),
+            "sex": rng.binomial(n=1, p=0.5, size=n),
+            "marital_status": rng.binomial(n=1, p=0.5, size=n),
+            "education": rng.integers(low=7, high=18, size=n).astype(float),
+            "aggregate_loneliness_2013": rng.normal(size=n),
+            "health_2013": rng.integers(low=1, high=6, size=n).astype(float),
+            "hh_income": rng.normal(loc=50000, scale=10000, size=n),
+            "hh_members": rng.integers(low=1, high=5, size=n).astype(float),
+        },
+    )
+    data["aggregate_loneliness_2017"] = (
+        data["aggregate_loneliness_2013"]
+        + 0.5 * data["went_unemployed"]
+        + rng.normal(size=n)
+    )
+    return data
+
+
+def test_bootstrap_att_ate_matches_resampled_fits(data):
+    estimates, replications = bootstrap_att_ate(
+        data,
+        n_boot=5,
+        seed=3,
+        memory_bytes=2 * 8 * len(data),
+    )
+    pd.testing.assert_frame_equal(
+        estimates,
+        predict_att_ate_regression(data, fit_regression_model(data)),
+    )
+    rng = np.random.default_rng(3)
+    index = [rng.integers(0, len(data), len(data)) for _ in range(5)]
+    for replication, rows in enumerate(index):
+        sample = data.iloc[rows]
+        expected = predict_att_ate_regression(sample, fit_regression_model(sample))
+        np.testing.assert_allclose(
+            replications.iloc[replication],
+            expected.iloc[0],
+        )
+
+
+def test_bootstrap_matching_does_not_depend_on_workers(data):
+    expected = bootstrap_matching(data, n_boot=3, seed=5)
+    output = bootstrap_matching(data, n_boot=3, seed=5, n_workers=2)
+    pd.testing.assert_frame_equal(output, expected)
+    assert expected["ATT"].nunique() == 3
+
+
+def test_bootstrap_intervals():
+    replications = pd.DataFrame({"ATT": np.arange(101.0), "ATE": np.ones(101)})
+    estimates = pd.DataFrame({"ATT": [50.0], "ATE": [1.0]})
+    output = bootstrap_intervals(estimates, replications, alpha=0.1)
+    assert list(output["Statistic"]) == ["ATT", "ATE"]
+    np.testing.assert_allclose(output["CI Lower"], [5, 1])
+    np.testing.assert_allclose(output["CI Upper"], [95, 1])
+    np.testing.assert_allclose(output["Std. Error"], [replications["ATT"].std(), 0])
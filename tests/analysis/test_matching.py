@@ -0,0 +1,52 @@
+"""Tests for the matching artifact."""
+
+import final_project.analysis.matching as matching_fn
+import final_project.analysis.model as model_fn
+import final_project.analysis.predict as predict_fn
+import matplotlib
+import pandas as pd
+import pytest
+from final_project.config import TEST_DIR
+
+matplotlib.use("Agg")
+
+
+@pytest.fixture()
+def data():
+    test_match_df = pd.read_csv(TEST_DIR / "analysis" / "test_match.csv")
+    return test_match_df
+
+
+@pytest.mark.parametrize(
+    ("replacement", "caliper"),
+    [(False, None), (True, 0.2)],
+)
+def test_fit_matching_matches_pipeline(data, replacement, caliper):
+    psm = model_fn.create_psm(
+        model_fn.drop_na(data),
+        treatment="went_unemployed",
+        indx="pid",
+        exclude=["hid", "aggregate_loneliness_2017"],
+    )
+    model_fn.run_logistic_ps(psm, balance=False)
+    predict_fn.run_knn_matched(
+        psm,
+        matcher="propensity_score",
+        replacement=replacement,
+        caliper=caliper,
+    )
+    psm.effect_size_plot()
+    matching = matching_fn.fit_matching(data, replacement=replacement, caliper=caliper)
+    pd.testing.assert_frame_equal(matching["df_matched"], psm.df_matched)
+    pd.testing.assert_frame_equal(matching["effect_size"], psm.effect_size)
+    assert matching["params"]["caliper"] == caliper
+
+
+def test_load_matching_checks_data_hash(data, tmp_path):
+    path = tmp_path / "psm.pickle"
+    matching_fn.save_matching(matching_fn.fit_matching(data), path)
+    matching = matching_fn.load_matching(path, data)
+    assert matching["data_hash"] == matching_fn.data_hash(data)
+    changed = data.assign(age=data["age"] + 1)
+    with pytest.raises(ValueError, match="different data"):
+        matching_fn.load_matching(path, changed)
@@ -3,7 +3,10 @@
 import final_project.analysis.model as model_fn
 import numpy as np
 import pandas as pd
+import pytest
 import statsmodels.api as sm
+from final_project.config import SUBGROUP_SPLITS, TEST_DIR
+from sklearn.linear_model import LogisticRegression
 
 # All the functions are tested on sample dataset test_match.csv
 
@@ -51,3 +54,206 @@ def test_fit_regression_model():
 
     # Test that the model has non-null coefficients for all variables
     assert model.params.notnull().all()
+
+
+def test_fit_regression_model_native():
+    rng = np.random.default_rng(0)
+    data = pd.DataFrame(
+        {
+            "aggregate_loneliness_2017": rng.normal(size=100),
+            "went_unemployed": rng.binomial(n=1, p=0.5, size=100),
+            "age": rng.normal(loc=40, scale=10, size=100),
+            "sex": rng.binomial(n=1, p=0.5, size=100),
+            "education": rng.choice(["High school", "College", "Graduate"], size=100),
+            "marital_status": rng.binomial(n=1, p=0.5, size=100),
+            "aggregate_loneliness_2013": rng.normal(size=100),
+            "hh_members": rng.integers(low=1, high=5, size=100),
+            "hh_income": rng.normal(loc=50000, scale=10000, size=100),
+        },
+    )
+    data.loc[3, "age"] = np.nan
+    expected = model_fn.fit_regression_model(data)
+    output = model_fn.fit_regression_model(data, engine="native")
+    assert output.nobs == expected.nobs
+    assert output.df_resid == expected.df_resid
+    for name in ["params", "bse", "tvalues", "pvalues"]:
+        pd.testing.assert_series_equal(
+            getattr(output, name),
+            getattr(expected, name),
+            check_names=False,
+        )
+    cached = model_fn.fit_regression_model(data, engine="native")
+    pd.testing.assert_series_equal(cached.params, output.params)
+
+
+@pytest.mark.parametrize("n_workers", [1, 2])
+def test_specification_curve(match_data, n_workers):
+    covariates = ["age", "sex", "health_2013"]
+    output = model_fn.specification_curve(
+        match_data,
+        covariates,
+        n_workers=n_workers,
+    )
+    assert len(output) == 2 ** len(covariates)
+    assert list(output["Specification"][[0, 4, 7]]) == [
+        "(none)",
+        "age + sex",
+        "age + sex + health_2013",
+    ]
+    for _, row in output.iterrows():
+        included = [covariate for covariate in covariates if row[covariate]]
+        expected = sm.OLS.from_formula(
+            " + ".join(["aggregate_loneliness_2017 ~ went_unemployed", *included]),
+            data=match_data,
+        ).fit()
+        np.testing.assert_allclose(
+            row[["Treatment Effect", "Standard Error", "P-Value"]].astype(float),
+            [
+                expected.params["went_unemployed"],
+                expected.bse["went_unemployed"],
+                expected.pvalues["went_unemployed"],
+            ],
+        )
+
+
+@pytest.fixture()
+def match_data():
+    return pd.read_csv(TEST_DIR / "analysis" / "test_match.csv")
+
+
+def test_fit_logistic_matches_liblinear(match_data):
+    covariates = ["marital_status", "education", "age", "sex", "health_2013"]
+    x = model_fn.design_matrix(match_data, covariates)
+    y = match_data["went_unemployed"].to_numpy()
+    beta = model_fn.fit_logistic(x, y, l2=1.0, penalize_intercept=True)
+    expected = LogisticRegression(solver="liblinear", tol=1e-12, max_iter=10_000)
+    expected.fit(match_data[covariates], y)
+    scores, logits = model_fn.predict_logistic(x, beta)
+    np.testing.assert_allclose(
+        scores,
+        expected.predict_proba(match_data[covariates])[:, 1],
+        atol=1e-6,
+    )
+    np.testing.assert_allclose(logits, np.log(scores / (1 - scores)))
+
+
+def test_fit_logistic_column_subset(match_data):
+    covariates = ["marital_status", "education", "age", "sex", "health_2013"]
+    x = model_fn.design_matrix(match_data, covariates)
+    y = match_data["went_unemployed"].to_numpy()
+    expected = model_fn.fit_logistic(
+        model_fn.design_matrix(match_data, ["age", "sex"]),
+        y,
+        l2=1.0,
+    )
+    output = model_fn.fit_logistic(x, y, columns=[0, 3, 4], l2=1.0)
+    np.testing.assert_allclose(output, expected)
+    warm = model_fn.fit_logistic(
+        x,
+        y,
+        columns=[0, 3, 4],
+        l2=1.0,
+        start=output,
+        max_iter=1,
+    )
+    np.testing.assert_allclose(warm, expected)
+
+
+def test_run_logistic_ps_native(match_data):
+    def create():
+        return model_fn.create_psm(
+            match_data,
+            treatment="went_unemployed",
+            indx="pid",
+            exclude=["hid", "aggregate_loneliness_2017"],
+        )
+
+    expected = create()
+    model_fn.run_logistic_ps(expected, balance=False)
+    psm = create()
+    output = model_fn.run_logistic_ps(psm, engine="native", dtype=np.float32)
+    scores = ["propensity_score", "propensity_logit"]
+    pd.testing.assert_frame_equal(
+        output.drop(columns=scores),
+        expected.predicted_data.drop(columns=scores),
+    )
+    np.testing.assert_allclose(
+        output["propensity_score"],
+        expected.predicted_data["propensity_score"],
+        atol=0.02,
+    )
+
+
+def test_subgroup_effects_matches_ols(match_data):
+    subgroups = [
+        ("Age < 50", "age", "<", 50),
+        ("Married", "marital_status", "==", 1),
+        ("All", "sex", "!=", 2),
+    ]
+    output = model_fn.subgroup_effects(match_data, subgroups)
+    for row, (_, column, op, value) in enumerate(subgroups):
+        subgroup = match_data[
+            model_fn.SUBGROUP_OPERATORS[op](match_data[column], value)
+        ]
+        expected = sm.OLS(
+            subgroup["aggregate_loneliness_2017"],
+            subgroup["went_unemployed"],
+        ).fit()
+        assert output["Observations"][row] == len(subgroup)
+        np.testing.assert_allclose(
+            output.loc[row, ["Treatment Effect", "Standard Error", "P-Value"]].astype(
+                float,
+            ),
+            [expected.params[0], expected.bse[0], expected.pvalues[0]],
+        )
+
+
+def test_subgroup_effects_drops_missing_outcome(match_data):
+    data = match_data.copy()
+    data.loc[data.index[data["sex"] == 1][0], "aggregate_loneliness_2017"] = np.nan
+    subgroups = [("Male", "sex", "==", 1), ("Female", "sex", "==", 0)]
+    output = model_fn.subgroup_effects(data, subgroups)
+    for row, (_, column, op, value) in enumerate(subgroups):
+        subgroup = data[model_fn.SUBGROUP_OPERATORS[op](data[column], value)]
+        expected = sm.OLS(
+            subgroup["aggregate_loneliness_2017"],
+            subgroup["went_unemployed"],
+            missing="drop",
+        ).fit()
+        assert output["Observations"][row] == expected.nobs
+        np.testing.assert_allclose(
+            output.loc[row, ["Treatment Effect", "Standard Error", "P-Value"]].astype(
+                float,
+            ),
+            [expected.params[0], expected.bse[0], expected.pvalues[0]],
+        )
+
+
+def test_perform_subgroup_analyses(match_data):
+    output = model_fn.perform_subgroup_analyses(match_data)
+    assert list(output) == list(SUBGROUP_SPLITS)
+    pd.testing.assert_frame_equal(
+        output["health"],
+        model_fn.perform_subgroup_analysis_health(match_data),
+    )
+    assert list(output["gender"]["Subgroup"]) == ["Male", "Female"]
+
+
+def test_threshold_sweep(match_data):
+    data = match_data.assign(age=match_data["age"].where(match_data["pid"] != 2))
+    output = model_fn.threshold_sweep(data, "age")
+    thresholds = np.unique(data["age"].dropna())[1:]
+    assert list(output["Side"]) == ["below"] * len(thresholds) + ["above"] * len(
+        thresholds,
+    )
+    for threshold in thresholds:
+        expected = model_fn.subgroup_effects(
+            data,
+            [("below", "age", "<", threshold), ("above", "age", ">=", threshold)],
+        )
+        pd.testing.assert_frame_equal(
+            output[output["Threshold"] == threshold]
+            .drop(columns="Threshold")
+            .reset_index(drop=True),
+            expected.rename(columns={"Subgroup": "Side"}),
+        )
@@ -1,5 +1,6 @@
 """Tests for the prediction model."""
 
+import numpy as np
 import pandas as pd
 import pytest
 from psmpy.plotting import *
@@ -81,3 +82,80 @@ def test_matched_df(data):
     output = output[["marital_status", "propensity_score", "matched_ID"]]
     output["propensity_score"] = output["propensity_score"].round(6)
     pd.testing.assert_frame_equal(expected_df, output)
+
+
+def brute_force_match(treated, control, k, replacement, radius):
+    treated_rows, control_rows, used = [], [], set()
+    for i, score in enumerate(treated):
+        candidates = sorted(
+            (abs(score - other), j)
+            for j, other in enumerate(control)
+            if replacement or j not in used
+        )
+        for distance, j in candidates[:k]:
+            if distance > radius:
+                break
+            treated_rows.append(i)
+            control_rows.append(j)
+            if not replacement:
+                used.add(j)
+    return treated_rows, control_rows
+
+
+@pytest.mark.parametrize("replacement", [False, True])
+@pytest.mark.parametrize("k", [1, 2])
+@pytest.mark.parametrize("caliper", [None, 0.5])
+def test_match_nearest(replacement, k, caliper):
+    rng = np.random.default_rng(0)
+    # Few distinct scores, so that ties are frequent.
+    treated = rng.integers(0, 8, size=15) / 2
+    control = rng.integers(0, 8, size=30) / 2
+    treated_rows, control_rows = predict_fn.match_nearest(
+        treated,
+        control,
+        k=k,
+        replacement=replacement,
+        caliper=caliper,
+    )
+    radius = np.inf
+    if caliper is not None:
+        radius = caliper * np.std(np.concatenate([treated, control]))
+    expected = brute_force_match(treated, control, k, replacement, radius)
+    assert treated_rows.tolist() == expected[0]
+    assert control_rows.tolist() == expected[1]
+
+
+@pytest.mark.parametrize(
+    ("replacement", "caliper"),
+    [(False, None), (True, None), (True, 0.2)],
+)
+def test_run_knn_matched_native(data, replacement, caliper):
+    psm = model_fn.create_psm(
+        data,
+        treatment="went_unemployed",
+        indx="pid",
+        exclude=["hid", "aggregate_loneliness_2017"],
+    )
+    model_fn.run_logistic_ps(psm, engine="native")
+    predict_fn.run_knn_matched(
+        psm,
+        matcher="propensity_score",
+        replacement=replacement,
+        caliper=caliper,
+    )
+    expected_df, expected_ids = psm.df_matched, psm.matched_ids
+    predict_fn.run_knn_matched(
+        psm,
+        matcher="propensity_score",
+        replacement=replacement,
+        caliper=caliper,
+        engine="native",
+    )
+    pd.testing.assert_frame_equal(psm.matched_ids, expected_ids, check_dtype=False)
+    # PsmPy drops the first row of the larger group, pid 2, from the matched data.
+    n_matched = len(psm.matched_ids)
+    is_first_row = (psm.df_matched.index >= n_matched) & (psm.df_matched["pid"] == 2)
+    pd.testing.assert_frame_equal(
+        psm.df_matched[~is_first_row].reset_index(drop=True),
+        expected_df,
+    )
@@ -1,22 +1,102 @@
 """Tests for the data management module."""
+from tests.data_management.test_cache import (
+    test_evict_removes_least_recently_used,
+    test_main_clears_cache,
+    test_read_cached_converts_once,
+    test_read_cached_keys_on_content_and_options,
+)
 from tests.data_management.test_clean_data import (
+    test_clean_columns,
+    test_clean_columns_missing_column,
+    test_codes_mode_matches_label_mode,
+    test_data_clean_codes_mode,
+    test_data_clean_keys,
+    test_data_clean_lazy_mode,
+    test_filter_by_keys,
     test_filter_by_year,
     test_hbrutto_functions,
     test_hgen_functions,
+    test_label_code,
     test_pgen_covariates,
     test_pgen_treatment,
+    test_pgen_treatment_windows,
+    test_pgen_treatment_windows_duplicate_rows,
     test_pl_functions,
     test_ppath_functions,
     test_replace_invalid_responses,
 )
+from tests.data_management.test_keys import (
+    test_factorize_keys_shares_codes,
+    test_gather_join_matches_merge,
+    test_gather_join_suffixes_overlapping_columns,
+)
+from tests.data_management.test_load_data import (
+    test_read_soep_dataset,
+    test_read_soep_dataset_requires_syear,
+    test_read_soep_datasets,
+    test_read_soep_datasets_parallel,
+)
+from tests.data_management.test_panel import (
+    test_cleaning_functions_accept_panel_index,
+    test_panel_index_of_panel_index,
+    test_panel_index_wave_is_view,
+    test_panel_index_wave_matches_filter_by_year,
+    test_panel_index_years,
+)
+from tests.data_management.test_schema import (
+    test_compact_dtypes,
+    test_compact_dtypes_lossy_floats,
+    test_compact_dtypes_lossy_integers,
+)
+from tests.data_management.test_synthetic import (
+    test_data_clean_on_synthetic_soep,
+    test_synthetic_soep_chunks,
+    test_synthetic_soep_codes_mode_matches_label_mode,
+    test_synthetic_soep_labels,
+    test_synthetic_soep_structure,
+)
 
 __all__ = [
     test_filter_by_year,
     test_replace_invalid_responses,
     test_pgen_treatment,
+    test_pgen_treatment_windows,
+    test_pgen_treatment_windows_duplicate_rows,
     test_ppath_functions,
     test_pl_functions,
     test_pgen_covariates,
     test_hgen_functions,
     test_hbrutto_functions,
+    test_label_code,
+    test_codes_mode_matches_label_mode,
+    test_data_clean_codes_mode,
+    test_data_clean_keys,
+    test_data_clean_lazy_mode,
+    test_filter_by_keys,
+    test_clean_columns,
+    test_clean_columns_missing_column,
+    test_read_soep_dataset,
+    test_read_soep_dataset_requires_syear,
+    test_read_soep_datasets,
+    test_read_soep_datasets_parallel,
+    test_read_cached_converts_once,
+    test_read_cached_keys_on_content_and_options,
+    test_evict_removes_least_recently_used,
+    test_main_clears_cache,
+    test_panel_index_years,
+    test_panel_index_wave_matches_filter_by_year,
+    test_panel_index_wave_is_view,
+    test_panel_index_of_panel_index,
+    test_cleaning_functions_accept_panel_index,
+    test_factorize_keys_shares_codes,
+    test_gather_join_matches_merge,
+    test_gather_join_suffixes_overlapping_columns,
+    test_compact_dtypes,
+    test_compact_dtypes_lossy_integers,
+    test_compact_dtypes_lossy_floats,
+    test_synthetic_soep_structure,
+    test_synthetic_soep_labels,
+    test_synthetic_soep_codes_mode_matches_label_mode,
+    test_synthetic_soep_chunks,
+    test_data_clean_on_synthetic_soep,
 ]
@@ -0,0 +1,63 @@
+import os
+
+import pandas as pd
+import pytest
+
+import src.final_project.data_management.cache as cache_fn
+
+
+@pytest.fixture()
+def source(tmp_path):
+    path = tmp_path / "source.csv"
+    pd.DataFrame({"pid": [1, 2, 3], "syear": [2013, 2013, 2017]}).to_csv(
+        path,
+        index=False,
+    )
+    return path
+
+
+def counting_reader(calls):
+    def reader(path, **options):
+        calls.append(options)
+        return pd.read_csv(path, **options)
+
+    return reader
+
+
+def test_read_cached_converts_once(source, tmp_path):
+    calls = []
+    reader = counting_reader(calls)
+    first = cache_fn.read_cached(source, reader, cache_dir=tmp_path / "cache")
+    second = cache_fn.read_cached(source, reader, cache_dir=tmp_path / "cache")
+    assert len(calls) == 1
+    pd.testing.assert_frame_equal(first, second)
+
+
+def test_read_cached_keys_on_content_and_options(source, tmp_path):
+    calls = []
+    reader = counting_reader(calls)
+    cache_dir = tmp_path / "cache"
+    cache_fn.read_cached(source, reader, cache_dir=cache_dir)
+    cache_fn.read_cached(source, reader, cache_dir=cache_dir, usecols=["pid"])
+    source.write_text("pid,syear\n4,2013\n")
+    output = cache_fn.read_cached(source, reader, cache_dir=cache_dir)
+    assert len(calls) == 3
+    assert output["pid"].tolist() == [4]
+
+
+def test_evict_removes_least_recently_used(source, tmp_path):
+    cache_dir = tmp_path / "cache"
+    reader = counting_reader([])
+    old = cache_fn.cache_entry(source, reader, cache_dir=cache_dir)
+    new = cache_fn.cache_entry(source, reader, cache_dir=cache_dir, usecols=["pid"])
+    os.utime(old, (0, 0))
+    removed = cache_fn.evict(cache_dir, max_bytes=new.stat().st_size)
+    assert removed == [old]
+    assert new.exists()
+
+
+def test_main_clears_cache(source, tmp_path):
+    cache_dir = tmp_path / "cache"
+    cache_fn.cache_entry(source, counting_reader([]), cache_dir=cache_dir)
+    cache_fn.main(["--cache-dir", str(cache_dir), "--clear"])
+    assert list(cache_dir.glob("*.feather")) == []
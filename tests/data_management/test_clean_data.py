@@ -23,6 +23,12 @@ def test_filter_by_year(data):
     assert np.all(df["syear"] == 2013)
 
 
+def test_filter_by_keys(data):
+    output = cleaned_fn.filter_by_keys(data, "pid", [2, 4])
+    assert output["pid"].unique().tolist() == [2, 4]
+    assert cleaned_fn.filter_by_keys(data, "pid") is data
+
+
 def test_replace_invalid_responses(data):
     # create sample dataframe
     df = cleaned_fn.replace_invalid_responses(data, "pgexpue", "int")
@@ -41,6 +47,29 @@ def test_pgen_treatment(data):
     pd.testing.assert_frame_equal(output, expected_output)
 
 
+def test_pgen_treatment_windows(data):
+    data.loc[(data["pid"] == 3) & (data["syear"] == 2017), "hid"] = 9
+    expected_output = pd.DataFrame(
+        {
+            "pid": [1, 2, 3, 4, 1, 2, 3, 4],
+            "hid": [5, 6, 7, 8, 5, 6, 7, 8],
+            "start_year": [2013] * 4 + [2014] * 4,
+            "end_year": [2017] * 8,
+            "went_unemployed": [0, 1, 0, 0, 0, 0, 0, 0],
+        },
+    )
+    output = cleaned_fn.pgen_treatment_windows(data, [(2013, 2017), (2014, 2017)])
+    pd.testing.assert_frame_equal(output, expected_output, check_dtype=False)
+
+
+def test_pgen_treatment_windows_duplicate_rows(data):
+    with pytest.raises(ValueError, match="more than one row"):
+        cleaned_fn.pgen_treatment_windows(
+            pd.concat([data, data.iloc[[0]]]),
+            [(2013, 2017)],
+        )
+
+
 def test_ppath_functions(data):
     expected_output = pd.DataFrame(
         {
@@ -110,3 +139,76 @@ def test_hbrutto_functions(data):
     output = output.reset_index(drop=True)
     # Check if the output matches the expected output
     pd.testing.assert_frame_equal(output, expected_output)
+
+
+@pytest.fixture()
+def data_codes(data):
+    def to_code(value):
+        if isinstance(value, str) and value.startswith("["):
+            return cleaned_fn.label_code(value)
+        return value
+
+    return data.apply(lambda column: pd.to_numeric(column.map(to_code)))
+
+
+def test_label_code():
+    assert cleaned_fn.label_code("[-2] trifft nicht zu") == -2
+    assert cleaned_fn.label_code("[1] Voll erwerbstätig") == 1
+
+
+@pytest.mark.parametrize(
+    "function",
+    [
+        cleaned_fn.pgen_treatment,
+        cleaned_fn.ppath_functions,
+        cleaned_fn.pl_functions,
+        cleaned_fn.pgen_covariates,
+        cleaned_fn.hgen_functions,
+        cleaned_fn.hbrutto_functions,
+    ],
+)
+def test_codes_mode_matches_label_mode(data, data_codes, function):
+    expected_output = function(data)
+    output = function(data_codes, codes=True)
+    pd.testing.assert_frame_equal(output, expected_output)
+
+
+def test_data_clean_codes_mode(data, data_codes):
+    expected_output = cleaned_fn.data_clean(*[data] * 6)
+    output = cleaned_fn.data_clean(*[data_codes] * 6, codes=True)
+    assert len(output) > 0
+    pd.testing.assert_frame_equal(output, expected_output)
+
+
+def test_clean_columns(data):
+    spec = {"pgexpue": "int", "ple0008": "category", "hhgr": "float"}
+    expected_output = data
+    for column, data_type in spec.items():
+        expected_output = cleaned_fn.replace_invalid_responses(
+            expected_output,
+            column,
+            data_type,
+        )
+    original = data.copy()
+    output = cleaned_fn.clean_columns(data, spec)
+    pd.testing.assert_frame_equal(output, expected_output)
+    pd.testing.assert_frame_equal(data, original)
+    assert np.shares_memory(output["pid"].to_numpy(), data["pid"].to_numpy())
+
+
+def test_clean_columns_missing_column(data):
+    with pytest.raises(ValueError, match="do not exist"):
+        cleaned_fn.clean_columns(data, {"not_a_column": "float"})
+
+
+def test_data_clean_keys(data):
+    keys = {}
+    output = cleaned_fn.data_clean(*[data] * 6, keys=keys)
+    assert keys["pid"].tolist() == [1, 2, 3, 4]
+    assert output["hid"].isin(keys["hid"]).all()
+
+
+def test_data_clean_lazy_mode(data):
+    expected_output = cleaned_fn.data_clean(*[data] * 6)
+    output = cleaned_fn.data_clean(*[data] * 6, lazy=True)
+    pd.testing.assert_frame_equal(output, expected_output)
@@ -0,0 +1,77 @@
+import final_project.data_management.keys as keys_fn
+import numpy as np
+import pandas as pd
+import pytest
+
+
+@pytest.fixture()
+def frames():
+    left = pd.DataFrame(
+        {
+            "pid": [4, 1, 2, 3, 1],
+            "hid": [8, 5, 6, 7, 9],
+            "went_unemployed": [0, 1, 0, 1, 0],
+        },
+        index=[3, 3, 0, 1, 2],
+    )
+    right = pd.DataFrame(
+        {
+            "hid": [5, 6, 7, 9, 5],
+            "pid": [1, 2, 3, 1, 1],
+            "age": [28.0, 28.0, 40.0, 29.0, 30.0],
+        },
+    )
+    return left, right
+
+
+def test_factorize_keys_shares_codes(frames):
+    left, right = frames
+    keys, (left_codes, right_codes) = keys_fn.factorize_keys([left, right])
+    assert keys["pid"].tolist() == [4, 1, 2, 3]
+    assert left_codes["pid"].dtype == np.int32
+    np.testing.assert_array_equal(right_codes["pid"], [1, 2, 3, 1, 1])
+    np.testing.assert_array_equal(
+        keys_fn.encode_keys(right, keys)["hid"],
+        right_codes["hid"],
+    )
+
+
+@pytest.mark.parametrize("on", ["pid", ["pid", "hid"]])
+def test_gather_join_matches_merge(frames, on):
+    left, right = frames
+    keys, (left_codes, right_codes) = keys_fn.factorize_keys([left, right])
+    output, codes = keys_fn.gather_join(
+        left,
+        right,
+        on,
+        keys,
+        left_codes,
+        right_codes,
+    )
+    expected_output = left.merge(right, on=on)
+    sort_columns = list(expected_output.columns)
+    pd.testing.assert_frame_equal(
+        output.sort_values(sort_columns).reset_index(drop=True),
+        expected_output.sort_values(sort_columns).reset_index(drop=True),
+    )
+    np.testing.assert_array_equal(keys["pid"][codes["pid"]], output["pid"])
+
+
+def test_gather_join_suffixes_overlapping_columns(frames):
+    left, right = frames
+    right = right.rename(columns={"age": "went_unemployed"})
+    keys, (left_codes, right_codes) = keys_fn.factorize_keys([left, right])
+    output, _ = keys_fn.gather_join(
+        left,
+        right,
+        ["pid", "hid"],
+        keys,
+        left_codes,
+        right_codes,
+    )
+    assert list(output.columns) == [
+        "pid",
+        "hid",
+        "went_unemployed_x",
+        "went_unemployed_y",
+    ]
@@ -0,0 +1,62 @@
+import pandas as pd
+import pytest
+
+import src.final_project.data_management.load_data as load_fn
+
+
+@pytest.fixture()
+def stata_path(tmp_path):
+    df = pd.DataFrame(
+        {
+            "pid": [1, 1, 2, 2, 3, 3],
+            "hid": [5, 5, 6, 6, 7, 7],
+            "syear": [2013, 2014, 2013, 2017, 2015, 2017],
+            "hhgr": [2, 2, 3, 4, 1, 1],
+            "hgi1hinc": [7000, 7000, 3400, 3500, 5000, 5200],
+            "unused": [0.5, 0.5, 0.5, 0.5, 0.5, 0.5],
+        },
+    )
+    path = tmp_path / "hbrutto.dta"
+    df.to_stata(path, write_index=False)
+    return path
+
+
+def test_read_soep_dataset(stata_path):
+    expected_output = pd.DataFrame(
+        {
+            "hid": [5, 6, 6, 7],
+            "syear": [2013, 2013, 2017, 2017],
+            "hhgr": [2, 3, 4, 1],
+        },
+    )
+    output = load_fn.read_soep_dataset(
+        stata_path,
+        columns=["hid", "syear", "hhgr"],
+        years=[2013, 2017],
+        chunksize=2,
+    )
+    pd.testing.assert_frame_equal(output, expected_output, check_dtype=False)
+
+
+def test_read_soep_dataset_requires_syear(stata_path):
+    with pytest.raises(ValueError, match="syear"):
+        load_fn.read_soep_dataset(stata_path, columns=["hid"], years=[2013])
+
+
+def test_read_soep_datasets(stata_path):
+    output = load_fn.read_soep_datasets({"hbrutto": stata_path}, years=[2017])
+    assert list(output["hbrutto"].columns) == load_fn.SOEP_COLUMNS["hbrutto"]
+    assert (output["hbrutto"]["syear"] == 2017).all()
+
+
+@pytest.mark.parametrize("cache", [False, True])
+def test_read_soep_datasets_parallel(stata_path, tmp_path, cache):
+    paths = {"hbrutto": stata_path, "hgen": stata_path}
+    expected_output = load_fn.read_soep_datasets(paths)
+    output = load_fn.read_soep_datasets(
+        paths,
+        cache_dir=tmp_path / "cache" if cache else None,
+        n_workers=2,
+    )
+    for name in paths:
+        pd.testing.assert_frame_equal(output[name], expected_output[name])
@@ -0,0 +1,45 @@
+import final_project.data_management.clean_data as cleaned_fn
+import numpy as np
+import pandas as pd
+import pytest
+from final_project.config import TEST_DIR
+from final_project.data_management.panel import PanelIndex, panel_index
+
+
+@pytest.fixture()
+def data():
+    test_df = pd.read_csv(
+        TEST_DIR / "data_management" / "Test_fn.csv",
+        encoding="iso-8859-1",
+    )
+    return test_df
+
+
+def test_panel_index_years(data):
+    panel = PanelIndex(data)
+    assert panel.years == [2013, 2014, 2017]
+    assert len(panel) == len(data)
+
+
+@pytest.mark.parametrize("year", [2013, 2014, 2017, 2020])
+def test_panel_index_wave_matches_filter_by_year(data, year):
+    expected_output = cleaned_fn.filter_by_year(data, year)
+    output = PanelIndex(data).wave(year)
+    pd.testing.assert_frame_equal(output, expected_output)
+
+
+def test_panel_index_wave_is_view(data):
+    panel = PanelIndex(data)
+    wave = panel.wave(2013)
+    assert np.shares_memory(wave["pid"].to_numpy(), panel.df["pid"].to_numpy())
+
+
+def test_panel_index_of_panel_index(data):
+    panel = PanelIndex(data)
+    assert panel_index(panel) is panel
+
+
+def test_cleaning_functions_accept_panel_index(data):
+    expected_output = cleaned_fn.pl_functions(data)
+    output = cleaned_fn.pl_functions(PanelIndex(data))
+    pd.testing.assert_frame_equal(output, expected_output)
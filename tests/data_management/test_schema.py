@@ -0,0 +1,40 @@
+import final_project.data_management.clean_data as cleaned_fn
+import final_project.data_management.schema as schema_fn
+import numpy as np
+import pandas as pd
+import pytest
+from final_project.config import TEST_DIR
+
+
+@pytest.fixture()
+def data():
+    test_df = pd.read_csv(
+        TEST_DIR / "data_management" / "Test_fn.csv",
+        encoding="iso-8859-1",
+    )
+    return test_df
+
+
+def test_compact_dtypes(data):
+    df = cleaned_fn.data_clean(*[data] * 6)
+    output, report = schema_fn.compact_dtypes(df)
+    assert output.dtypes.astype(str).to_dict() == schema_fn.CLEAN_DATA_SCHEMA
+    pd.testing.assert_frame_equal(output, df, check_dtype=False, rtol=1e-6)
+    assert (report["bytes_after"] < report["bytes_before"]).all()
+    assert report.loc["sex", "dtype_after"] == "int8"
+
+
+@pytest.mark.parametrize(
+    ("values", "dtype"),
+    [([1, 300], "int8"), ([1.5, 2.0], "int32"), ([1.0, np.nan], "int8")],
+)
+def test_compact_dtypes_lossy_integers(values, dtype):
+    df = pd.DataFrame({"x": values})
+    with pytest.raises(ValueError, match="'x'"):
+        schema_fn.compact_dtypes(df, {"x": dtype})
+
+
+def test_compact_dtypes_lossy_floats():
+    df = pd.DataFrame({"x": [1e40, 2.0]})
+    with pytest.raises(ValueError, match="precision"):
+        schema_fn.compact_dtypes(df, {"x": "float32"})
@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import src.final_project.data_management.clean_data as cleaned_fn
+from src.final_project.data_management.load_data import SOEP_COLUMNS
+from src.final_project.data_management.synthetic import (
+    SYNTHETIC_LABELS,
+    SYNTHETIC_YEARS,
+    synthetic_soep,
+)
+
+
+@pytest.fixture()
+def datasets():
+    return synthetic_soep(5_000, seed=1)
+
+
+def test_synthetic_soep_structure(datasets):
+    for name, columns in SOEP_COLUMNS.items():
+        assert sorted(datasets[name].columns) == sorted(columns)
+    pgen = datasets["pgen"]
+    assert sorted(pgen["syear"].unique()) == SYNTHETIC_YEARS
+    assert not pgen.duplicated(["pid", "syear"]).any()
+    assert datasets["ppath"]["pid"].is_unique
+    assert set(pgen["pid"]) <= set(datasets["ppath"]["pid"])
+    assert set(zip(pgen["hid"], pgen["syear"])) == set(
+        zip(datasets["hbrutto"]["hid"], datasets["hbrutto"]["syear"]),
+    )
+    # The loneliness questions are only asked in 2013 and 2017.
+    asked = datasets["pl"]["syear"].isin([2013, 2017])
+    not_part = "[-8] Frage in diesem Jahr nicht Teil des Frageprogramms"
+    assert (datasets["pl"].loc[~asked, "plj0587"] == not_part).all()
+    assert (datasets["pl"].loc[asked, "plj0587"] != not_part).all()
+
+
+def test_synthetic_soep_labels(datasets):
+    for column, labels in SYNTHETIC_LABELS.items():
+        name = next(name for name, cols in SOEP_COLUMNS.items() if column in cols)
+        values = set(datasets[name][column].unique())
+        assert set(labels) <= values
+        assert values - set(labels) <= set(cleaned_fn.UNCONSIDERABLE)
+    invalid = datasets["pgen"]["pgexpue"].isin(cleaned_fn.UNCONSIDERABLE)
+    assert invalid.any()
+
+
+def test_synthetic_soep_codes_mode_matches_label_mode(datasets):
+    codes = synthetic_soep(5_000, seed=1, codes=True)
+    for name, df in codes.items():
+        labels = datasets[name].apply(
+            lambda column: column.map(
+                lambda value: cleaned_fn.label_code(value)
+                if isinstance(value, str)
+                else value,
+            ).astype(np.float64),
+        )
+        pd.testing.assert_frame_equal(labels, df.astype(np.float64))
+
+
+def test_synthetic_soep_chunks():
+    datasets = synthetic_soep(5_000, seed=1, codes=True, chunksize=1_000)
+    assert len(datasets["ppath"]) == 5_000
+    assert datasets["ppath"]["pid"].is_unique
+    assert not datasets["hgen"].duplicated(["hid", "syear"]).any()
+
+
+def test_data_clean_on_synthetic_soep(datasets):
+    output = cleaned_fn.data_clean(
+        datasets["pgen"],
+        datasets["pgen"],
+        datasets["ppath"],
+        datasets["pl"],
+        datasets["hgen"],
+        datasets["hbrutto"],
+    )
+    assert len(output) > 0
+    assert set(output["went_unemployed"]) == {0, 1}
+    assert output["age"].between(22, 64).all()
@@ -0,0 +1,10 @@
+"""Tests for the final module."""
+from tests.final.test_render import test_render_figures, test_render_matching_figures
+from tests.final.test_summary import test_cube_means, test_summary_cube
+
+__all__ = (
+    test_summary_cube,
+    test_cube_means,
+    test_render_figures,
+    test_render_matching_figures,
+)
@@ -0,0 +1,47 @@
+"""Tests for the rendering of figures."""
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import pytest
+from final_project.analysis.matching import fit_matching
+from final_project.config import TEST_DIR
+from final_project.final.plot import (
+    plot_effect_size,
+    plot_loneliness_by_health,
+    plot_loneliness_by_unemployment,
+    plot_match,
+)
+from final_project.final.render import render_figure, render_figures
+from final_project.final.summary import summary_cube
+from matplotlib.figure import Figure
+
+
+@pytest.fixture()
+def data():
+    return pd.read_csv(TEST_DIR / "analysis" / "test_match.csv")
+
+
+@pytest.mark.parametrize("n_workers", [1, 2])
+def test_render_figures(data, tmp_path, n_workers):
+    cube = summary_cube(data.assign(hh_income=np.linspace(1000, 6000, len(data))))
+    jobs = [
+        (plot_loneliness_by_unemployment, tmp_path / "a.png", (cube,)),
+        (plot_loneliness_by_health, tmp_path / "b.png", (cube,)),
+    ]
+    open_figures = plt.get_fignums()
+    paths = render_figures(jobs, n_workers=n_workers)
+    assert paths == [tmp_path / "a.png", tmp_path / "b.png"]
+    assert all(path.stat().st_size > 0 for path in paths)
+    assert plt.get_fignums() == open_figures
+
+
+def test_render_matching_figures(data, tmp_path):
+    psm = fit_matching(data)["psm"]
+    open_figures = plt.get_fignums()
+    fig = plot_match(psm, "Matching", "# of obs", "propensity logit", ["t", "c"])
+    assert isinstance(fig, Figure)
+    assert fig.axes[0].get_title() == "Matching"
+    render_figure(plot_effect_size, tmp_path / "effect_size.png", psm)
+    assert (tmp_path / "effect_size.png").exists()
+    assert plt.get_fignums() == open_figures
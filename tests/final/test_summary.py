@@ -0,0 +1,70 @@
+"""Tests for the summary cube."""
+
+import numpy as np
+import pandas as pd
+import pytest
+from final_project.final.summary import CUBE_OUTCOMES, cube_means, summary_cube
+
+
+@pytest.fixture()
+def data():
+    rng = np.random.default_rng(0)
+    n = 500
+    data = pd.DataFrame(
+        {
+            "went_unemployed": rng.integers(0, 2, n),
+            "sex": rng.integers(0, 2, n),
+            "marital_status": rng.integers(0, 2, n),
+            "hh_members": rng.integers(1, 5, n).astype(float),
+            "hh_income": rng.normal(loc=3500, scale=1000, size=n),
+            "health_2013": rng.integers(1, 6, n).astype(float),
+            "aggregate_loneliness_2013": rng.normal(size=n),
+            "aggregate_loneliness_2017": rng.normal(size=n),
+        },
+    )
+    data.loc[::7, "aggregate_loneliness_2017"] = np.nan
+    data.loc[::11, "hh_members"] = np.nan
+    return data
+
+
+def test_summary_cube(data):
+    cube = summary_cube(data)
+    assert cube["aggregate_loneliness_2013_count"].sum() == len(data)
+    cell = cube.iloc[0]
+    rows = data[
+        (data["went_unemployed"] == cell["went_unemployed"])
+        & (data["sex"] == cell["sex"])
+        & (data["marital_status"] == cell["marital_status"])
+        & ((data["hh_members"] > 2) == cell["hh_large"])
+        & ((data["hh_income"] > 3500) == cell["hh_high_income"])
+        & ((data["health_2013"] > 2) == cell["above_avg_health"])
+    ]
+    assert (
+        cell["aggregate_loneliness_2017_count"]
+        == rows["aggregate_loneliness_2017"].count()
+    )
+    np.testing.assert_allclose(
+        cell[
+            ["aggregate_loneliness_2017_mean", "aggregate_loneliness_2017_var"]
+        ].astype(
+            float,
+        ),
+        [
+            rows["aggregate_loneliness_2017"].mean(),
+            rows["aggregate_loneliness_2017"].var(),
+        ],
+    )
+
+
+def test_cube_means(data):
+    cube = summary_cube(data)
+    output = cube_means(cube, ["sex"], went_unemployed=1)
+    expected = data[data["went_unemployed"] == 1].groupby("sex")[CUBE_OUTCOMES].mean()
+    pd.testing.assert_frame_equal(output, expected, check_names=False)
+    overall = cube_means(cube, [])
+    np.testing.assert_allclose(overall.iloc[0], data[CUBE_OUTCOMES].mean())
+    large = cube_means(cube, ["hh_large"]).loc[0]
+    np.testing.assert_allclose(
+        large,
+        data.loc[~(data["hh_members"] > 2), CUBE_OUTCOMES].mean(),
+    )
@@ -0,0 +1,42 @@
+import pandas as pd
+import pytest
+
+from src.final_project.benchmarks import (
+    BENCHMARKS,
+    compare_benchmarks,
+    read_benchmarks,
+    run_benchmarks,
+    write_benchmarks,
+)
+
+
+@pytest.fixture(scope="module")
+def results():
+    return run_benchmarks(sizes=[2_000, 4_000], repeat=2)
+
+
+def test_run_benchmarks(results):
+    assert len(results) == 2 * len(BENCHMARKS)
+    assert set(results["benchmark"]) == set(BENCHMARKS)
+    assert (results["seconds"].map(len) == 2).all()
+    assert (results["min_seconds"] > 0).all()
+    assert (results["peak_bytes"] > 0).all()
+    rows = results.set_index(["benchmark", "n_persons"])["n_rows"]
+    assert rows[("data_clean", 4_000)] > rows[("data_clean", 2_000)]
+
+
+def test_run_benchmarks_unknown_name():
+    with pytest.raises(ValueError, match="Unknown benchmarks"):
+        run_benchmarks(sizes=[2_000], names=["not_a_benchmark"])
+
+
+def test_write_and_compare_benchmarks(results, tmp_path):
+    path = tmp_path / "benchmarks.json"
+    write_benchmarks(results, path, info={"commit": "abc"})
+    baseline, info = read_benchmarks(path)
+    assert info == {"commit": "abc"}
+    pd.testing.assert_frame_equal(baseline, results)
+    comparison = compare_benchmarks(baseline, results)
+    assert len(comparison) == len(results)
+    assert (comparison["time_ratio"] == 1).all()
+    assert (comparison["memory_ratio"] == 1).all()
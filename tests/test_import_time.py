@@ -0,0 +1,53 @@
+import json
+import os
+import subprocess
+import sys
+
+# Seconds that importing the package may take in a fresh interpreter. Heavy plotting
+# and statistics packages alone take longer than this.
+IMPORT_TIME_BUDGET = float(os.environ.get("FINAL_PROJECT_IMPORT_BUDGET", "1.5"))
+
+HEAVY_MODULES = ["matplotlib", "seaborn", "sklearn", "statsmodels", "psmpy", "scipy"]
+
+PACKAGES = [
+    "final_project",
+    "final_project.data_management",
+    "final_project.analysis",
+    "final_project.final",
+]
+
+
+def _import_in_subprocess(modules):
+    code = (
+        "import json, sys, time\n"
+        "start = time.perf_counter()\n"
+        f"for module in {modules!r}:\n"
+        "    __import__(module)\n"
+        "seconds = time.perf_counter() - start\n"
+        "print(json.dumps({'seconds': seconds, 'modules': sorted(sys.modules)}))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    return json.loads(result.stdout)
+
+
+def test_import_time_budget():
+    seconds = min(_import_in_subprocess(PACKAGES)["seconds"] for _ in range(3))
+    assert seconds < IMPORT_TIME_BUDGET
+
+
+def test_import_does_not_load_heavy_modules():
+    modules = [
+        *PACKAGES,
+        "final_project.analysis.model",
+        "final_project.analysis.predict",
+        "final_project.analysis.task_analysis",
+        "final_project.final.plot",
+        "final_project.final.task_final",
+    ]
+    loaded = set(_import_in_subprocess(modules)["modules"])
+    assert loaded.isdisjoint(HEAVY_MODULES)
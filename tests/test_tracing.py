@@ -0,0 +1,107 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytask
+import pytest
+from final_project import plugin
+from final_project.tracing import Trace, count_rows, span, traced
+
+
+@traced
+def _double(df):
+    return pd.concat([df, df])
+
+
+@traced
+def _pipeline(df):
+    return _double(_double(df)).head(3)
+
+
+@traced
+def _fail(df):
+    raise ValueError("failed")
+
+
+@pytest.fixture()
+def data():
+    return pd.DataFrame({"x": np.arange(5)})
+
+
+def test_traced_without_trace(data):
+    pd.testing.assert_frame_equal(_pipeline(data), data.head(3))
+
+
+def test_trace_records_nested_spans(data):
+    with Trace() as trace:
+        _pipeline(data)
+    names = [span.name for span in trace.spans]
+    assert names == ["_double", "_double", "_pipeline"]
+    inner, outer, pipeline = trace.spans
+    assert (inner.rows_in, inner.rows_out) == (5, 10)
+    assert (outer.rows_in, outer.rows_out) == (10, 20)
+    assert (pipeline.rows_in, pipeline.rows_out) == (5, 3)
+    assert inner.stack == ("_pipeline",)
+    assert pipeline.stack == ()
+    children = inner.wall_seconds + outer.wall_seconds
+    assert pipeline.self_seconds == pytest.approx(pipeline.wall_seconds - children)
+    assert all(span.cpu_seconds >= 0 for span in trace.spans)
+
+
+def test_span_takes_rows_from_nested_spans(data):
+    with Trace() as trace, span("task", category="task"):
+        _pipeline(data)
+    task = trace.spans[-1]
+    assert (task.name, task.rows_in, task.rows_out) == ("task", 5, 3)
+
+
+def test_trace_records_errors(data):
+    with Trace() as trace, pytest.raises(ValueError, match="failed"):
+        _fail(data)
+    assert trace.spans[0].error == "ValueError"
+
+
+def test_only_one_active_trace():
+    with Trace(), pytest.raises(RuntimeError, match="already active"), Trace():
+        pass
+
+
+def test_trace_exports(data, tmp_path):
+    with Trace() as trace:
+        _pipeline(data)
+    chrome, folded = trace.write(tmp_path / "trace")
+    events = json.loads(chrome.read_text())["traceEvents"]
+    complete = [event for event in events if event["ph"] == "X"]
+    assert [event["name"] for event in complete] == ["_double", "_double", "_pipeline"]
+    assert complete[-1]["args"]["rows_out"] == 3
+    lines = folded.read_text().splitlines()
+    assert [line.rsplit(" ", 1)[0] for line in lines] == [
+        "_pipeline;_double",
+        "_pipeline",
+    ]
+
+
+def test_count_rows(data):
+    assert count_rows(data) == 5
+    assert count_rows({"a": data, "b": data["x"]}) == 10
+    assert count_rows(data["x"].sum()) is None
+    assert count_rows({"a": data, "b": 1}) is None
+
+
+def test_plugin_writes_trace(tmp_path, monkeypatch):
+    monkeypatch.setattr(plugin, "TRACE", True)
+    monkeypatch.setattr(plugin, "TRACE_DIR", tmp_path / "traces")
+    tmp_path.joinpath("task_example.py").write_text(
+        "import pytask\n"
+        "\n"
+        "@pytask.mark.produces('out.txt')\n"
+        "def task_example(produces):\n"
+        "    produces.write_text('done')\n",
+    )
+    with pytest.raises(SystemExit) as exit_info:
+        pytask.cli.main([str(tmp_path)], standalone_mode=False)
+    assert exit_info.value.code == 0
+    (chrome,) = (tmp_path / "traces").glob("*.json")
+    events = json.loads(chrome.read_text())["traceEvents"]
+    assert [event["cat"] for event in events if event["ph"] == "X"] == ["task"]
+    assert len(list((tmp_path / "traces").glob("*.folded"))) == 1
@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+from final_project.utilities import (
+    artifact_products,
+    read_artifact,
+    write_artifact,
+    write_csv_if_changed,
+)
+
+
+@pytest.fixture()
+def data():
+    return pd.DataFrame(
+        {
+            "pid": np.array([1, 2, 3], dtype="int32"),
+            "sex": np.array([1, 0, 1], dtype="int8"),
+            "health_2013": pd.array([1, None, 3], dtype="Int64"),
+            "group": pd.Categorical(["a", "b", "a"]),
+        },
+        index=[5, 6, 7],
+    )
+
+
+def test_artifact_round_trip_keeps_dtypes(data, tmp_path):
+    path = tmp_path / "data.feather"
+    write_artifact(data, path)
+    output = read_artifact(path)
+    pd.testing.assert_frame_equal(output, data.reset_index(drop=True))
+    pd.testing.assert_frame_equal(
+        read_artifact(path, columns=["sex"]),
+        data[["sex"]].reset_index(drop=True),
+    )
+
+
+def test_write_artifact_exports_csv(data, tmp_path):
+    products = artifact_products(tmp_path / "data.feather", export_csv=True)
+    write_artifact(data, products["data"], products.get("csv"))
+    assert products["csv"] == tmp_path / "data.csv"
+    assert pd.read_csv(products["csv"])["pid"].tolist() == [1, 2, 3]
+    assert "csv" not in artifact_products(tmp_path / "data.feather", export_csv=False)
+
+
+def test_write_csv_if_changed(data, tmp_path):
+    path = tmp_path / "data.csv"
+    assert write_csv_if_changed(data, path)
+    path.touch()
+    mtime = path.stat().st_mtime_ns
+    assert not write_csv_if_changed(data.copy(), path)
+    assert path.stat().st_mtime_ns == mtime
+    assert write_csv_if_changed(data.assign(sex=0), path)
+    assert pd.read_csv(path)["sex"].tolist() == [0, 0, 0]